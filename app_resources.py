@@ -0,0 +1,221 @@
+"""
+Prozessweit geteilte Ressourcen für alle Streamlit-Sessions.
+
+Über `st.cache_resource` werden Mandanten-Konfiguration (inkl. kompiliertem
+Katalog) und Arbeitsbereich eines Mandanten genau einmal pro Server-Prozess
+geöffnet; alle Sessions eines Mandanten teilen sich die Memory-Map und die
+daran angehängten, inkrementell gepflegten Benchmarks und Aggregate. Beide
+Caches sind begrenzt (LRU). Ein verdrängter Arbeitsbereich bleibt offen,
+solange noch Sessions ihn halten, und wird erst danach geschlossen (Entwürfe,
+Ereignisse und Aggregate werden dabei weggeschrieben).
+
+Der aktive Mandant ergibt sich aus dem Login (E-Mail-Domain), sonst aus
+`?tenant=<id>` und bleibt für die Session gemerkt.
+
+`setup_page` startet außerdem einmal je Prozess die per `EAM_METRICS_*`
+konfigurierte Metrik-Auslieferung (siehe `metrics`).
+"""
+import os
+import weakref
+
+import streamlit as st
+
+import metrics
+from cohort_index import ATTRIBUTES, facets
+from tenants import DEFAULT_TENANT, TENANTS_DIR, TenantWorkspace, email_domains, load_tenant
+
+MAX_TENANTS = int(os.environ.get("EAM_MAX_TENANTS", 32))
+
+
+@metrics.count_cache("tenant", st.cache_resource(max_entries=4 * MAX_TENANTS, show_spinner=False))
+def get_tenant(tenant_id: str):
+    return load_tenant(tenant_id)
+
+
+@metrics.count_cache(
+    "workspace",
+    st.cache_resource(max_entries=MAX_TENANTS, on_release=TenantWorkspace.release, show_spinner=False),
+)
+def get_workspace(tenant_id: str) -> TenantWorkspace:
+    return TenantWorkspace.acquire(get_tenant(tenant_id))
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _email_domains() -> dict:
+    return email_domains(TENANTS_DIR)
+
+
+@st.cache_resource(show_spinner=False)
+def _metrics_exporters() -> dict:
+    return metrics.serve_from_env()
+
+
+# -------------------------------------------------------------------
+# Mandant der aktuellen Session
+# -------------------------------------------------------------------
+def current_tenant():
+    """Mandant der Session; zeigt bei geschützten Mandanten die Zugangsabfrage."""
+    tenant_id = _resolve_tenant_id()
+    try:
+        tenant = get_tenant(tenant_id)
+    except KeyError:
+        st.session_state.pop("tenant_id", None)
+        st.error(f"Unbekannter Mandant: `{tenant_id}`")
+        st.stop()
+    except ValueError as exc:
+        st.session_state.pop("tenant_id", None)
+        st.error(f"Die Konfiguration von Mandant `{tenant_id}` ist ungültig: {exc}")
+        st.stop()
+    st.session_state.tenant_id = tenant.id
+
+    granted = st.session_state.setdefault("tenant_access", [])
+    if tenant.requires_access and tenant.id not in granted:
+        if tenant.matches_email(st.user.get("email")):
+            granted.append(tenant.id)
+        else:
+            _access_gate(tenant)
+    return tenant
+
+
+def _resolve_tenant_id() -> str:
+    email = st.user.get("email") if st.user.get("is_logged_in") else None
+    if email:
+        tenant_id = _email_domains().get(email.rpartition("@")[2].casefold())
+        if tenant_id:
+            return tenant_id
+    return st.query_params.get("tenant") or st.session_state.get("tenant_id") or DEFAULT_TENANT
+
+
+def _access_gate(tenant):
+    st.title(tenant.heading)
+    st.markdown(f"Dieser Bereich ist **{tenant.name}** vorbehalten.")
+    with st.form("tenant_access_form"):
+        code = st.text_input("Zugangscode", type="password")
+        if st.form_submit_button("Anmelden"):
+            if tenant.check_code(code):
+                st.session_state.tenant_access.append(tenant.id)
+                st.rerun()
+            st.error("Zugangscode ist ungültig.")
+    st.stop()
+
+
+def setup_page(page_title: str = None):
+    """Seitenkonfiguration & Branding des Mandanten; gibt den Mandanten zurück."""
+    _metrics_exporters()
+    tenant = current_tenant()
+    st.set_page_config(
+        page_title=f"{page_title} – {tenant.title}" if page_title else tenant.title,
+        page_icon=tenant.page_icon,
+        layout="wide",
+    )
+    if tenant.logo:
+        st.logo(str(tenant.logo))
+    if tenant.theme:
+        # Ergänzt das globale Theme aus config.toml um die Farben des Mandanten
+        theme = {key: tenant.theme.get(key) or st.get_option(f"theme.{key}") for key in (
+            "primaryColor", "backgroundColor", "secondaryBackgroundColor", "textColor",
+        )}
+        st.html(
+            f"""<style>
+.stApp {{ background-color: {theme['backgroundColor']}; color: {theme['textColor']}; }}
+[data-testid="stSidebar"], [data-testid="stHeader"] {{ background-color: {theme['secondaryBackgroundColor']}; }}
+.stApp h1, .stApp h2, .stApp h3, .stApp p, .stApp li, .stApp label {{ color: {theme['textColor']}; }}
+.stApp a {{ color: {theme['primaryColor']}; }}
+.stApp button[kind^="primary"], [data-testid="stFormSubmitButton"] button {{
+    background-color: {theme['primaryColor']}; border-color: {theme['primaryColor']}; color: #ffffff;
+}}
+</style>"""
+        )
+    return tenant
+
+
+# -------------------------------------------------------------------
+# Ressourcen des aktuellen Mandanten
+# -------------------------------------------------------------------
+class _WorkspaceLease:
+    """Referenz einer Session auf einen Arbeitsbereich; freigegeben, sobald der Session-State verworfen wird."""
+
+    def __init__(self, workspace: TenantWorkspace):
+        self.workspace = workspace
+        weakref.finalize(self, workspace.release)
+
+
+def _workspace() -> TenantWorkspace:
+    tenant_id = current_tenant().id
+    leases = st.session_state.setdefault("workspace_leases", {})
+    while True:
+        workspace = get_workspace(tenant_id)
+        lease = leases.get(tenant_id)
+        if lease is not None and lease.workspace is workspace:
+            return workspace
+        # Zwischen Cache-Zugriff und `retain` verdrängt und geschlossen: neu aus dem Cache holen
+        if workspace.retain():
+            leases[tenant_id] = _WorkspaceLease(workspace)
+            return workspace
+
+
+def get_store():
+    return _workspace().store
+
+
+def get_benchmarks():
+    return _workspace().benchmarks
+
+
+def get_cube():
+    return _workspace().cube
+
+
+def get_index():
+    return _workspace().index
+
+
+def get_points():
+    return _workspace().points
+
+
+def get_drafts():
+    return _workspace().drafts
+
+
+def get_events():
+    return _workspace().events
+
+
+def get_rules():
+    return _workspace().rules
+
+
+def get_segment_cube(segment):
+    """Portfolio-Würfel eines Segment-Filters (`segment_filter`), inkrementell gehalten."""
+    with metrics.STORE_SECONDS.time(operation="segment_cube"):
+        return _workspace().segment_cube(segment)
+
+
+# -------------------------------------------------------------------
+# Segment-Filter (Bitmap-Index)
+# -------------------------------------------------------------------
+def segment_filter(key: str = "segment", expanded: bool = False, label: str = "🔎 Segment-Filter"):
+    """Filter-Widgets über alle Kontextfelder; gibt den Filterausdruck für `CohortIndex` zurück (None = alle)."""
+    index = get_index()
+    selection = {}
+    with st.expander(label, expanded=expanded):
+        columns = st.columns(3)
+        for i, (attribute, label) in enumerate(ATTRIBUTES.items()):
+            counts = index.counts(attribute)
+            with columns[i % 3]:
+                selection[attribute] = st.multiselect(
+                    label,
+                    [value for value, n in counts.items() if n],
+                    format_func=lambda value, counts=counts: f"{value} ({counts[value]:,})".replace(",", "."),
+                    key=f"{key}_{attribute}",
+                )
+        combine = st.radio(
+            "Felder verknüpfen",
+            ["and", "or"],
+            format_func={"and": "UND – alle Felder müssen passen", "or": "ODER – ein Feld genügt"}.get,
+            horizontal=True,
+            key=f"{key}_combine",
+            help="Innerhalb eines Felds gilt immer ODER (z.B. eines der gewählten Ziele).",
+        )
+    return facets(selection, combine)
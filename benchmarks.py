@@ -0,0 +1,222 @@
+"""
+Perzentil-Benchmarks über alle gespeicherten Assessments.
+
+Alle Scores liegen auf einem festen Raster: Antworten sind ganze Zahlen 1–5,
+Dimensionswerte Mittelwerte über wenige Fragen (Standardkatalog:
+Viertelschritte) und der Gesamtscore das Mittel darüber (1/32-Schritte).
+Statt approximativer Sketches (t-digest, KLL) zählen wir deshalb pro
+Rasterpunkt. Passt das exakte Raster nicht in `MAX_RESOLUTION` Schritte je
+Score-Punkt (z.B. Kataloge mit 3, 7 und 10 Fragen je Dimension), wird auf
+1/`MAX_RESOLUTION` gerundet: Scores weichen dann um höchstens eine halbe
+Rasterbreite ab, ein Perzentil-Rang höchstens um den halben Anteil der
+Assessments im selben Rasterpunkt. Die Histogramme haben konstante Größe, sind
+durch Addition beliebig mergebar (auch über Deployments hinweg) und liefern
+Perzentile in O(1) über vorberechnete kumulierte Summen.
+
+Am Store hängend werden die Histogramme nicht bei jeder Einreichung
+geschrieben, sondern gebündelt im Hintergrund (`write_behind.DeferredSave`)
+und beim Schließen. Ob eine geladene Datei zum Store passt, prüft
+`CohortStore.fingerprint`; sonst wird neu aufgebaut.
+
+Geführt wird ein Histogramm je Segment × Kennzahl:
+    Segmente:  Alle, je Ziel, je Pain Point, je Zeithorizont
+    Kennzahlen: Gesamt, je Dimension, je Frage
+"""
+import argparse
+import math
+import threading
+from functools import reduce
+from pathlib import Path
+
+import numpy as np
+
+from cohort_store import CHUNK_ROWS, SEGMENTS, dimension_scores, layout_for, segment_members
+from eam_catalog import DEFAULT_CATALOG
+from write_behind import DeferredSave
+
+OVERALL = "overall"
+# Obergrenze der Raster-Schritte je Score-Punkt (Standardkatalog: exakt mit 32)
+MAX_RESOLUTION = 100
+
+
+def _resolution(catalog) -> int:
+    """Raster-Schritte je Score-Punkt: exakt (alle Mittelwerte auf einem Bin), höchstens `MAX_RESOLUTION`."""
+    return min(catalog.n_dimensions * reduce(math.lcm, catalog.dim_sizes.tolist(), 1), MAX_RESOLUTION)
+
+
+class BenchmarkSketches:
+    """Exakte, mergebare Score-Histogramme je Segment und Kennzahl."""
+
+    FILE_NAME = "benchmarks.npz"
+
+    def __init__(self, catalog=DEFAULT_CATALOG):
+        self.catalog = catalog
+        self.layout = layout_for(catalog)
+        self.resolution = _resolution(catalog)
+        self.n_bins = 4 * self.resolution + 1
+        self.metrics = [OVERALL] + list(catalog.dim_ids) + [f"q{i}" for i in range(catalog.n_questions)]
+        self._metric_index = {m: i for i, m in enumerate(self.metrics)}
+        self._segment_index = {s: i for i, s in enumerate(SEGMENTS)}
+        self.counts = np.zeros((len(SEGMENTS), len(self.metrics), self.n_bins), dtype=np.int64)
+        self._cumulative = None
+        self._lock = threading.Lock()
+        self._path = None
+        self._store = None
+        self._saver = None
+        self.fingerprint = ""
+
+    # --- Aktualisieren ---------------------------------------------
+    def update(self, rows, sign: int = 1):
+        """Zählt Zeilen im Store-Format hinzu (`sign=-1` entfernt sie wieder)."""
+        rows = np.asarray(rows)
+        if len(rows) == 0:
+            return
+        layout, res = self.layout, self.resolution
+        dims = dimension_scores(rows, self.catalog)
+        values = np.concatenate(
+            [dims.mean(axis=1, keepdims=True), dims, rows[:, layout.answers].astype(np.float64)],
+            axis=1,
+        )
+        bins = np.rint((values - 1.0) * res).astype(np.int64)
+        flat = bins + np.arange(len(self.metrics)) * self.n_bins
+
+        members = segment_members(rows, layout)
+
+        size = len(self.metrics) * self.n_bins
+        delta = np.zeros_like(self.counts)
+        for s in range(len(SEGMENTS)):
+            selected = flat[members[:, s]]
+            if len(selected):
+                delta[s] = np.bincount(selected.ravel(), minlength=size).reshape(len(self.metrics), -1)
+        with self._lock:
+            self.counts += sign * delta
+            self._cumulative = None
+
+    def merge(self, other: "BenchmarkSketches") -> "BenchmarkSketches":
+        if other.catalog.version != self.catalog.version:
+            raise ValueError("Benchmarks mit unterschiedlichen Katalog-Versionen lassen sich nicht mergen.")
+        with self._lock:
+            self.counts += other.counts
+            self._cumulative = None
+        return self
+
+    # --- Abfragen --------------------------------------------------
+    @property
+    def exact(self) -> bool:
+        """Liegen alle möglichen Scores exakt auf dem Raster (sonst: Rundung auf 1/`resolution`)?"""
+        return self.resolution == self.catalog.n_dimensions * reduce(math.lcm, self.catalog.dim_sizes.tolist(), 1)
+
+    def count(self, metric: str = OVERALL, segment=("all", "Alle")) -> int:
+        return int(self.counts[self._segment_index[segment], self._metric_index[metric]].sum())
+
+    def percentile_rank(self, score: float, metric: str = OVERALL, segment=("all", "Alle")):
+        """Anteil (0–100) der Assessments mit niedrigerem Score; Gleichstände zählen zur Hälfte.
+
+        Gibt `None` zurück, solange im Segment noch keine Daten vorliegen.
+        """
+        cumulative = self._cumulative_counts()
+        s, m = self._segment_index[segment], self._metric_index[metric]
+        total = cumulative[s, m, -1]
+        if total == 0:
+            return None
+        b = int(np.clip(round((score - 1.0) * self.resolution), 0, self.n_bins - 1))
+        below = cumulative[s, m, b - 1] if b > 0 else 0
+        equal = cumulative[s, m, b] - below
+        return 100.0 * (below + 0.5 * equal) / total
+
+    def _cumulative_counts(self) -> np.ndarray:
+        with self._lock:
+            if self._cumulative is None:
+                self._cumulative = np.cumsum(self.counts, axis=2)
+            return self._cumulative
+
+    # --- Persistenz & Store-Anbindung ------------------------------
+    def save(self, path):
+        with self._lock:
+            counts, fingerprint = self.counts.copy(), self.fingerprint
+        tmp = Path(path).with_suffix(".tmp.npz")
+        np.savez_compressed(tmp, counts=counts, catalog_version=self.catalog.version, fingerprint=fingerprint)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path, catalog=DEFAULT_CATALOG) -> "BenchmarkSketches":
+        sketches = cls(catalog)
+        with np.load(path) as data:
+            if str(data["catalog_version"]) != catalog.version:
+                raise ValueError(f"{path} gehört zu einem anderen Katalog.")
+            if data["counts"].shape != sketches.counts.shape:
+                raise ValueError(f"{path} hat ein unerwartetes Format.")
+            sketches.counts[...] = data["counts"]
+            sketches.fingerprint = str(data["fingerprint"]) if "fingerprint" in data.files else ""
+        return sketches
+
+    @classmethod
+    def from_store(cls, store) -> "BenchmarkSketches":
+        """Baut die Histogramme durch einen Scan über die Memory-Map neu auf."""
+        sketches = cls(store.catalog)
+        sketches.fingerprint = store.fingerprint
+        rows = store.matrix()
+        for begin in range(0, len(rows), CHUNK_ROWS):
+            chunk = rows[begin:begin + CHUNK_ROWS]
+            sketches.update(chunk[store.active_mask(chunk)])
+        return sketches
+
+    @classmethod
+    def attach(cls, store) -> "BenchmarkSketches":
+        """Lädt die persistierten Benchmarks eines Stores (oder baut sie neu) und hält sie aktuell."""
+        path = store.path / cls.FILE_NAME
+        loaded = None
+        if path.exists():
+            try:
+                loaded = cls.load(path, store.catalog)
+            except (ValueError, KeyError, OSError):
+                loaded = None
+        with store.writes_paused():
+            sketches, rebuilt = loaded, False
+            # Nach einem Absturz vor dem nächsten Speichern neu aufbauen
+            if (
+                sketches is None
+                or sketches.fingerprint != store.fingerprint
+                or sketches.count() != int(store.active_mask().sum())
+            ):
+                sketches, rebuilt = cls.from_store(store), True
+            sketches._path = path
+            sketches._store = store
+            sketches._saver = DeferredSave(lambda: sketches.save(path), name="benchmark-writer")
+            store.subscribe(sketches._on_store_change)
+        if rebuilt:
+            sketches.save(path)
+        return sketches
+
+    def close(self):
+        """Vom Store lösen und ausstehende Änderungen schreiben."""
+        if self._store is not None:
+            self._store.unsubscribe(self._on_store_change)
+            self._saver.close()
+            self._store = None
+
+    def _on_store_change(self, positions, rows, sign):
+        self.update(rows, sign)
+        with self._lock:
+            self.fingerprint = self._store.fingerprint
+        self._saver.request()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks mehrerer Deployments zusammenführen.")
+    parser.add_argument("inputs", nargs="+", type=Path, help="benchmarks.npz-Dateien")
+    parser.add_argument("--out", type=Path, required=True, help="Zieldatei für den globalen Benchmark")
+    args = parser.parse_args(argv)
+
+    merged = reduce(
+        lambda acc, p: acc.merge(BenchmarkSketches.load(p)),
+        args.inputs[1:],
+        BenchmarkSketches.load(args.inputs[0]),
+    )
+    merged.save(args.out)
+    print(f"{len(args.inputs)} Benchmarks zusammengeführt: {merged.count():,} Assessments -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,230 @@
+"""
+Voraggregierter Würfel für Heatmaps über Fragen × Segmente.
+
+Gezählt wird je Segment, Frage und Antwortstufe (1–5). Segmente sind die
+Kontextfelder aus Tab 1 (Ziele, Pain Points, Zeithorizont) sowie der
+Bereich / Teilnehmer. Der Würfel hängt als Listener am Kohortenspeicher und
+wird bei jeder Einreichung inkrementell fortgeschrieben. Slicing, Pivot und
+Drill-down (Dimension -> Frage) arbeiten ausschließlich auf den Zählern –
+die Rohdaten werden dafür nicht mehr angefasst. Gespeichert wird wie bei den
+Benchmarks gebündelt im Hintergrund und beim Schließen.
+
+Für einen Segment-Filter des Bitmap-Index hält `attach_segment` einen
+eigenen Würfel: einmal aus den Zeilen des Segments aufgebaut, danach wie der
+Gesamtwürfel inkrementell (nicht persistiert).
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cohort_index import ATTRIBUTES as INDEX_ATTRIBUTES
+from cohort_store import CHUNK_ROWS, SEGMENTS, layout_for, segment_members, unit_codes
+from eam_catalog import DEFAULT_CATALOG
+from write_behind import DeferredSave
+
+N_LEVELS = 5
+# Segmentierungen des Würfels; Archetyp und EA-Level filtert nur der Bitmap-Index
+ATTRIBUTES = {attribute: INDEX_ATTRIBUTES[attribute] for attribute in ("goal", "pain", "horizon", "unit")}
+STATISTICS = ("Ø Bewertung", "Anteil 4–5 (%)", "Anzahl")
+
+
+class CohortCube:
+    """Zähler `(Segment, Frage, Stufe)` für statische Segmente plus je Bereich."""
+
+    FILE_NAME = "cube.npz"
+
+    def __init__(self, catalog=DEFAULT_CATALOG, unit_names=("",)):
+        self.catalog = catalog
+        self.layout = layout_for(catalog)
+        self.unit_names = list(unit_names)
+        self.counts = np.zeros((len(SEGMENTS), catalog.n_questions, N_LEVELS), dtype=np.int64)
+        self.unit_counts = np.zeros(
+            (max(len(self.unit_names), 1), catalog.n_questions, N_LEVELS), dtype=np.int64
+        )
+        self._lock = threading.Lock()
+        self._path = None
+        self._store = None
+        self._saver = None
+        self._segment = None
+        self.fingerprint = ""
+
+    # --- Aktualisieren ---------------------------------------------
+    def update(self, rows, sign: int = 1):
+        rows = np.asarray(rows)
+        if len(rows) == 0:
+            return
+        nq, cell = self.catalog.n_questions, self.catalog.n_questions * N_LEVELS
+        flat = (rows[:, self.layout.answers].astype(np.int64) - 1) + np.arange(nq) * N_LEVELS
+
+        members = segment_members(rows, self.layout)
+        delta = np.zeros_like(self.counts)
+        for s in range(len(SEGMENTS)):
+            selected = flat[members[:, s]]
+            if len(selected):
+                delta[s] = np.bincount(selected.ravel(), minlength=cell).reshape(nq, N_LEVELS)
+
+        units = unit_codes(rows, self.layout).astype(np.int64)
+        n_units = int(units.max()) + 1
+        unit_delta = np.bincount(
+            (flat + units[:, None] * cell).ravel(), minlength=n_units * cell
+        ).reshape(n_units, nq, N_LEVELS)
+
+        with self._lock:
+            self.counts += sign * delta
+            if n_units > len(self.unit_counts):
+                grown = np.zeros((n_units, nq, N_LEVELS), dtype=np.int64)
+                grown[: len(self.unit_counts)] = self.unit_counts
+                self.unit_counts = grown
+            self.unit_counts[:n_units] += sign * unit_delta
+
+    def total(self) -> int:
+        return int(self.counts[0, 0].sum())
+
+    # --- Slicing ---------------------------------------------------
+    def segment_counts(self, attribute: str) -> dict:
+        """Label -> Zähler (Fragen × Stufen) für alle nicht-leeren Segmente eines Attributs."""
+        with self._lock:
+            if attribute == "unit":
+                if self._store is not None:
+                    self.unit_names = self._store.units
+                items = [
+                    (self.unit_names[i] if i < len(self.unit_names) else str(i)) or "(ohne Angabe)"
+                    for i in range(len(self.unit_counts))
+                ]
+                arrays = list(self.unit_counts.copy())
+            else:
+                picked = [i for i, (attr, _) in enumerate(SEGMENTS) if attr == attribute]
+                if not picked:
+                    raise KeyError(attribute)
+                items = [SEGMENTS[i][1] for i in picked]
+                arrays = list(self.counts[picked].copy())
+        return {label: c for label, c in zip(items, arrays) if c[0].sum() > 0}
+
+    def heatmap(self, attribute: str, dimension=None, statistic: str = STATISTICS[0]):
+        """Pivot Segment × Dimension (oder × Frage einer Dimension) als DataFrame plus Fallzahlen."""
+        segments = self.segment_counts(attribute)
+        cat = self.catalog
+        if dimension is None:
+            columns = list(cat.dim_names)
+            groups = [np.flatnonzero(cat.question_dim == d) for d in range(cat.n_dimensions)]
+        else:
+            d = cat.dim_index(dimension)
+            groups = [[q] for q in np.flatnonzero(cat.question_dim == d)]
+            columns = [f"{i + 1}. {cat.questions[q[0]][2]}" for i, q in enumerate(groups)]
+
+        levels = np.arange(1, N_LEVELS + 1)
+        values, sizes = [], []
+        for counts in segments.values():
+            cells = np.stack([counts[g].sum(axis=0) for g in groups])  # (Spalten, Stufen)
+            n = cells.sum(axis=1)
+            if statistic == STATISTICS[1]:
+                values.append(100.0 * cells[:, 3:].sum(axis=1) / np.maximum(n, 1))
+            elif statistic == STATISTICS[2]:
+                values.append(n)
+            else:
+                values.append((cells * levels).sum(axis=1) / np.maximum(n, 1))
+            sizes.append(int(counts[0].sum()))
+
+        frame = pd.DataFrame(values, index=list(segments), columns=columns)
+        return frame, pd.Series(sizes, index=list(segments), name="Assessments")
+
+    def distribution(self, attribute: str, label: str, dimension=None) -> pd.DataFrame:
+        """Antwortverteilung (Anzahl je Stufe) eines Segments je Frage."""
+        counts = self.segment_counts(attribute)[label]
+        rows = [
+            {"Dimension": dim_name, "Frage": question, **{str(lvl + 1): int(c) for lvl, c in enumerate(counts[q])}}
+            for q, (_, dim_name, question) in enumerate(self.catalog.questions)
+            if dimension is None or dim_name == dimension
+        ]
+        return pd.DataFrame(rows)
+
+    # --- Persistenz & Store-Anbindung ------------------------------
+    def save(self, path):
+        with self._lock:
+            counts, unit_counts, fingerprint = self.counts.copy(), self.unit_counts.copy(), self.fingerprint
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez_compressed(
+            tmp,
+            counts=counts,
+            unit_counts=unit_counts,
+            catalog_version=self.catalog.version,
+            fingerprint=fingerprint,
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def from_store(cls, store, positions=None) -> "CohortCube":
+        """Würfel über alle aktiven Assessments oder nur über `positions` (z.B. aus dem Bitmap-Index)."""
+        cube = cls(store.catalog, store.units)
+        cube.fingerprint = store.fingerprint
+        rows = store.matrix()
+        if positions is not None:
+            for begin in range(0, len(positions), CHUNK_ROWS):
+                cube.update(rows[positions[begin:begin + CHUNK_ROWS]])
+            return cube
+        for begin in range(0, len(rows), CHUNK_ROWS):
+            chunk = rows[begin:begin + CHUNK_ROWS]
+            cube.update(chunk[store.active_mask(chunk)])
+        return cube
+
+    @classmethod
+    def attach(cls, store) -> "CohortCube":
+        """Lädt den persistierten Würfel eines Stores (oder baut ihn neu) und hält ihn aktuell."""
+        path = store.path / cls.FILE_NAME
+        loaded = None
+        if path.exists():
+            try:
+                with np.load(path) as data:
+                    if str(data["catalog_version"]) == store.catalog.version:
+                        loaded = cls(store.catalog, store.units)
+                        loaded.counts[...] = data["counts"]
+                        loaded.unit_counts = data["unit_counts"].copy()
+                        loaded.fingerprint = str(data["fingerprint"]) if "fingerprint" in data.files else ""
+            except (ValueError, KeyError, OSError):
+                loaded = None
+        with store.writes_paused():
+            cube, rebuilt = loaded, False
+            if cube is None or cube.fingerprint != store.fingerprint or cube.total() != int(store.active_mask().sum()):
+                cube, rebuilt = cls.from_store(store), True
+            cube._path = path
+            cube._store = store
+            cube._saver = DeferredSave(lambda: cube.save(path), name="cube-writer")
+            store.subscribe(cube._on_store_change)
+        if rebuilt:
+            cube.save(path)
+        return cube
+
+    @classmethod
+    def attach_segment(cls, store, index, segment) -> "CohortCube":
+        """Würfel nur über die Assessments eines Filters (`CohortIndex`-Ausdruck), inkrementell gehalten.
+
+        Zu neuen, geänderten und gelöschten Zeilen prüft `index.matches` die
+        Zugehörigkeit direkt an den Zeilen – ohne erneuten Scan des Segments.
+        Auswahl, Aufbau und Anmeldung laufen unter der Schreibsperre des Stores.
+        """
+        with store.writes_paused():
+            cube = cls.from_store(store, index.positions(segment))
+            cube._store = store
+            cube._segment = (index, segment)
+            store.subscribe(cube._on_store_change)
+        return cube
+
+    def close(self):
+        """Vom Store lösen und ausstehende Änderungen schreiben."""
+        if self._store is not None:
+            self._store.unsubscribe(self._on_store_change)
+            if self._saver is not None:
+                self._saver.close()
+            self._store = None
+
+    def _on_store_change(self, positions, rows, sign):
+        if self._segment is not None:
+            index, segment = self._segment
+            rows = np.asarray(rows)
+            rows = rows[index.matches(segment, rows)]
+        self.update(rows, sign)
+        with self._lock:
+            self.fingerprint = self._store.fingerprint
+        if self._saver is not None:
+            self._saver.request()
@@ -0,0 +1,259 @@
+"""
+Streaming-Export der Kohorte auf Fragenebene.
+
+Der Export läuft als Generator über die Memory-Map des Kohortenspeichers:
+je Block werden einige tausend Assessments in das Long-Format der
+Detailtabelle (eine Zeile je Assessment × Frage) übersetzt, serialisiert und
+als Bytes ausgegeben. Es entsteht nie der gesamte Datensatz im Speicher –
+weder als DataFrame noch als Bytes.
+
+Beispiel:
+    python cohort_export.py --store data/cohort --format parquet --out kohorte.parquet
+    python cohort_export.py --store data/cohort --segment '{"horizon": ["0–6 Monate"], "unit": ["Finance"]}'
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cohort_index import CohortIndex, facets
+from cohort_store import CohortStore, unit_codes
+from eam_catalog import TIME_HORIZONS
+from scoring_rules import compile_rules
+
+FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "jsonl": ("application/x-ndjson", ".jsonl"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+CHUNK_ASSESSMENTS = 2_000
+
+
+def select_rows(store, rows=None) -> np.ndarray:
+    """Positionen aller aktiven Assessments, optional eingeschränkt (Positionen oder Bool-Maske).
+
+    Eine Bool-Maske muss genau `len(store)` Zeilen abdecken – eine ältere,
+    kürzere Maske würde sonst neue Zeilen ein- oder ausschließen.
+    """
+    active = store.active_mask()
+    if rows is None:
+        return np.flatnonzero(active)
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        if len(rows) != len(active):
+            raise ValueError(f"Maske über {len(rows)} Zeilen passt nicht zum Store mit {len(active)} Zeilen.")
+        return np.flatnonzero(rows & active)
+    return rows[active[rows]]
+
+
+def iter_frames(store, rows=None, chunk_assessments: int = CHUNK_ASSESSMENTS, generation=None):
+    """Long-Format-DataFrames, je Block `chunk_assessments` Assessments.
+
+    `rows` bezieht sich auf die Store-Generation `generation` (Standard: die
+    aktuelle). Wird vorher oder während des Exports kompaktiert, bricht der
+    Export ab, statt Positionen anderen Assessments zuzuordnen.
+    """
+    catalog, layout = store.catalog, store.layout
+    with store.writes_paused():
+        generation = store.generation if generation is None else generation
+        _check_generation(store, generation)
+        positions = select_rows(store, rows)
+        matrix = store.matrix()
+    meta = store.iter_meta()
+    meta_position = -1
+    units = np.asarray(store.units, dtype=object)
+    nq = catalog.n_questions
+
+    dim_names = np.asarray([q[1] for q in catalog.questions], dtype=object)
+    questions = np.asarray([q[2] for q in catalog.questions], dtype=object)
+    horizons = np.asarray(TIME_HORIZONS, dtype=object)
+
+    for begin in range(0, len(positions), chunk_assessments):
+        pos = positions[begin:begin + chunk_assessments]
+        block = np.asarray(matrix[pos])
+        n = len(pos)
+        ids = np.empty(n, dtype=object)
+        names = np.empty(n, dtype=object)
+        # Positionen sind aufsteigend: Metadaten-Stream nur vorwärts lesen
+        for i, p in enumerate(pos):
+            while meta_position < p:
+                record = next(meta)
+                meta_position += 1
+            ids[i], names[i] = record["id"], record["name"]
+        _check_generation(store, generation)
+        targets = block[:, layout.targets][:, catalog.question_dim]
+
+        yield pd.DataFrame(
+            {
+                "assessment_id": np.repeat(ids, nq),
+                "Assessment": np.repeat(names, nq),
+                "Teilnehmer / Bereich": np.repeat(units[unit_codes(block, layout)], nq),
+                "Zeithorizont": np.repeat(horizons[block[:, layout.horizon]], nq),
+                "Dimension": np.tile(dim_names, n),
+                "Frage": np.tile(questions, n),
+                "Bewertung": block[:, layout.answers].ravel(),
+                "Ziel (Dimension)": targets.ravel(),
+            }
+        )
+
+
+def _check_generation(store, generation):
+    if store.generation != generation:
+        raise RuntimeError("Die Kohorte wurde während des Exports kompaktiert; bitte erneut exportieren.")
+
+
+def iter_export(
+    store,
+    fmt: str = "csv",
+    rows=None,
+    stats=None,
+    chunk_assessments: int = CHUNK_ASSESSMENTS,
+    generation=None,
+):
+    """Bytes-Chunks des Exports. `stats` (Dict) wird laufend mit Zeilen, Bytes und Dauer befüllt."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unbekanntes Format: {fmt}")
+    stats = stats if stats is not None else {}
+    stats.update(rows=0, bytes=0, seconds=0.0, rows_per_second=0.0)
+    t0 = time.perf_counter()
+
+    def account(frame_rows, payload):
+        stats["rows"] += frame_rows
+        stats["bytes"] += len(payload)
+        stats["seconds"] = time.perf_counter() - t0
+        stats["rows_per_second"] = stats["rows"] / max(stats["seconds"], 1e-9)
+        return payload
+
+    frames = iter_frames(store, rows, chunk_assessments, generation)
+    if fmt == "parquet":
+        yield from _iter_parquet(frames, account)
+        return
+
+    first = True
+    for frame in frames:
+        if fmt == "csv":
+            payload = frame.to_csv(index=False, header=first).encode("utf-8")
+        else:
+            payload = frame.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+        first = False
+        yield account(len(frame), payload)
+    if first and fmt == "csv":
+        # Leerer Export: zumindest die Kopfzeile ausgeben
+        yield account(0, ",".join(_empty_frame().columns).encode("utf-8") + b"\n")
+
+
+class _Drain:
+    """Minimaler Datei-Ersatz, der geschriebene Bytes bis zur Entnahme puffert."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _iter_parquet(frames, account):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Für Parquet-Export wird 'pyarrow' benötigt.") from exc
+
+    drain, writer = _Drain(), None
+    for frame in frames:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(drain, table.schema)
+        writer.write_table(table)  # eine Row Group je Block
+        yield account(len(frame), drain.take())
+    if writer is None:
+        writer = pq.ParquetWriter(drain, pa.Table.from_pandas(_empty_frame(), preserve_index=False).schema)
+    writer.close()
+    yield account(0, drain.take())
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "assessment_id": pd.Series(dtype=object),
+            "Assessment": pd.Series(dtype=object),
+            "Teilnehmer / Bereich": pd.Series(dtype=object),
+            "Zeithorizont": pd.Series(dtype=object),
+            "Dimension": pd.Series(dtype=object),
+            "Frage": pd.Series(dtype=object),
+            "Bewertung": pd.Series(dtype=np.uint8),
+            "Ziel (Dimension)": pd.Series(dtype=np.uint8),
+        }
+    )
+
+
+def export_to_file(store, path, fmt=None, rows=None) -> dict:
+    """Schreibt den Export blockweise in eine Datei (oder stdout bei '-') und gibt die Statistik zurück."""
+    fmt = fmt or next((f for f, (_, ext) in FORMATS.items() if str(path).endswith(ext)), "csv")
+    stats = {}
+    if str(path) == "-":
+        out = sys.stdout.buffer
+        for chunk in iter_export(store, fmt, rows, stats):
+            out.write(chunk)
+        out.flush()
+    else:
+        with open(path, "wb") as out:
+            for chunk in iter_export(store, fmt, rows, stats):
+                out.write(chunk)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportiert die Kohorte auf Fragenebene (Streaming).")
+    parser.add_argument("--store", type=Path, required=True, help="Verzeichnis des Kohortenspeichers")
+    parser.add_argument("--out", default="-", help="Zieldatei oder '-' für stdout")
+    parser.add_argument("--format", choices=list(FORMATS), help="Standard: aus der Dateiendung, sonst csv")
+    parser.add_argument(
+        "--segment",
+        type=json.loads,
+        help='Filter als JSON, Attribut -> Werte, z.B. {"goal": [...], "level": [...], "combine": "or"}',
+    )
+    args = parser.parse_args(argv)
+
+    store = CohortStore(args.store)
+    rows = None
+    if args.segment:
+        selection = dict(args.segment)
+        combine = selection.pop("combine", "and")
+        index = CohortIndex.from_store(store, compile_rules(catalog=store.catalog))
+        try:
+            rows = index.mask(facets(selection, combine), len(store))
+        except KeyError as exc:
+            parser.error(f"Unbekannter Filterwert: {exc}")
+    stats = export_to_file(store, args.out, args.format, rows)
+    print(
+        f"{stats['rows']:,} Zeilen, {stats['bytes'] / 1e6:,.1f} MB in {stats['seconds']:.1f} s "
+        f"({stats['rows_per_second']:,.0f} Zeilen/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""
+Punktwolke der Kohorte für Streu- und Dichtediagramme.
+
+Je gespeichertem Assessment werden die Dimensionswerte (Ist), die Ziele und
+der Archetyp als Spalten im Speicher gehalten. Die Punktwolke hängt als
+Listener am Kohortenspeicher und wird bei jeder Einreichung inkrementell
+fortgeschrieben; `version` zählt jede Änderung mit und dient Seiten als
+Cache-Schlüssel.
+
+Große Kohorten gehen nie als Rohpunkte an den Browser: `density` zählt die
+Punkte serverseitig in ein festes 2-D-Raster (je Archetyp), `points` liefert
+Rohpunkte nur bis `max_points`.
+
+Achsen (`axes`):
+    overall        Gesamt-Score (Ist)
+    gap            Gesamt-Gap (Ø Ziel − Ist über alle Dimensionen)
+    dim:<id>       Ist-Wert einer Dimension
+    gap:<id>       Gap einer Dimension
+"""
+import numpy as np
+
+from cohort_store import PositionListener, dimension_scores
+
+SCORE_RANGE = (1.0, 5.0)
+GAP_RANGE = (-4.0, 4.0)
+
+
+def axes(catalog) -> dict:
+    """Achsen-Schlüssel -> Beschriftung."""
+    labels = {"overall": "Gesamt-Score (Ist)", "gap": "Gesamt-Gap (Ziel − Ist)"}
+    labels.update({f"dim:{d}": f"{n} (Ist)" for d, n in zip(catalog.dim_ids, catalog.dim_names)})
+    labels.update({f"gap:{d}": f"Gap {n}" for d, n in zip(catalog.dim_ids, catalog.dim_names)})
+    return labels
+
+
+def axis_range(axis: str) -> tuple:
+    return GAP_RANGE if axis.startswith("gap") else SCORE_RANGE
+
+
+class CohortPoints(PositionListener):
+    """Spalten je Store-Position: Dimensionswerte, Ziele, Archetyp, aktiv."""
+
+    _STATE = ("dims", "targets", "archetype", "active")
+
+    def __init__(self, catalog, rules):
+        super().__init__(catalog, rules)
+        self._dim_index = {d: i for i, d in enumerate(catalog.dim_ids)}
+        self.dims = np.zeros((0, catalog.n_dimensions), dtype=np.float32)
+        self.targets = np.zeros((0, catalog.n_dimensions), dtype=np.uint8)
+        self.archetype = np.zeros(0, dtype=np.uint8)
+        self.active = np.zeros(0, dtype=bool)
+
+    # --- Aktualisieren ---------------------------------------------
+    def update(self, positions, rows, sign: int = 1):
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(positions) == 0:
+            return
+        rows = np.asarray(rows)
+        if sign > 0:
+            dims = dimension_scores(rows, self.catalog)
+            archetype = self.rules.classify(rows)["archetype"]
+        with self._lock:
+            self._reserve(int(positions.max()) + 1)
+            if sign > 0:
+                self.dims[positions] = dims
+                self.targets[positions] = rows[:, self.layout.targets]
+                self.archetype[positions] = archetype
+            self.active[positions] = sign > 0
+            self._version += 1
+
+    def _capacity(self) -> int:
+        return len(self.active)
+
+    def _grow(self, capacity: int):
+        for name in self._STATE:
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[: len(old)] = old
+            setattr(self, name, grown)
+
+    def total(self) -> int:
+        return int(self.active.sum())
+
+    # --- Abfragen --------------------------------------------------
+    def values(self, axis: str, positions) -> np.ndarray:
+        """Werte einer Achse für die angegebenen Store-Positionen."""
+        kind, _, dim = axis.partition(":")
+        if kind not in ("overall", "gap", "dim") or (dim and dim not in self._dim_index):
+            raise KeyError(axis)
+        dims = self.dims[positions]
+        if kind == "overall":
+            return dims.mean(axis=1)
+        if kind == "dim":
+            return dims[:, self._dim_index[dim]]
+        gaps = self.targets[positions].astype(np.float32) - dims
+        return gaps[:, self._dim_index[dim]] if dim else gaps.mean(axis=1)
+
+    def select(self, mask=None) -> np.ndarray:
+        """Positionen aktiver Assessments, optional eingeschränkt durch eine Bool-Maske über Store-Positionen."""
+        self._check_generation()
+        with self._lock:
+            active = self.active.copy()
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            active[len(mask):] = False
+            active[: len(mask)] &= mask[: len(active)]
+        return np.flatnonzero(active)
+
+    def density(self, x: str, y: str, bins: int = 100, mask=None) -> np.ndarray:
+        """Anzahl je Archetyp und Rasterzelle, Form (Archetypen, bins_x, bins_y)."""
+        positions = self.select(mask)
+        n_archetypes = len(self.rules.archetype_names)
+        cells = np.zeros(len(positions), dtype=np.int64)
+        for axis, values in ((x, self.values(x, positions)), (y, self.values(y, positions))):
+            low, high = axis_range(axis)
+            index = ((values - low) * (bins / (high - low))).astype(np.int64)
+            cells = cells * bins + np.clip(index, 0, bins - 1)
+        cells += self.archetype[positions].astype(np.int64) * bins * bins
+        return np.bincount(cells, minlength=n_archetypes * bins * bins).reshape(n_archetypes, bins, bins)
+
+    def points(self, x: str, y: str, mask=None, max_points: int = None):
+        """(x, y, Archetyp-Index, Position) als Arrays – oder None, wenn es mehr als `max_points` sind."""
+        positions = self.select(mask)
+        if max_points is not None and len(positions) > max_points:
+            return None
+        return self.values(x, positions), self.values(y, positions), self.archetype[positions], positions
+
+    def percentile(self, axis: str, q: float, mask=None):
+        """q-Perzentil (0–100) einer Achse in der Auswahl; None ohne Daten."""
+        values = self.values(axis, self.select(mask))
+        return float(np.percentile(values, q)) if len(values) else None
+
+    def percentile_rank(self, axis: str, score: float, mask=None):
+        """Anteil (0–100) der Auswahl mit niedrigerem Wert; Gleichstände zählen zur Hälfte (wie `BenchmarkSketches`)."""
+        values = self.values(axis, self.select(mask))
+        if len(values) == 0:
+            return None
+        # Spalten sind float32: Gleichstand mit Toleranz statt exakt
+        below = int((values < score - 1e-4).sum())
+        equal = int((np.abs(values - score) <= 1e-4).sum())
+        return 100.0 * (below + 0.5 * equal) / len(values)
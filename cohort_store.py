@@ -0,0 +1,872 @@
+"""
+Kompakter, memory-mapped Speicher für Assessment-Kohorten.
+
+Jedes Assessment ist eine Zeile fester Breite (uint8) in `responses.bin`:
+
+    [Antwort je Frage | Ziel je Dimension | Ziele-Bitmaske | Pain-Bitmaske |
+     Zeithorizont | Flags | Bereich (uint16, little endian)]
+
+Beim Standardkatalog (32 Fragen, 8 Dimensionen) sind das 46 Byte pro
+Assessment, also ca. 46 MB für eine Million Assessments. Die Zeilen werden
+bewusst nicht auf 3 Bit gepackt: uint8-Spalten lassen sich direkt als
+NumPy-View scannen, ohne vorher zu entpacken.
+
+Die Byte-Position einer Zeile ergibt sich aus `row * width`. Metadaten
+(ID, Name, Zeitpunkt) stehen als JSON-Zeilen in `meta.jsonl`; daneben liegen
+zwei Indexdateien mit je einem uint64 pro Zeile: `meta.idx` (Byte-Offset der
+aktuellen Metadaten-Zeile) und `ids.idx` (64-Bit-Hash der Assessment-ID).
+`row_of` und `meta` lesen damit gezielt einzelne Einträge, ohne alle
+Metadaten als Python-Objekte zu laden. Umbenennungen hängen eine neue
+Metadaten-Zeile an und setzen nur den Offset der Zeile um.
+
+`manifest.json` hält Zeilenanzahl, CRC32, Katalog-Version und die Namen der
+vier Dateien und wird als letztes – atomar – geschrieben; es ist der einzige
+Commit-Punkt. Alles, was hinter dem Manifest-Stand liegt (z.B. nach einem
+Absturz), wird beim Öffnen abgeschnitten. Die Prüfsumme steht je Block von
+`CRC_ROWS` Zeilen im Manifest: Änderungen und Löschungen rechnen nur ihren
+Block neu. Sie überschreiben Bytes an Ort und Stelle und stehen deshalb
+vorher im Manifest (`pending`); kommt ein Absturz dazwischen, holt das
+Öffnen sie nach. `compact` schreibt eine neue
+Generation von Dateien (`responses-<n>.bin`, …) und schaltet erst mit dem
+Manifest um; Dateien, die das Manifest nicht nennt, werden beim Öffnen
+entfernt.
+"""
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from eam_catalog import BUSINESS_GOALS, DEFAULT_CATALOG, PAIN_POINTS, TIME_HORIZONS
+
+FORMAT_VERSION = 3
+FLAG_DELETED = 0x01
+MIN_SCORE = 1
+MAX_SCORE = 5
+CHUNK_ROWS = 262_144
+# Zeilen je Prüfsummen-Block im Manifest
+CRC_ROWS = 4096
+INDEX = np.dtype("<u8")
+# Unsortierte Zeilen am Ende, ab denen der ID-Index neu sortiert wird
+ID_TAIL_ROWS = 4096
+
+
+# -------------------------------------------------------------------
+# Zeilenlayout & vektorisierte Helfer
+# -------------------------------------------------------------------
+@dataclass(frozen=True)
+class RowLayout:
+    n_questions: int
+    n_dimensions: int
+
+    @property
+    def answers(self) -> slice:
+        return slice(0, self.n_questions)
+
+    @property
+    def targets(self) -> slice:
+        return slice(self.n_questions, self.n_questions + self.n_dimensions)
+
+    @property
+    def goals(self) -> int:
+        return self.n_questions + self.n_dimensions
+
+    @property
+    def pains(self) -> int:
+        return self.goals + 1
+
+    @property
+    def horizon(self) -> int:
+        return self.goals + 2
+
+    @property
+    def flags(self) -> int:
+        return self.goals + 3
+
+    @property
+    def unit(self) -> int:
+        return self.goals + 4
+
+    @property
+    def width(self) -> int:
+        return self.unit + 2
+
+
+def layout_for(catalog) -> RowLayout:
+    return RowLayout(catalog.n_questions, catalog.n_dimensions)
+
+
+def to_mask(values, vocabulary) -> int:
+    """Auswahl (z.B. Ziele) als Bitmaske über die Reihenfolge des Vokabulars."""
+    mask = 0
+    for v in values:
+        mask |= 1 << vocabulary.index(v)
+    return mask
+
+
+def from_mask(mask: int, vocabulary) -> list:
+    return [v for i, v in enumerate(vocabulary) if mask & (1 << i)]
+
+
+def target_level(value) -> int:
+    """Ziel-Reifegrad als ganze Stufe 1–5; .5 rundet auf (nicht Banker's Rounding wie `round`)."""
+    return min(max(int(math.floor(float(value) + 0.5)), 1), 5)
+
+
+def encode_assessment(
+    catalog,
+    scores,
+    target_scores,
+    goals=(),
+    pains=(),
+    time_horizon=None,
+    unit_code=0,
+) -> np.ndarray:
+    """Baut eine Speicherzeile aus den Strukturen des Formulars (Schlüssel: Dimension-Name)."""
+    layout = layout_for(catalog)
+    row = np.zeros(layout.width, dtype=np.uint8)
+
+    answers = []
+    for name in catalog.dim_names:
+        answers.extend(scores[name])
+    if len(answers) != catalog.n_questions:
+        raise ValueError(
+            f"Erwartet {catalog.n_questions} Antworten, erhalten {len(answers)}."
+        )
+    row[layout.answers] = answers
+    row[layout.targets] = [target_level(target_scores[name]) for name in catalog.dim_names]
+    row[layout.goals] = to_mask(goals, BUSINESS_GOALS)
+    row[layout.pains] = to_mask(pains, PAIN_POINTS)
+    row[layout.horizon] = TIME_HORIZONS.index(time_horizon) if time_horizon else 0
+    row[layout.unit] = unit_code & 0xFF
+    row[layout.unit + 1] = unit_code >> 8
+    return row
+
+
+def decode_row(row, catalog) -> dict:
+    """Umkehrung von `encode_assessment` für eine einzelne Zeile."""
+    layout = layout_for(catalog)
+    answers = row[layout.answers].tolist()
+    scores = {
+        name: answers[start:start + size]
+        for name, start, size in zip(
+            catalog.dim_names, catalog.dim_starts.tolist(), catalog.dim_sizes.tolist()
+        )
+    }
+    return {
+        "scores": scores,
+        "target_scores": dict(zip(catalog.dim_names, row[layout.targets].tolist())),
+        "goals": from_mask(int(row[layout.goals]), BUSINESS_GOALS),
+        "pains": from_mask(int(row[layout.pains]), PAIN_POINTS),
+        "time_horizon": TIME_HORIZONS[int(row[layout.horizon])],
+        "unit_code": int(row[layout.unit]) | (int(row[layout.unit + 1]) << 8),
+    }
+
+
+# Kontext-Segmente in fester Reihenfolge (Bereiche sind dynamisch und kommen separat)
+SEGMENTS = (
+    [("all", "Alle")]
+    + [("goal", g) for g in BUSINESS_GOALS]
+    + [("pain", p) for p in PAIN_POINTS]
+    + [("horizon", h) for h in TIME_HORIZONS]
+)
+
+
+def segment_members(rows, layout) -> np.ndarray:
+    """Zugehörigkeit jeder Zeile zu jedem Segment aus `SEGMENTS`, Form (n, Segmente)."""
+    members = np.zeros((len(rows), len(SEGMENTS)), dtype=bool)
+    members[:, 0] = True
+    offset = 1
+    for column, vocabulary in ((layout.goals, BUSINESS_GOALS), (layout.pains, PAIN_POINTS)):
+        bits = rows[:, column, None] >> np.arange(len(vocabulary), dtype=np.uint8)
+        members[:, offset:offset + len(vocabulary)] = bits & 1
+        offset += len(vocabulary)
+    members[:, offset:] = rows[:, layout.horizon, None] == np.arange(len(TIME_HORIZONS))
+    return members
+
+
+def dimension_scores(rows, catalog) -> np.ndarray:
+    """Durchschnitt je Dimension für viele Zeilen auf einmal, Form (n, Dimensionen)."""
+    answers = np.asarray(rows[:, : catalog.n_questions], dtype=np.float32)
+    if len(answers) == 0:
+        return np.zeros((0, catalog.n_dimensions), dtype=np.float32)
+    return np.add.reduceat(answers, catalog.dim_starts, axis=1) / catalog.dim_sizes
+
+
+def overall_scores(rows, catalog) -> np.ndarray:
+    return dimension_scores(rows, catalog).mean(axis=1)
+
+
+def unit_codes(rows, layout) -> np.ndarray:
+    return rows[:, layout.unit].astype(np.uint16) | (
+        rows[:, layout.unit + 1].astype(np.uint16) << 8
+    )
+
+
+def id_hashes(assessment_ids) -> np.ndarray:
+    """64-Bit-Hash je Assessment-ID (Schlüssel des persistierten ID-Index `ids.idx`)."""
+    return np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(i.encode("utf-8"), digest_size=8).digest(), "little")
+            for i in assessment_ids
+        ),
+        dtype=INDEX,
+        count=len(assessment_ids),
+    )
+
+
+# -------------------------------------------------------------------
+# Store
+# -------------------------------------------------------------------
+class CohortStore:
+    """Append-optimierter Kohortenspeicher mit Memory-Map-Zugriff.
+
+    Listener (`subscribe`) werden nach jeder Änderung mit
+    `(positions, rows, sign)` aufgerufen: `sign=+1` für neue Zeilen,
+    `sign=-1` für entfernte. So halten Benchmarks und Aggregate ihren Stand
+    inkrementell, ohne die Kohorte erneut zu scannen.
+    """
+
+    MANIFEST = "manifest.json"
+    DATA = "responses.bin"
+    META = "meta.jsonl"
+    OFFSETS = "meta.idx"
+    IDS = "ids.idx"
+    UNITS = "units.json"
+    # Datendateien aller Generationen (inkl. halb geschriebener `.tmp`)
+    _FILES = re.compile(r"(responses|meta|ids)(-\d+)?\.(bin|jsonl|idx)(\.tmp)?")
+
+    def __init__(self, path, catalog=DEFAULT_CATALOG):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.catalog = catalog
+        self.layout = layout_for(catalog)
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._mmap = None
+        self._columns = {}
+        self._id_sorted = None
+
+        manifest_path = self.path / self.MANIFEST
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest["catalog_version"] != catalog.version:
+                raise ValueError(
+                    f"Store {self.path} wurde mit Katalog {manifest['catalog_version']} "
+                    f"angelegt, aktiv ist {catalog.version}."
+                )
+            if manifest["width"] != self.layout.width:
+                raise ValueError(f"Unerwartete Zeilenbreite in {manifest_path}.")
+            if manifest.get("format") != FORMAT_VERSION:
+                raise ValueError(f"Store {self.path} hat ein unbekanntes Format ({manifest.get('format')}).")
+            self._manifest = manifest
+        else:
+            self._manifest = {
+                "format": FORMAT_VERSION,
+                "catalog_version": catalog.version,
+                "width": self.layout.width,
+                "rows": 0,
+                "meta_bytes": 0,
+                "crc32": [],
+                "generation": 0,
+                "files": self._file_names(0),
+                "created": time.time(),
+            }
+            for name in self._manifest["files"].values():
+                (self.path / name).touch()
+            self._write_manifest()
+
+        units_path = self.path / self.UNITS
+        self._units = (
+            json.loads(units_path.read_text(encoding="utf-8")) if units_path.exists() else [""]
+        )
+        self._unit_codes = {u: i for i, u in enumerate(self._units)}
+        self._truncate_to_manifest()
+        self._apply_pending()
+        self._remove_stale_files()
+
+    # --- Zustand ---------------------------------------------------
+    def __len__(self) -> int:
+        return self._manifest["rows"]
+
+    @property
+    def generation(self) -> int:
+        """Wird bei jeder Kompaktierung erhöht (Zeilenpositionen ändern sich dann)."""
+        return self._manifest["generation"]
+
+    @property
+    def fingerprint(self) -> str:
+        """Ändert sich mit jedem Schreibvorgang auf die Zeilen; persistierte Aggregate prüfen damit ihre Aktualität."""
+        crc = zlib.crc32(np.asarray(self._manifest["crc32"], dtype="<u4").tobytes())
+        return f"{self.generation}:{len(self)}:{crc:08x}"
+
+    @property
+    def revision(self) -> str:
+        """Wie `fingerprint`, ändert sich aber auch bei Umbenennungen (Schlüssel für Caches über Metadaten)."""
+        return f"{self.fingerprint}:{self._manifest['meta_bytes']}"
+
+    @property
+    def units(self) -> list:
+        return list(self._units)
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._listeners.remove(callback)
+
+    def writes_paused(self):
+        """Sperre aller Schreibvorgänge (wiedereintrittsfähig) als Kontextmanager.
+
+        Aggregate bauen sich darin aus dem Store auf und melden sich per
+        `subscribe` an – keine Änderung fällt zwischen Aufbau und Anmeldung.
+        """
+        return self._lock
+
+    # --- Lesen -----------------------------------------------------
+    def matrix(self) -> np.ndarray:
+        """Read-only Memory-Map über alle Zeilen (inkl. gelöschter, siehe `active_mask`)."""
+        with self._lock:
+            n = len(self)
+            if n == 0:
+                return np.zeros((0, self.layout.width), dtype=np.uint8)
+            if self._mmap is None or self._mmap.shape[0] != n:
+                self._mmap = np.memmap(
+                    self._file("data"),
+                    dtype=np.uint8,
+                    mode="r",
+                    shape=(n, self.layout.width),
+                )
+            return self._mmap
+
+    def active_mask(self, rows=None) -> np.ndarray:
+        rows = self.matrix() if rows is None else rows
+        return (rows[:, self.layout.flags] & FLAG_DELETED) == 0
+
+    def meta(self, row: int) -> dict:
+        with self._lock:
+            offset, path = int(self._column("offsets")[row]), self._file("meta")
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def iter_meta(self):
+        """Metadaten in Zeilenreihenfolge; blockweise von Platte gelesen, nie alle auf einmal."""
+        for block in self._raw_meta():
+            yield from json.loads(b"[" + block.rstrip(b"\n").replace(b"\n", b",") + b"]")
+
+    def row_of(self, assessment_id: str) -> int:
+        key = id_hashes([assessment_id])[0]
+        with self._lock:
+            hashes = self._column("ids")
+            keys, rows = self._sorted_ids(hashes)
+            candidates = rows[np.searchsorted(keys, key):np.searchsorted(keys, key, side="right")].tolist()
+            candidates += (np.flatnonzero(hashes[len(keys):] == key) + len(keys)).tolist()
+            # Hash-Kollisionen (praktisch ausgeschlossen) über die Metadaten auflösen
+            for row in candidates:
+                if self.meta(row)["id"] == assessment_id:
+                    return row
+        raise KeyError(assessment_id)
+
+    def get(self, assessment_id: str) -> dict:
+        row = self.row_of(assessment_id)
+        data = decode_row(self.matrix()[row], self.catalog)
+        data["participant"] = self._units[data.pop("unit_code")]
+        data.update(self.meta(row))
+        return data
+
+    def unit_code(self, participant: str) -> int:
+        """Code eines Bereichs; unbekannte Bereiche werden ins Vokabular aufgenommen."""
+        key = (participant or "").strip()
+        with self._lock:
+            code = self._unit_codes.get(key)
+            if code is None:
+                if len(self._units) > 0xFFFF:
+                    raise ValueError("Maximale Anzahl an Bereichen erreicht.")
+                code = len(self._units)
+                self._units.append(key)
+                self._unit_codes[key] = code
+                atomic_write(
+                    self.path / self.UNITS,
+                    json.dumps(self._units, ensure_ascii=False).encode("utf-8"),
+                )
+            return code
+
+    # --- Schreiben -------------------------------------------------
+    def append(
+        self,
+        scores,
+        target_scores,
+        goals=(),
+        pains=(),
+        time_horizon=None,
+        name="",
+        participant="",
+    ) -> str:
+        row = encode_assessment(
+            self.catalog,
+            scores,
+            target_scores,
+            goals,
+            pains,
+            time_horizon,
+            unit_code=self.unit_code(participant),
+        )
+        return self.append_rows(row[None, :], [{"name": name}])[0]
+
+    def append_rows(self, rows, metas=None) -> list:
+        """Hängt viele vorkodierte Zeilen in einem Schreibvorgang an."""
+        rows = np.ascontiguousarray(rows, dtype=np.uint8)
+        if rows.ndim != 2 or rows.shape[1] != self.layout.width:
+            raise ValueError(f"Zeilen müssen die Form (n, {self.layout.width}) haben.")
+        self._validate(rows)
+        now = time.time()
+        metas = metas if metas is not None else [{} for _ in range(len(rows))]
+        if len(metas) != len(rows):
+            raise ValueError("Anzahl Metadaten passt nicht zur Anzahl Zeilen.")
+        records = [
+            {"id": m.get("id") or uuid.uuid4().hex, "name": m.get("name", ""),
+             "created": m.get("created", now)}
+            for m in metas
+        ]
+        lines = [(json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8") for r in records]
+        lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+        hashes = id_hashes([r["id"] for r in records])
+
+        with self._lock:
+            start = len(self)
+            offsets = (self._manifest["meta_bytes"] + np.cumsum(lengths) - lengths).astype(INDEX)
+            payload = rows.tobytes()
+            for kind, data in (
+                ("data", payload),
+                ("meta", b"".join(lines)),
+                ("offsets", offsets.tobytes()),
+                ("ids", hashes.tobytes()),
+            ):
+                with open(self._file(kind), "ab") as f:
+                    f.write(data)
+            self._manifest["rows"] = start + len(rows)
+            self._manifest["meta_bytes"] += int(lengths.sum())
+            extend_crcs(self._manifest["crc32"], start * self.layout.width, payload, self._crc_block_bytes)
+            self._write_manifest()
+            self._notify(np.arange(start, start + len(rows)), rows, +1)
+        return [r["id"] for r in records]
+
+    def update(
+        self,
+        assessment_id: str,
+        scores,
+        target_scores,
+        goals=(),
+        pains=(),
+        time_horizon=None,
+        name=None,
+        participant="",
+    ):
+        """Überschreibt ein gespeichertes Assessment an seiner Position (gleiche ID)."""
+        row = encode_assessment(
+            self.catalog,
+            scores,
+            target_scores,
+            goals,
+            pains,
+            time_horizon,
+            unit_code=self.unit_code(participant),
+        )
+        self._validate(row[None, :])
+        with self._lock:
+            position = self.row_of(assessment_id)
+            old = np.array(self.matrix()[position])
+            if old[self.layout.flags] & FLAG_DELETED:
+                raise KeyError(assessment_id)
+            writes = [("data", position * self.layout.width, row.tobytes())]
+            meta = self.meta(position)
+            if name is not None and name != meta["name"]:
+                # Neue Metadaten-Zeile anhängen statt `meta.jsonl` neu zu schreiben; gültig erst mit dem Manifest
+                line = (json.dumps({**meta, "name": name}, ensure_ascii=False) + "\n").encode("utf-8")
+                with open(self._file("meta"), "ab") as f:
+                    f.write(line)
+                offset = np.array([self._manifest["meta_bytes"]], dtype=INDEX).tobytes()
+                writes.append(("offsets", position * INDEX.itemsize, offset))
+                self._manifest["meta_bytes"] += len(line)
+            self._write_in_place(position, row, writes)
+            self._notify(np.array([position]), old[None, :], -1)
+            self._notify(np.array([position]), row[None, :], +1)
+
+    def delete(self, assessment_id: str) -> bool:
+        """Markiert ein Assessment als gelöscht; physisch entfernt erst `compact`."""
+        with self._lock:
+            position = self.row_of(assessment_id)
+            old = np.array(self.matrix()[position])
+            if old[self.layout.flags] & FLAG_DELETED:
+                return False
+            row = old.copy()
+            row[self.layout.flags] |= FLAG_DELETED
+            flag = position * self.layout.width + self.layout.flags
+            self._write_in_place(position, row, [("data", flag, bytes([row[self.layout.flags]]))])
+            self._notify(np.array([position]), old[None, :], -1)
+            return True
+
+    def compact(self) -> int:
+        """Schreibt Daten, Metadaten und Indizes ohne gelöschte Zeilen als neue Generation.
+
+        Umgeschaltet wird allein durch das Manifest; bricht die Kompaktierung
+        vorher ab, bleibt die alte Generation vollständig gültig. Gibt die
+        Anzahl entfernter Zeilen zurück.
+        """
+        with self._lock:
+            rows = self.matrix()
+            keep = self.active_mask(rows)
+            removed = int((~keep).sum())
+            if removed == 0:
+                return 0
+
+            generation = self.generation + 1
+            files = self._file_names(generation)
+            kept = np.flatnonzero(keep)
+            crcs, written = [], 0
+            with open(self.path / files["data"], "wb") as f:
+                for begin in range(0, len(rows), CHUNK_ROWS):
+                    chunk = rows[begin:begin + CHUNK_ROWS]
+                    payload = np.ascontiguousarray(chunk[keep[begin:begin + CHUNK_ROWS]]).tobytes()
+                    f.write(payload)
+                    extend_crcs(crcs, written, payload, self._crc_block_bytes)
+                    written += len(payload)
+                _sync(f)
+            offsets, meta_bytes = [], 0
+            with open(self.path / files["meta"], "wb") as f:
+                for block in self._raw_meta(kept):
+                    ends = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n")) + 1
+                    offsets.append(meta_bytes + np.concatenate([[0], ends[:-1]]))
+                    f.write(block)
+                    meta_bytes += len(block)
+                _sync(f)
+            offsets = np.concatenate(offsets).astype(INDEX) if offsets else np.zeros(0, dtype=INDEX)
+            hashes = np.ascontiguousarray(self._column("ids")[kept])
+            for kind, column in (("offsets", offsets), ("ids", hashes)):
+                with open(self.path / files[kind], "wb") as f:
+                    f.write(column.tobytes())
+                    _sync(f)
+
+            old_files = [self._file(kind) for kind in files]
+            self._manifest.update(
+                rows=len(kept),
+                meta_bytes=meta_bytes,
+                crc32=crcs,
+                generation=generation,
+                files=files,
+            )
+            self._write_manifest()
+            self._mmap = None
+            self._columns = {}
+            self._id_sorted = None
+            for path in old_files:
+                path.unlink()
+            return removed
+
+    # --- Integrität ------------------------------------------------
+    def verify(self) -> list:
+        """Prüft Dateigrößen, Prüfsumme, Wertebereiche, Metadaten und Indizes. Leere Liste = alles in Ordnung."""
+        problems = []
+        with self._lock:
+            n, width = len(self), self.layout.width
+            for kind, expected in (("data", n * width), ("offsets", n * INDEX.itemsize), ("ids", n * INDEX.itemsize)):
+                path = self._file(kind)
+                size = path.stat().st_size
+                if size < expected:
+                    return [f"{path.name} ist kürzer als im Manifest angegeben ({size} < {expected} Byte)."]
+
+            expected = self._manifest["crc32"]
+            actual = self._block_crcs()
+            bad = [i for i in range(max(len(expected), len(actual))) if expected[i:i + 1] != actual[i:i + 1]]
+            if bad:
+                problems.append(
+                    f"CRC32 von {self._file('data').name} stimmt in {len(bad)} Block/Blöcken "
+                    f"nicht mit dem Manifest überein (erster: Zeilen ab {bad[0] * CRC_ROWS})."
+                )
+
+            rows = self.matrix()
+            for begin in range(0, n, CHUNK_ROWS):
+                chunk = rows[begin:begin + CHUNK_ROWS]
+                values = chunk[:, : self.layout.goals]
+                bad = ((values < MIN_SCORE) | (values > MAX_SCORE)).any(axis=1)
+                if bad.any():
+                    first = begin + int(np.argmax(bad))
+                    problems.append(f"{int(bad.sum())} Zeilen mit Werten außerhalb 1–5 (erste: {first}).")
+                if (chunk[:, self.layout.horizon] >= len(TIME_HORIZONS)).any():
+                    problems.append("Ungültiger Zeithorizont-Index.")
+                if (unit_codes(chunk, self.layout) >= len(self._units)).any():
+                    problems.append("Unbekannter Bereichs-Code.")
+
+            meta_name = self._file("meta").name
+            offsets, hashes = self._column("offsets"), self._column("ids")
+            if (offsets >= self._manifest["meta_bytes"]).any():
+                problems.append(f"Offsets in {self._file('offsets').name} zeigen hinter das Ende von {meta_name}.")
+                return problems
+            try:
+                mismatched, begin = 0, 0
+                for block in self._raw_meta():
+                    ids = [m["id"] for m in json.loads(b"[" + block.rstrip(b"\n").replace(b"\n", b",") + b"]")]
+                    mismatched += int((id_hashes(ids) != hashes[begin:begin + len(ids)]).sum())
+                    begin += len(ids)
+            except ValueError:
+                problems.append(f"{meta_name} enthält ungültige Einträge.")
+                return problems
+            if begin != n:
+                problems.append(f"{meta_name} enthält {begin} statt {n} Einträge.")
+            if mismatched:
+                problems.append(f"{mismatched} Einträge in {self._file('ids').name} passen nicht zu {meta_name}.")
+            if len(np.unique(hashes)) != n:
+                problems.append("Doppelte Assessment-IDs in den Metadaten.")
+        return problems
+
+    # --- Intern ----------------------------------------------------
+    @classmethod
+    def _file_names(cls, generation: int) -> dict:
+        names = {"data": cls.DATA, "meta": cls.META, "offsets": cls.OFFSETS, "ids": cls.IDS}
+        if generation == 0:
+            return names
+        return {kind: f"{Path(name).stem}-{generation}{Path(name).suffix}" for kind, name in names.items()}
+
+    def _file(self, kind: str) -> Path:
+        return self.path / self._manifest["files"][kind]
+
+    def _column(self, kind: str) -> np.ndarray:
+        """Memory-Map über eine Indexdatei (`offsets` oder `ids`, ein uint64 je Zeile)."""
+        with self._lock:
+            n = len(self)
+            column = self._columns.get(kind)
+            if column is None or len(column) != n:
+                column = (
+                    np.memmap(self._file(kind), dtype=INDEX, mode="r", shape=(n,))
+                    if n else np.zeros(0, dtype=INDEX)
+                )
+                self._columns[kind] = column
+            return column
+
+    def _sorted_ids(self, hashes):
+        """Sortierte ID-Hashes mit Zeilen; neue Zeilen am Ende werden bis `ID_TAIL_ROWS` linear durchsucht."""
+        if self._id_sorted is None or len(hashes) - len(self._id_sorted[0]) > ID_TAIL_ROWS:
+            order = np.argsort(hashes, kind="stable")
+            self._id_sorted = (np.asarray(hashes)[order], order)
+        return self._id_sorted
+
+    def _raw_meta(self, positions=None):
+        """Rohe Metadaten-Zeilen (inkl. Umbruch) in Zeilenreihenfolge, als Blöcke zu je `CHUNK_ROWS`/4 Zeilen."""
+        with self._lock:
+            offsets = np.array(self._column("offsets"))
+            path, limit = self._file("meta"), self._manifest["meta_bytes"]
+        if positions is not None:
+            offsets = offsets[positions]
+        if len(offsets) == 0:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), limit, access=mmap.ACCESS_READ) as data:
+            for begin in range(0, len(offsets), CHUNK_ROWS // 4):
+                block = offsets[begin:begin + CHUNK_ROWS // 4]
+                first, end = int(block[0]), data.find(b"\n", int(block[-1])) + 1
+                raw = data[first:end]
+                # Üblicher Fall: die Zeilen liegen lückenlos hintereinander (keine Umbenennung dazwischen)
+                if (block[1:] > block[:-1]).all() and raw.count(b"\n") == len(block):
+                    yield raw
+                else:
+                    yield b"".join(data[o:data.find(b"\n", o) + 1] for o in block.tolist())
+
+    def _validate(self, rows):
+        values = rows[:, : self.layout.goals]
+        if ((values < MIN_SCORE) | (values > MAX_SCORE)).any():
+            raise ValueError("Antworten und Ziele müssen zwischen 1 und 5 liegen.")
+        if (rows[:, self.layout.horizon] >= len(TIME_HORIZONS)).any():
+            raise ValueError("Ungültiger Zeithorizont-Index.")
+
+    def _notify(self, positions, rows, sign):
+        for callback in list(self._listeners):
+            callback(positions, rows, sign)
+
+    @property
+    def _crc_block_bytes(self) -> int:
+        return CRC_ROWS * self.layout.width
+
+    def _block_crcs(self) -> list:
+        """CRC32 je Block, von Platte gelesen (Gegenprobe zum Manifest in `verify`)."""
+        crcs, remaining = [], len(self) * self.layout.width
+        with open(self._file("data"), "rb") as f:
+            while remaining > 0:
+                block = f.read(min(remaining, self._crc_block_bytes))
+                if not block:
+                    break
+                crcs.append(zlib.crc32(block))
+                remaining -= len(block)
+        return crcs
+
+    def _write_in_place(self, position: int, row, writes):
+        """Überschreibt Bytes bestehender Zeilen (Aufrufer hält `_lock`).
+
+        Die neue Prüfsumme des Blocks entsteht aus der Memory-Map plus der neuen
+        Zeile; `writes` (Datei, Byte-Offset, Bytes) gehen zuerst ins Manifest und
+        werden erst danach ausgeführt.
+        """
+        block = position // CRC_ROWS
+        begin = block * CRC_ROWS
+        data = np.array(self.matrix()[begin:min(begin + CRC_ROWS, len(self))])
+        data[position - begin] = row
+        self._manifest["crc32"][block] = zlib.crc32(data.tobytes())
+        self._manifest["pending"] = [[kind, offset, payload.hex()] for kind, offset, payload in writes]
+        self._write_manifest()
+        self._apply_pending()
+
+    def _apply_pending(self):
+        """Führt die im Manifest vermerkten Überschreibungen aus (idempotent, auch beim Öffnen nach einem Absturz)."""
+        for kind, offset, payload in self._manifest.pop("pending", []):
+            with open(self._file(kind), "r+b") as f:
+                f.seek(offset)
+                f.write(bytes.fromhex(payload))
+        self._mmap = None
+
+    def _truncate_to_manifest(self):
+        """Entfernt halb geschriebene Daten hinter dem letzten Manifest-Stand."""
+        n = len(self)
+        for kind, size in (
+            ("data", n * self.layout.width),
+            ("meta", self._manifest["meta_bytes"]),
+            ("offsets", n * INDEX.itemsize),
+            ("ids", n * INDEX.itemsize),
+        ):
+            path = self._file(kind)
+            if path.stat().st_size > size:
+                os.truncate(path, size)
+
+    def _remove_stale_files(self):
+        """Entfernt Dateien anderer Generationen, die das Manifest nicht (mehr) nennt."""
+        current = set(self._manifest["files"].values())
+        for path in self.path.iterdir():
+            if self._FILES.fullmatch(path.name) and path.name not in current:
+                path.unlink()
+
+    def _write_manifest(self):
+        atomic_write(
+            self.path / self.MANIFEST,
+            json.dumps(self._manifest, indent=2).encode("utf-8"),
+        )
+
+
+# -------------------------------------------------------------------
+# Strukturen je Store-Position
+# -------------------------------------------------------------------
+class PositionListener:
+    """Basis für Spalten je Store-Position (Bitmap-Index, Punktwolke), die am Store hängen.
+
+    Unterklassen implementieren `update(positions, rows, sign)` sowie
+    `_capacity()`/`_grow(capacity)` und nennen in `_STATE` die Attribute, die
+    nach einer Kompaktierung aus dem Neuaufbau übernommen werden. `update`
+    und alle Leser, die mehrere Attribute gemeinsam lesen, halten `_lock`.
+    """
+
+    _STATE = ()
+    MIN_CAPACITY = 1024
+
+    def __init__(self, catalog, rules):
+        self.catalog = catalog
+        self.rules = rules
+        self.layout = layout_for(catalog)
+        self._version = 0
+        self._lock = threading.Lock()
+        self._store = None
+        self._generation = None
+
+    @property
+    def version(self) -> int:
+        """Zählt jede Änderung; nach einer Kompaktierung des Stores wird vorher neu aufgebaut."""
+        self._check_generation()
+        return self._version
+
+    def _reserve(self, n: int):
+        """Platz für `n` Positionen (Aufrufer hält `_lock`); amortisiert wachsen, nicht je Einreichung kopieren."""
+        capacity = self._capacity()
+        if n > capacity:
+            self._grow(max(n, 2 * capacity, self.MIN_CAPACITY))
+
+    @classmethod
+    def _empty(cls, store, rules):
+        return cls(store.catalog, rules)
+
+    @classmethod
+    def from_store(cls, store, rules):
+        listener = cls._empty(store, rules)
+        listener._generation = store.generation
+        rows = store.matrix()
+        with listener._lock:
+            listener._reserve(len(rows))
+        for begin in range(0, len(rows), CHUNK_ROWS):
+            chunk = rows[begin:begin + CHUNK_ROWS]
+            active = store.active_mask(chunk)
+            listener.update(np.flatnonzero(active) + begin, chunk[active])
+        return listener
+
+    @classmethod
+    def attach(cls, store, rules):
+        """Baut die Struktur aus dem Store auf und hält sie aktuell (nicht persistiert, ~1 s je 1 Mio.).
+
+        Aufbau und Anmeldung laufen unter der Schreibsperre des Stores, damit
+        keine Einreichung dazwischen verloren geht (gilt für alle Unterklassen).
+        """
+        with store.writes_paused():
+            listener = cls.from_store(store, rules)
+            listener._store = store
+            store.subscribe(listener._on_store_change)
+        return listener
+
+    def _check_generation(self):
+        """Nach einer Kompaktierung verschieben sich die Positionen: dann einmal neu aufbauen."""
+        store = self._store
+        if store is None or store.generation == self._generation:
+            return
+        # Unter der Store-Sperre: Änderungen während des Neuaufbaus landen nicht im alten Stand
+        with store.writes_paused():
+            if store.generation == self._generation:
+                return
+            rebuilt = self.from_store(store, self.rules)
+            with self._lock:
+                for name in self._STATE + ("_generation",):
+                    setattr(self, name, getattr(rebuilt, name))
+                self._version += 1
+
+    def _on_store_change(self, positions, rows, sign):
+        self.update(positions, rows, sign)
+
+
+def extend_crcs(crcs: list, offset: int, payload: bytes, block_size: int):
+    """Schreibt Block-Prüfsummen fort, wenn `payload` ab Byte `offset` angehängt wird."""
+    view = memoryview(payload)
+    while len(view):
+        block, used = divmod(offset, block_size)
+        take = min(block_size - used, len(view))
+        if used == 0:
+            crcs.append(zlib.crc32(view[:take]))
+        else:
+            crcs[block] = zlib.crc32(view[:take], crcs[block])
+        offset += take
+        view = view[take:]
+
+
+def _sync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def atomic_write(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        _sync(f)
+    os.replace(tmp, path)
@@ -0,0 +1,76 @@
+"""
+Entwürfe für noch nicht abgeschlossene Assessments.
+
+Ein Entwurf ist der Stand aller Formular-Widgets (Schlüssel wie in der App,
+z.B. `strategy_0`, `strategy_target`, `goals`) und liegt als JSON-Datei
+`<draft_id>.json` im Entwurfsverzeichnis. Die zufällige ID ist der einzige
+Zugriffsschlüssel – Entwürfe werden bewusst nicht über ihren (frei wählbaren,
+oft gleichen) Assessment-Namen gesucht. Gespeichert wird über eine
+debounced Write-Behind-Queue; Lesezugriffe sehen noch nicht geschriebene
+Stände trotzdem sofort.
+"""
+import json
+import re
+import time
+from pathlib import Path
+
+from cohort_store import atomic_write
+from write_behind import WriteBehindQueue
+
+_DRAFT_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class DraftStore:
+    def __init__(self, path, delay: float = 1.0, max_delay: float = 5.0):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._queue = WriteBehindQueue(self._write_batch, delay, max_delay, name="draft-writer")
+
+    @staticmethod
+    def is_valid_id(draft_id) -> bool:
+        return isinstance(draft_id, str) and _DRAFT_ID.fullmatch(draft_id) is not None
+
+    def save(self, draft_id: str, values: dict, name: str = "", assessment_id=None):
+        """`assessment_id` verknüpft den Entwurf mit dem daraus gespeicherten Assessment."""
+        if not self.is_valid_id(draft_id):
+            raise ValueError(f"Ungültige Entwurfs-ID: {draft_id!r}")
+        self._queue.put(
+            draft_id,
+            {
+                "id": draft_id,
+                "name": name,
+                "updated": time.time(),
+                "values": values,
+                "assessment_id": assessment_id,
+            },
+        )
+
+    def load(self, draft_id: str):
+        """Entwurf als Dict (`id`, `name`, `updated`, `values`, `assessment_id`) oder `None`."""
+        if not self.is_valid_id(draft_id):
+            return None
+        pending = self._queue.get(draft_id)
+        if pending is not None:
+            return pending
+        path = self.path / f"{draft_id}.json"
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def stats(self) -> dict:
+        return dict(self._queue.stats)
+
+    def flush(self):
+        self._queue.flush()
+
+    def close(self):
+        self._queue.close()
+
+    def _write_batch(self, batch):
+        for draft_id, draft in batch.items():
+            atomic_write(
+                self.path / f"{draft_id}.json",
+                json.dumps(draft, ensure_ascii=False).encode("utf-8"),
+            )
@@ -0,0 +1,218 @@
+"""
+Fragenkatalog des EAM Maturity Assessments.
+
+Enthält Skalen, Kontextfelder und Dimensionen inkl. Fragen sowie eine
+kompilierte Sicht (`Catalog`), die Speicher, Benchmarks und Auswertungen
+gemeinsam nutzen.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# -------------------------------------------------------------------
+# Labels & Config
+# -------------------------------------------------------------------
+LABELS = {
+    1: "1 – Ad-hoc / Chaotisch",
+    2: "2 – Basic / Wiederholbar",
+    3: "3 – Definiert",
+    4: "4 – Gesteuert / Gemessen",
+    5: "5 – Optimiert / Wertgetrieben",
+}
+
+BUSINESS_GOALS = [
+    "Kostenreduktion / Effizienz",
+    "Resilienz & Betriebssicherheit",
+    "Time-to-Market / Veränderungsgeschwindigkeit",
+    "Regulatorik & Compliance",
+    "Data & AI Enablement",
+    "Standardisierung & Komplexitätsreduktion",
+]
+
+PAIN_POINTS = [
+    "Keine Transparenz über Applikationslandschaft",
+    "Schatten-IT & ungeplante Lösungen",
+    "Komplexe & fragile ERP-Landschaft",
+    "Fehlende Steuerbarkeit von Transformationen",
+    "Zu viele Technologien / Varianten",
+    "EAM wird als Bremse wahrgenommen",
+]
+
+TIME_HORIZONS = [
+    "0–6 Monate",
+    "6–12 Monate",
+    "12–24 Monate",
+]
+
+# -------------------------------------------------------------------
+# Dimensionen inkl. Fragen
+# -------------------------------------------------------------------
+DIMENSIONS = [
+    {
+        "id": "strategy",
+        "name": "Strategische Verankerung & Governance",
+        "description": "Wie stark ist EAM in Strategie, Entscheidungsprozessen und Governance verankert?",
+        "questions": [
+            "Es gibt ein klares, schriftlich fixiertes Mandat für EAM (z.B. vom CIO/Board).",
+            "EAM-Ziele sind explizit mit der Unternehmensstrategie verknüpft.",
+            "Architekturentscheidungen werden in festen Gremien getroffen (Architecture Board, Governance-Runden).",
+            "EAM-Prinzipien (z.B. Cloud first, Clean Core, Standardisierung) sind definiert und werden angewendet.",
+        ],
+    },
+    {
+        "id": "method",
+        "name": "Methoden, Modelle & Referenzarchitekturen",
+        "description": "Reifegrad von Vorgehensmodell, Artefakten und Standards.",
+        "questions": [
+            "Es existiert ein dokumentiertes EAM-Vorgehensmodell (z.B. Phasen, Deliverables, Rollen).",
+            "Es gibt belastbare Referenzarchitekturen (z.B. ERP Cloud RefArch, Integrationsarchitektur).",
+            "Business Capabilities, Domänenmodelle und Zielbilder werden aktiv genutzt.",
+            "EAM-Vorgaben sind in Projektstandards (Templates, Checklisten, Qualitätsschranken) verankert.",
+        ],
+    },
+    {
+        "id": "tooling",
+        "name": "Tooling & Architektur-Repository",
+        "description": "Wie gut sind Daten, Werkzeuge und Integrationen rund um EAM aufgestellt?",
+        "questions": [
+            "Es existiert ein zentrales Architektur-Repository / EA-Tool.",
+            "Architekturobjekte (Anwendungen, Schnittstellen, Capabilities, Technologien) sind weitgehend vollständig gepflegt.",
+            "Es gibt Schnittstellen zu anderen Systemen (CMDB, Projektportfolio, CI/CD, ITSM).",
+            "Architekturdaten werden regelmäßig aktualisiert (definierte Owner & Prozesse).",
+        ],
+    },
+    {
+        "id": "projects",
+        "name": "EAM in Projekten & Lösungsarchitektur",
+        "description": "Wie stark ist EAM im Projektalltag verankert?",
+        "questions": [
+            "Für Projekte gibt es verpflichtende Architektur-Checkpoints (z.B. Solution Design Review).",
+            "Solution-Architekten nutzen aktiv EAM-Artefakte (z.B. Capability Maps, Referenzarchitekturen).",
+            "Architekturvorgaben fließen in Ausschreibungen, Provider-Briefings und technische Designs ein.",
+            "Es gibt klare Kriterien, wann Projekte EAM involvieren müssen (z.B. Budget, Kritikalität, Domäne).",
+        ],
+    },
+    {
+        "id": "data_ai",
+        "name": "Datenbasis & AI-Unterstützung im EAM",
+        "description": "Wie daten- und AI-getrieben arbeitet das EAM?",
+        "questions": [
+            "Es existieren Standard-Reports/Dashboards auf Basis von Architekturdaten (Landscape, Risiken, Redundanzen).",
+            "Architekturdaten werden für Entscheidungen genutzt (z.B. für Roadmaps, Decommissioning, Cloud-Migration).",
+            "AI wird bereits getestet oder eingesetzt (z.B. automatisierte Analysen, Clustering, Impact-Analysen).",
+            "Die Datenqualität im EA-Repository ist ausreichend, um sinnvolle AI-Use-Cases zu ermöglichen.",
+        ],
+    },
+    {
+        "id": "org_skills",
+        "name": "Organisation, Rollen & Skills",
+        "description": "Struktur, Kapazität und Kompetenzen des EAM.",
+        "questions": [
+            "Rollen für EAM (Enterprise-, Domain-, Solution-Architekten) sind definiert und beschrieben.",
+            "Es existiert ein dediziertes EAM-Team mit klarer Verantwortlichkeit.",
+            "Stakeholder kennen Nutzen und Arbeitsweise des EAM (Kommunikation, Schulungen).",
+            "Es existiert ein Skill- und Entwicklungsplan für Architekt:innen (Methodik, Cloud, Security, Data, AI).",
+        ],
+    },
+    {
+        "id": "value",
+        "name": "Business Value & Steuerung",
+        "description": "Wie messbar trägt EAM zum Geschäftserfolg bei?",
+        "questions": [
+            "Es gibt Kennzahlen/OKRs für EAM (z.B. Technologiestandardisierung, Reduktion Redundanzen).",
+            "EAM wird aktiv genutzt, um Investitionen zu priorisieren (z.B. Roadmaps, Portfolioentscheidungen).",
+            "Erfolge von EAM werden sichtbar gemacht (z.B. Case Studies, Management-Reports).",
+            "Business-Vertreter sehen EAM überwiegend als Enabler, nicht als Bremse.",
+        ],
+    },
+    {
+        "id": "erp_core",
+        "name": "ERP & Core Plattformen / Resilienz",
+        "description": "Wie robust, zukunftssicher und steuerbar sind ERP- und Core-Plattform-Architekturen?",
+        "questions": [
+            "Es existiert ein klares Zielbild für ERP / Core Plattformen (z.B. ERP 2.0, Cloud-MFRD, Clean Core).",
+            "Resilienzanforderungen (z.B. Multi-Region, Failover, Kriegsfall-Tauglichkeit) sind in der Architektur umgesetzt.",
+            "Schnittstellen- und Integrationsarchitekturen (API, Event-Driven Architecture) sind definiert und dokumentiert.",
+            "Master Data Management und Datenhoheit (Data Supremacy) sind über ERP- und Kernsysteme hinweg geregelt.",
+        ],
+    },
+]
+
+CORE_DIM_IDS = ["strategy", "method", "tooling", "projects", "org_skills", "value"]
+DATA_ERP_DIM_IDS = ["data_ai", "erp_core"]
+
+
+# -------------------------------------------------------------------
+# Kompilierter Katalog
+# -------------------------------------------------------------------
+@dataclass(frozen=True)
+class Catalog:
+    """Unveränderliche, vorberechnete Sicht auf einen Fragenkatalog."""
+
+    dimensions: tuple
+    core_dim_ids: tuple
+    data_erp_dim_ids: tuple
+    version: str
+    dim_ids: tuple = field(repr=False)
+    dim_names: tuple = field(repr=False)
+    # Flache Liste (dim_id, dim_name, frage) in Katalogreihenfolge
+    questions: tuple = field(repr=False)
+    # Dimension-Index je Frage und Startspalte je Dimension (für np.add.reduceat)
+    question_dim: np.ndarray = field(repr=False, compare=False)
+    dim_starts: np.ndarray = field(repr=False, compare=False)
+    dim_sizes: np.ndarray = field(repr=False, compare=False)
+
+    @property
+    def n_questions(self) -> int:
+        return len(self.questions)
+
+    @property
+    def n_dimensions(self) -> int:
+        return len(self.dim_ids)
+
+    def dim_index(self, key: str) -> int:
+        """Index einer Dimension über ID oder Namen."""
+        if key in self.dim_ids:
+            return self.dim_ids.index(key)
+        return self.dim_names.index(key)
+
+
+def catalog_version(dimensions) -> str:
+    """Stabiler Hash über IDs und Fragen – ändert sich, sobald sich der Katalog ändert."""
+    payload = [[d["id"], list(d["questions"])] for d in dimensions]
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:12]
+
+
+def compile_catalog(dimensions, core_dim_ids=None, data_erp_dim_ids=None) -> Catalog:
+    dims = tuple(dimensions)
+    dim_ids = tuple(d["id"] for d in dims)
+    if len(set(dim_ids)) != len(dim_ids):
+        raise ValueError("Dimension-IDs im Katalog sind nicht eindeutig.")
+
+    questions = tuple(
+        (d["id"], d["name"], q) for d in dims for q in d["questions"]
+    )
+    sizes = np.array([len(d["questions"]) for d in dims], dtype=np.intp)
+    if (sizes == 0).any():
+        raise ValueError("Jede Dimension benötigt mindestens eine Frage.")
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+    question_dim = np.repeat(np.arange(len(dims)), sizes)
+
+    return Catalog(
+        dimensions=dims,
+        core_dim_ids=tuple(core_dim_ids if core_dim_ids is not None else dim_ids),
+        data_erp_dim_ids=tuple(data_erp_dim_ids or ()),
+        version=catalog_version(dims),
+        dim_ids=dim_ids,
+        dim_names=tuple(d["name"] for d in dims),
+        questions=questions,
+        question_dim=question_dim,
+        dim_starts=starts,
+        dim_sizes=sizes,
+    )
+
+
+DEFAULT_CATALOG = compile_catalog(DIMENSIONS, CORE_DIM_IDS, DATA_ERP_DIM_IDS)
@@ -0,0 +1,557 @@
+"""
+Append-only Ereignisprotokoll aller Einreichungen.
+
+Jede Einreichung (`SUBMIT`), jede spätere Änderung eines gespeicherten
+Assessments (`EDIT`) und jede Löschung (`DELETE`) wird als unveränderliches
+Ereignis protokolliert – mit Antworten, Zielen, Kontextfeldern (in der
+Zeilenkodierung des Kohortenspeichers), Assessment-Name und Katalog-Version.
+Damit lassen sich Zustand und Aggregate jederzeit aus dem Protokoll neu
+berechnen, z.B. nachdem sich Bewertungsregeln geändert haben.
+
+Ablage (Verzeichnis):
+
+    log.json                 Katalog-Version und Zeilenbreite
+    units.json               Vokabular der Bereiche (nur anhängend)
+    events-<seq>.log         Segmente aus Frames; ein Frame = ein Schreib-Batch
+    snapshot-<seq>.npz       kompaktierter Zustand bis einschließlich <seq>
+
+Ein Frame besteht aus Header (Magic, erste Sequenznummer, Anzahl, Längen,
+CRC32), den Ereignissen als Array fester Breite und den Namen als JSON-Liste.
+Ereignisse werden gesammelt und im Hintergrund geschrieben (Write-Behind);
+ein halb geschriebener Frame am Ende wird beim Öffnen abgeschnitten. Beim
+Replay liest NumPy die Frames direkt als strukturiertes Array – Millionen
+Ereignisse werden ohne Python-Schleife pro Ereignis zusammengeführt.
+
+Beispiel:
+    python event_log.py --log data/events import --store data/cohort
+    python event_log.py --log data/events replay --out /tmp/cohort-neu
+"""
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import BenchmarkSketches
+from cohort_cube import CohortCube
+from cohort_store import CHUNK_ROWS, CohortStore, atomic_write, encode_assessment, layout_for, unit_codes
+from eam_catalog import DEFAULT_CATALOG
+from write_behind import WriteBehindQueue
+
+SUBMIT = 1
+EDIT = 2
+DELETE = 3
+KINDS = {SUBMIT: "submit", EDIT: "edit", DELETE: "delete"}
+
+_MAGIC = b"EAMF"
+_HEADER = struct.Struct("<4sQIIII")  # Magic, erste Seq, Anzahl, Bytes Ereignisse, Bytes Namen, CRC32
+_SEGMENT = re.compile(r"events-(\d{12})\.log")
+_SNAPSHOT = re.compile(r"snapshot-(\d{12})\.npz")
+
+
+def event_dtype(layout) -> np.dtype:
+    return np.dtype(
+        [
+            ("seq", "<u8"),
+            ("time", "<f8"),
+            ("kind", "u1"),
+            ("catalog", "S6"),
+            ("assessment", "u1", (16,)),
+            ("row", "u1", (layout.width,)),
+        ]
+    )
+
+
+def id_bytes(assessment_id: str) -> bytes:
+    """Assessment-IDs sind UUID-Hex-Strings und werden als 16 Byte abgelegt."""
+    try:
+        raw = bytes.fromhex(assessment_id)
+    except ValueError:
+        raw = b""
+    if len(raw) != 16:
+        raise ValueError(f"Ungültige Assessment-ID: {assessment_id!r}")
+    return raw
+
+
+# -------------------------------------------------------------------
+# Zustand nach dem Replay
+# -------------------------------------------------------------------
+@dataclass
+class LogState:
+    """Aktueller Stand aller nicht gelöschten Assessments, in Reihenfolge der Ersteinreichung.
+
+    `rows` nutzt die Zeilenkodierung des Kohortenspeichers; die Bereichs-Codes
+    beziehen sich auf `units` (Vokabular des Protokolls).
+    """
+
+    ids: np.ndarray  # (n, 16) uint8
+    rows: np.ndarray
+    names: list
+    created: np.ndarray
+    updated: np.ndarray
+    seq: int
+    units: list
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def hex_ids(self) -> list:
+        text = np.ascontiguousarray(self.ids).tobytes().hex()
+        return [text[i:i + 32] for i in range(0, len(text), 32)]
+
+    def to_store(self, path, catalog=DEFAULT_CATALOG) -> CohortStore:
+        """Schreibt den Zustand in einen neuen (leeren) Kohortenspeicher."""
+        store = CohortStore(path, catalog)
+        if len(store):
+            raise ValueError(f"Store {path} ist nicht leer.")
+        layout = store.layout
+        mapping = np.array([store.unit_code(u) for u in self.units], dtype=np.uint16)
+        ids = self.hex_ids()
+        for begin in range(0, len(self), CHUNK_ROWS):
+            end = begin + CHUNK_ROWS
+            rows = self.rows[begin:end].copy()
+            unit = mapping[unit_codes(rows, layout)]
+            rows[:, layout.unit] = unit & 0xFF
+            rows[:, layout.unit + 1] = unit >> 8
+            metas = [
+                {"id": i, "name": n, "created": float(c)}
+                for i, n, c in zip(ids[begin:end], self.names[begin:end], self.created[begin:end])
+            ]
+            store.append_rows(rows, metas)
+        return store
+
+    def aggregates(self, catalog=DEFAULT_CATALOG):
+        """Benchmarks und Portfolio-Würfel direkt aus dem Zustand (ohne Store)."""
+        benchmarks, cube = BenchmarkSketches(catalog), CohortCube(catalog, self.units)
+        for begin in range(0, len(self), CHUNK_ROWS):
+            chunk = self.rows[begin:begin + CHUNK_ROWS]
+            benchmarks.update(chunk)
+            cube.update(chunk)
+        return benchmarks, cube
+
+
+# -------------------------------------------------------------------
+# Protokoll
+# -------------------------------------------------------------------
+class EventLog:
+    META = "log.json"
+    UNITS = "units.json"
+    SEGMENT_BYTES = 64 << 20
+
+    def __init__(
+        self,
+        path,
+        catalog=DEFAULT_CATALOG,
+        delay: float = 0.5,
+        max_delay: float = 2.0,
+        snapshot_every: int = 100_000,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.catalog = catalog
+        self.layout = layout_for(catalog)
+        self.dtype = event_dtype(self.layout)
+        self.snapshot_every = snapshot_every
+        self._catalog_tag = bytes.fromhex(catalog.version)
+        self._lock = threading.RLock()
+
+        meta_path = self.path / self.META
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta["catalog_version"] != catalog.version or meta["width"] != self.layout.width:
+                raise ValueError(
+                    f"Protokoll {self.path} gehört zu Katalog {meta['catalog_version']}, "
+                    f"aktiv ist {catalog.version}."
+                )
+        else:
+            atomic_write(
+                meta_path,
+                json.dumps(
+                    {"catalog_version": catalog.version, "width": self.layout.width, "created": time.time()}
+                ).encode("utf-8"),
+            )
+        units_path = self.path / self.UNITS
+        self._units = json.loads(units_path.read_text(encoding="utf-8")) if units_path.exists() else [""]
+        self._unit_codes = {u: i for i, u in enumerate(self._units)}
+
+        self._next_seq = self._recover() + 1
+        snapshots = self._snapshots()
+        self._snapshot_seq = snapshots[-1][0] if snapshots else 0
+        self._queue = WriteBehindQueue(self._write_batch, delay, max_delay, name="event-log-writer")
+
+    # --- Protokollieren --------------------------------------------
+    def record(
+        self,
+        kind: int,
+        assessment_id: str,
+        scores=None,
+        target_scores=None,
+        goals=(),
+        pains=(),
+        time_horizon=None,
+        name="",
+        participant="",
+    ) -> int:
+        """Protokolliert ein Ereignis (Felder wie `CohortStore.append`) und gibt die Sequenznummer zurück."""
+        if kind not in KINDS:
+            raise ValueError(f"Unbekannte Ereignisart: {kind}")
+        if kind == DELETE:
+            row = np.zeros(self.layout.width, dtype=np.uint8)
+        else:
+            row = encode_assessment(
+                self.catalog,
+                scores,
+                target_scores,
+                goals,
+                pains,
+                time_horizon,
+                unit_code=self._unit_code(participant),
+            )
+        return self.record_rows(kind, [assessment_id], row[None, :], [name])[0]
+
+    def record_rows(self, kind: int, assessment_ids, rows, names, times=None) -> list:
+        """Protokolliert viele vorkodierte Zeilen (Bereichs-Codes im Vokabular des Protokolls)."""
+        rows = np.asarray(rows, dtype=np.uint8)
+        events = np.zeros(len(rows), dtype=self.dtype)
+        events["time"] = time.time() if times is None else times
+        events["kind"] = kind
+        events["catalog"] = self._catalog_tag
+        events["assessment"] = np.frombuffer(
+            b"".join(id_bytes(i) for i in assessment_ids), dtype=np.uint8
+        ).reshape(-1, 16)
+        events["row"] = rows
+        with self._lock:
+            first = self._next_seq
+            self._next_seq += len(events)
+            events["seq"] = np.arange(first, self._next_seq)
+            # Ein Eintrag je Aufruf: die Queue fasst nur gleiche Schlüssel zusammen
+            self._queue.put(first, (events, list(names)))
+        return list(range(first, first + len(events)))
+
+    def import_store(self, store, chunk_rows: int = CHUNK_ROWS) -> int:
+        """Übernimmt alle aktiven Assessments eines Stores als `SUBMIT`-Ereignisse (Erstbefüllung)."""
+        mapping = np.array([self._unit_code(u) for u in store.units], dtype=np.uint16)
+        matrix, meta = store.matrix(), store.iter_meta()
+        imported = 0
+        for begin in range(0, len(matrix), chunk_rows):
+            chunk = np.array(matrix[begin:begin + chunk_rows])
+            records = [next(meta) for _ in range(len(chunk))]
+            active = store.active_mask(chunk)
+            rows = chunk[active]
+            unit = mapping[unit_codes(rows, store.layout)]
+            rows[:, self.layout.unit] = unit & 0xFF
+            rows[:, self.layout.unit + 1] = unit >> 8
+            records = [r for r, a in zip(records, active) if a]
+            self.record_rows(
+                SUBMIT,
+                [r["id"] for r in records],
+                rows,
+                [r["name"] for r in records],
+                times=[r["created"] for r in records],
+            )
+            imported += len(rows)
+            self.flush()
+        return imported
+
+    @property
+    def units(self) -> list:
+        return list(self._units)
+
+    @property
+    def stats(self) -> dict:
+        return {**self._queue.stats, "next_seq": self._next_seq, "snapshot_seq": self._snapshot_seq}
+
+    def flush(self):
+        self._queue.flush()
+
+    def close(self):
+        self._queue.close()
+
+    # --- Lesen & Replay --------------------------------------------
+    def events(self, after: int = 0):
+        """Alle geschriebenen Ereignisse mit Sequenznummer > `after` als (Array, Namen)."""
+        arrays, names = [], []
+        segments = self._segments()
+        for i, (first, path) in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1][0] <= after + 1:
+                continue  # Segment liegt vollständig vor `after`
+            for header, records, frame_names in self._iter_frames(path):
+                if header[1] + header[2] <= after + 1:
+                    continue
+                arrays.append(records)
+                names.extend(frame_names)
+        if not arrays:
+            return np.zeros(0, dtype=self.dtype), []
+        events = np.concatenate(arrays)
+        if after:
+            keep = events["seq"] > after
+            events, names = events[keep], [n for n, k in zip(names, keep) if k]
+        return events, names
+
+    def replay(self, upto=None, use_snapshot: bool = True) -> LogState:
+        """Aktueller Zustand aus letztem Snapshot plus nachfolgenden Ereignissen.
+
+        `upto` begrenzt auf Ereignisse bis zu dieser Sequenznummer (Zeitreise);
+        `use_snapshot=False` liest das vollständige Protokoll.
+        """
+        self.flush()
+        return self._replay(upto, use_snapshot)
+
+    def _replay(self, upto=None, use_snapshot: bool = True) -> LogState:
+        base = None
+        if use_snapshot:
+            usable = [s for s in self._snapshots() if upto is None or s[0] <= upto]
+            if usable:
+                base = self._load_snapshot(usable[-1][1])
+        events, names = self.events(after=base.seq if base else 0)
+        if upto is not None:
+            keep = events["seq"] <= upto
+            events, names = events[keep], [n for n, k in zip(names, keep) if k]
+        if (events["catalog"] != self._catalog_tag).any():
+            raise ValueError("Protokoll enthält Ereignisse eines anderen Katalogs.")
+
+        if base is None:
+            base = LogState(
+                ids=np.zeros((0, 16), dtype=np.uint8),
+                rows=np.zeros((0, self.layout.width), dtype=np.uint8),
+                names=[],
+                created=np.zeros(0),
+                updated=np.zeros(0),
+                seq=0,
+                units=self.units,
+            )
+        n_base = len(base)
+        ids = np.concatenate([base.ids, events["assessment"]])
+        rows = np.concatenate([base.rows, events["row"]])
+        created = np.concatenate([base.created, events["time"]])
+        updated = np.concatenate([base.updated, events["time"]])
+        kinds = np.concatenate([np.full(n_base, SUBMIT, dtype=np.uint8), events["kind"]])
+        all_names = base.names + names
+
+        # Je Assessment: erstes Auftreten (Reihenfolge, Anlagezeit) und letztes (aktueller Stand)
+        keys = np.ascontiguousarray(ids).view("<u8").reshape(-1, 2)
+        order = np.lexsort((keys[:, 1], keys[:, 0]))
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(
+            np.concatenate([[True], (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)])
+        ) if len(order) else np.zeros(0, dtype=np.int64)
+        ends = np.append(starts[1:], len(order))
+        first = order[starts]
+        last = order[ends - 1]
+        alive = kinds[last] != DELETE
+        first, last = first[alive], last[alive]
+        by_submission = np.argsort(first, kind="stable")
+        first, last = first[by_submission], last[by_submission]
+
+        return LogState(
+            ids=ids[last],
+            rows=rows[last],
+            names=[all_names[i] for i in last.tolist()],
+            created=created[first],
+            updated=updated[last],
+            seq=int(events["seq"][-1]) if len(events) else base.seq,
+            units=self.units,
+        )
+
+    # --- Kompaktierung ---------------------------------------------
+    def compact(self, prune: bool = False) -> Path:
+        """Schreibt den aktuellen Zustand als Snapshot.
+
+        Die Ereignisse bleiben als Audit-Trail erhalten; `prune=True` entfernt
+        Segmente, die vollständig im Snapshot enthalten sind.
+        """
+        self.flush()
+        return self._compact(prune)
+
+    def _compact(self, prune: bool = False) -> Path:
+        with self._lock:
+            state = self._replay()
+            path = self.path / f"snapshot-{state.seq:012d}.npz"
+            if not path.exists():
+                names = json.dumps(state.names, ensure_ascii=False).encode("utf-8")
+                tmp = path.with_suffix(".tmp.npz")
+                np.savez(
+                    tmp,
+                    ids=state.ids,
+                    rows=state.rows,
+                    created=state.created,
+                    updated=state.updated,
+                    names=np.frombuffer(names, dtype=np.uint8),
+                    seq=state.seq,
+                    catalog_version=self.catalog.version,
+                )
+                tmp.replace(path)
+            for seq, old in self._snapshots():
+                if seq < state.seq:
+                    old.unlink()
+            self._snapshot_seq = state.seq
+            if prune:
+                segments = self._segments()
+                for (_, segment), (next_first, _) in zip(segments, segments[1:]):
+                    if next_first <= state.seq + 1:
+                        segment.unlink()
+            return path
+
+    # --- Intern ----------------------------------------------------
+    def _unit_code(self, participant: str) -> int:
+        key = (participant or "").strip()
+        with self._lock:
+            code = self._unit_codes.get(key)
+            if code is None:
+                if len(self._units) > 0xFFFF:
+                    raise ValueError("Maximale Anzahl an Bereichen erreicht.")
+                code = len(self._units)
+                self._units.append(key)
+                self._unit_codes[key] = code
+                atomic_write(
+                    self.path / self.UNITS,
+                    json.dumps(self._units, ensure_ascii=False).encode("utf-8"),
+                )
+            return code
+
+    def _segments(self) -> list:
+        return sorted(
+            (int(m.group(1)), p) for p in self.path.iterdir() if (m := _SEGMENT.fullmatch(p.name))
+        )
+
+    def _snapshots(self) -> list:
+        return sorted(
+            (int(m.group(1)), p) for p in self.path.iterdir() if (m := _SNAPSHOT.fullmatch(p.name))
+        )
+
+    def _load_snapshot(self, path) -> LogState:
+        with np.load(path) as data:
+            if str(data["catalog_version"]) != self.catalog.version:
+                raise ValueError(f"{path} gehört zu einem anderen Katalog.")
+            return LogState(
+                ids=data["ids"],
+                rows=data["rows"],
+                names=json.loads(data["names"].tobytes().decode("utf-8")),
+                created=data["created"],
+                updated=data["updated"],
+                seq=int(data["seq"]),
+                units=self.units,
+            )
+
+    def _iter_frames(self, path):
+        """(Header, Ereignisse, Namen) je gültigem Frame eines Segments."""
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            header = _HEADER.unpack_from(data, offset)
+            magic, _, count, n_records, n_names, crc = header
+            body = offset + _HEADER.size
+            end = body + n_records + n_names
+            if magic != _MAGIC or end > len(data) or n_records != count * self.dtype.itemsize:
+                return
+            if zlib.crc32(data[body:end]) != crc:
+                return
+            records = np.frombuffer(data, dtype=self.dtype, count=count, offset=body)
+            names = json.loads(data[body + n_records:end].decode("utf-8"))
+            yield header, records, names
+            offset = end
+
+    def _recover(self) -> int:
+        """Schneidet unvollständige Frames am Ende ab und liefert die letzte Sequenznummer."""
+        last_seq = max((s for s, _ in self._snapshots()), default=0)
+        segments = self._segments()
+        if not segments:
+            return last_seq
+        path = segments[-1][1]
+        valid = 0
+        for header, _, _ in self._iter_frames(path):
+            valid += _HEADER.size + header[3] + header[4]
+            last_seq = max(last_seq, header[1] + header[2] - 1)
+        if path.stat().st_size > valid:
+            os.truncate(path, valid)
+        if valid == 0:
+            last_seq = max(last_seq, segments[-1][0] - 1)
+        return last_seq
+
+    def _write_batch(self, batch):
+        arrays, names = zip(*batch.values())
+        events = np.concatenate(arrays)
+        records = events.tobytes()
+        name_bytes = json.dumps([n for part in names for n in part], ensure_ascii=False).encode("utf-8")
+        frame = (
+            _HEADER.pack(
+                _MAGIC,
+                int(events["seq"][0]),
+                len(events),
+                len(records),
+                len(name_bytes),
+                zlib.crc32(records + name_bytes),
+            )
+            + records
+            + name_bytes
+        )
+        with self._lock:
+            segments = self._segments()
+            if not segments or segments[-1][1].stat().st_size + len(frame) > self.SEGMENT_BYTES:
+                path = self.path / f"events-{int(events['seq'][0]):012d}.log"
+            else:
+                path = segments[-1][1]
+            with open(path, "ab") as f:
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+            due = int(events["seq"][-1]) - self._snapshot_seq >= self.snapshot_every
+        if due:
+            self._compact()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ereignisprotokoll der Einreichungen verwalten.")
+    parser.add_argument("--log", type=Path, required=True, help="Verzeichnis des Protokolls")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imp = commands.add_parser("import", help="Bestehenden Kohortenspeicher als Ereignisse übernehmen")
+    imp.add_argument("--store", type=Path, required=True)
+    rep = commands.add_parser("replay", help="Zustand neu aufbauen und in einen neuen Store schreiben")
+    rep.add_argument("--out", type=Path, help="Ziel-Store (ohne: nur Zustand und Aggregate im Speicher)")
+    rep.add_argument("--upto", type=int, help="Nur Ereignisse bis zu dieser Sequenznummer")
+    rep.add_argument("--full", action="store_true", help="Snapshots ignorieren")
+    comp = commands.add_parser("compact", help="Snapshot schreiben")
+    comp.add_argument("--prune", action="store_true", help="Vom Snapshot abgedeckte Segmente löschen")
+    args = parser.parse_args(argv)
+
+    log = EventLog(args.log)
+    t0 = time.perf_counter()
+    if args.command == "import":
+        n = log.import_store(CohortStore(args.store))
+        print(f"{n:,} Assessments als Ereignisse übernommen ({time.perf_counter() - t0:.1f} s)", file=sys.stderr)
+    elif args.command == "replay":
+        state = log.replay(upto=args.upto, use_snapshot=not args.full)
+        print(
+            f"Replay bis Seq {state.seq:,}: {len(state):,} Assessments in {time.perf_counter() - t0:.2f} s",
+            file=sys.stderr,
+        )
+        if args.out:
+            store = state.to_store(args.out)
+            BenchmarkSketches.attach(store)
+            CohortCube.attach(store)
+            print(f"Store inkl. Aggregate geschrieben: {args.out} ({time.perf_counter() - t0:.1f} s)", file=sys.stderr)
+        else:
+            benchmarks, _ = state.aggregates(log.catalog)
+            print(
+                f"Aggregate neu berechnet: {benchmarks.count():,} Assessments "
+                f"({time.perf_counter() - t0:.2f} s)",
+                file=sys.stderr,
+            )
+    else:
+        path = log.compact(prune=args.prune)
+        print(f"Snapshot {path.name} ({time.perf_counter() - t0:.1f} s)", file=sys.stderr)
+    log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,378 @@
+"""
+Lasttest für Workshop-Szenarien: N gleichzeitige Sessions füllen das
+Assessment aus, senden es ab und lesen das Ergebnis.
+
+Der Test startet die App als echten Streamlit-Server (`streamlit run`) und
+simuliert Browser-Sessions als Headless-Clients über den WebSocket-Endpunkt
+`/_stcore/stream` – mit denselben Protobuf-Nachrichten (BackMsg/ForwardMsg)
+wie das Frontend. Alle Sessions laufen in einer asyncio-Schleife, so dass auch
+Hunderte Clients nahezu gleichzeitig absenden. CPU und Speicher werden am
+Server-Prozess gemessen (Linux, `/proc`).
+
+Beispiel:
+    python loadtest.py --sessions 200 --concurrency 200 --seed 1
+    python loadtest.py --sessions 50 --input-mode both   # Slider vs. Kompakt-Tabelle
+
+Jeder Eingabemodus bekommt einen eigenen, frisch gestarteten Server, und vor
+der Messung laufen `--warmup` Sessions, deren Zahlen verworfen werden –
+sonst zahlt der zuerst gemessene Modus Kaltstart (Imports, Caches, Store)
+allein. Benötigt die Pakete aus `requirements-dev.txt`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+APP_PATH = Path(__file__).parent / "streamlit_app.py"
+PERCENTILES = (50, 95, 99)
+PHASES = ("initial", "rerun", "submit")
+INPUT_MODES = {"slider": "", "grid": "mode=grid"}
+
+
+# -------------------------------------------------------------------
+# Server-Prozess
+# -------------------------------------------------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, env: dict) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", str(APP_PATH),
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--server.address", "127.0.0.1",
+            "--browser.gatherUsageStats", "false",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("Streamlit-Server wurde unerwartet beendet.")
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Streamlit-Server ist nicht rechtzeitig gestartet.")
+
+
+def server_env(scratch: Path, store_dir=None) -> dict:
+    """Umgebung für einen Test-Server: Lasttests sollen nie in produktive Verzeichnisse schreiben.
+
+    Entwürfe, Ereignisprotokoll und (ohne `store_dir`) der Store liegen unter
+    `scratch`, das der Aufrufer nach dem Lauf entfernt.
+    """
+    env = dict(os.environ)
+    env["EAM_STORE_DIR"] = str(store_dir or scratch / "store")
+    env["EAM_DRAFTS_DIR"] = str(scratch / "drafts")
+    env["EAM_EVENTS_DIR"] = str(scratch / "events")
+    return env
+
+
+def process_stats(pid: int) -> dict:
+    """CPU-Sekunden (user+system) und RSS eines Prozesses aus /proc."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = (int(fields[11]) + int(fields[12])) / ticks
+    with open(f"/proc/{pid}/statm") as f:
+        rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    return {"cpu_seconds": cpu, "rss_mb": rss}
+
+
+# -------------------------------------------------------------------
+# Headless-Client
+# -------------------------------------------------------------------
+class HeadlessSession:
+    """Minimaler Streamlit-Client: sendet Reruns mit Widget-States und liest die Deltas."""
+
+    def __init__(self, url: str, query_string: str = ""):
+        self.url = url
+        self.query_string = query_string
+        self.ws = None
+        self.widgets = {}
+
+    async def __aenter__(self):
+        self.ws = await websockets.connect(self.url, max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.ws.close()
+
+    async def rerun(self, states=()) -> dict:
+        """Löst einen Script-Run aus und wartet auf `script_finished`."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        for widget_id, value in states:
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            if value is True:
+                state.trigger_value = True
+            elif isinstance(value, str):
+                state.string_value = value
+            else:
+                state.double_array_value.data.append(float(value))
+        await self.ws.send(msg.SerializeToString())
+
+        result = {"bytes": 0, "elements": 0, "metrics": [], "exceptions": []}
+        while True:
+            raw = await self.ws.recv()
+            result["bytes"] += len(raw)
+            fmsg = ForwardMsg()
+            fmsg.ParseFromString(raw)
+            kind = fmsg.WhichOneof("type")
+            if kind == "delta" and fmsg.delta.WhichOneof("type") == "new_element":
+                element = fmsg.delta.new_element
+                element_type = element.WhichOneof("type")
+                result["elements"] += 1
+                if element_type in ("slider", "button"):
+                    widget = getattr(element, element_type)
+                    self.widgets[widget.id] = (element_type, widget.label)
+                elif element_type == "dataframe":
+                    frame = element.dataframe
+                    if frame.id:  # nur editierbare Tabellen (st.data_editor) haben eine Widget-ID
+                        table = pa.ipc.open_stream(frame.arrow_data.data).read_all()
+                        self.widgets[frame.id] = ("data_editor", table.num_rows)
+                elif element_type == "metric":
+                    result["metrics"].append(element.metric.body)
+                elif element_type == "exception":
+                    result["exceptions"].append(element.exception.message)
+            elif kind == "script_finished":
+                return result
+
+    def editors(self) -> dict:
+        """Widget-ID -> Zeilenanzahl aller Tabellen-Editoren."""
+        return {wid: rows for wid, (kind, rows) in self.widgets.items() if kind == "data_editor"}
+
+    def sliders(self) -> list:
+        return [wid for wid, (kind, _) in self.widgets.items() if kind == "slider"]
+
+    def button(self, label_part: str) -> str:
+        return next(
+            wid for wid, (kind, label) in self.widgets.items()
+            if kind == "button" and label_part in label
+        )
+
+
+async def run_session(url, query_string, rng, timings, finished: asyncio.Event, hold: asyncio.Event):
+    async with HeadlessSession(url, query_string) as session:
+        t0 = time.perf_counter()
+        first = await session.rerun()
+        timings["initial"] = time.perf_counter() - t0
+        timings["bytes_initial"] = first["bytes"]
+
+        t0 = time.perf_counter()
+        await session.rerun()
+        timings["rerun"] = time.perf_counter() - t0
+
+        # Alle Slider (32 Fragen + 8 Ziele) bzw. alle Tabellenzellen zufällig belegen und absenden
+        states = [(wid, int(rng.integers(1, 6))) for wid in session.sliders()]
+        for wid, n_rows in session.editors().items():
+            edits = {
+                str(row): {column: int(rng.integers(1, 6)) for column in ("Ist", "Ziel")}
+                for row in range(n_rows)
+            }
+            states.append((wid, json.dumps({"edited_rows": edits, "added_rows": [], "deleted_rows": []})))
+        states.append((session.button("Auswertung anzeigen"), True))
+        t0 = time.perf_counter()
+        result = await session.rerun(states)
+        timings["submit"] = time.perf_counter() - t0
+        timings["bytes_submit"] = result["bytes"]
+
+        if result["exceptions"]:
+            raise RuntimeError(result["exceptions"][0])
+        if not result["metrics"]:
+            raise RuntimeError("Keine Ergebnisse nach dem Absenden erhalten.")
+        timings["overall_score"] = float(result["metrics"][0])
+        finished.set()
+
+        # Verbindung offen halten, bis alle Sessions fertig sind (Speichermessung)
+        await hold.wait()
+
+
+async def run_load_test(url, sessions, concurrency, seed, server_pid=None, query_string="") -> dict:
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(sessions)]
+    semaphore = asyncio.Semaphore(concurrency)
+    hold = asyncio.Event()
+    results, errors = [], []
+    done = 0
+
+    async def worker(rng):
+        nonlocal done
+        timings, finished = {}, asyncio.Event()
+        async with semaphore:
+            task = asyncio.create_task(run_session(url, query_string, rng, timings, finished, hold))
+            waiter = asyncio.create_task(finished.wait())
+            await asyncio.wait([task, waiter], return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+        done += 1
+        if done == sessions:
+            stats["loaded"] = process_stats(server_pid) if server_pid else None
+            hold.set()
+        try:
+            await task
+        except Exception as exc:  # noqa: BLE001 – Fehler werden gezählt, nicht geworfen
+            errors.append(repr(exc))
+            return
+        results.append(timings)
+
+    stats = {"before": process_stats(server_pid) if server_pid else None}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(rng) for rng in rngs))
+    wall = time.perf_counter() - t0
+    stats["after"] = process_stats(server_pid) if server_pid else None
+
+    report = {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "completed": len(results),
+        "errors": len(errors),
+        "wall_seconds": wall,
+        "sessions_per_second": len(results) / wall if wall else 0.0,
+        "latency_ms": {},
+        "payload_kb": {},
+        "server": None,
+        "error_samples": errors[:5],
+    }
+    for phase in PHASES:
+        values = np.array([r[phase] for r in results]) * 1000
+        report["latency_ms"][phase] = _percentiles(values)
+    for phase in ("initial", "submit"):
+        values = np.array([r[f"bytes_{phase}"] for r in results]) / 1024
+        report["payload_kb"][phase] = _percentiles(values)
+
+    if server_pid:
+        n = max(len(results), 1)
+        report["server"] = {
+            "cpu_seconds_per_session": (stats["after"]["cpu_seconds"] - stats["before"]["cpu_seconds"]) / n,
+            "rss_mb_per_session": (stats["loaded"]["rss_mb"] - stats["before"]["rss_mb"]) / n,
+            "rss_mb_baseline": stats["before"]["rss_mb"],
+            "rss_mb_loaded": stats["loaded"]["rss_mb"],
+        }
+    return report
+
+
+def _percentiles(values) -> dict:
+    if not len(values):
+        return {}
+    return dict(zip((f"p{p}" for p in PERCENTILES), np.percentile(values, PERCENTILES).tolist()))
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"Sessions: {report['completed']}/{report['sessions']} "
+        f"(Parallelität {report['concurrency']}, Fehler {report['errors']})",
+        f"Laufzeit: {report['wall_seconds']:.1f} s – {report['sessions_per_second']:.1f} Sessions/s",
+    ]
+    server = report["server"]
+    if server:
+        lines += [
+            f"Server-CPU je Session: {server['cpu_seconds_per_session'] * 1000:.0f} ms",
+            f"Server-Speicher je Session: {server['rss_mb_per_session']:.2f} MB "
+            f"(RSS {server['rss_mb_baseline']:.0f} → {server['rss_mb_loaded']:.0f} MB)",
+        ]
+    header = "".join(f"{f'p{p}':>10}" for p in PERCENTILES)
+    lines += ["", f"{'Latenz [ms]':<16}{header}"]
+    for phase, values in report["latency_ms"].items():
+        lines.append(f"{phase:<16}" + "".join(f"{values.get(f'p{p}', float('nan')):>10.1f}" for p in PERCENTILES))
+    lines += ["", f"{'Payload [KB]':<16}{header}"]
+    for phase, values in report["payload_kb"].items():
+        lines.append(f"{phase:<16}" + "".join(f"{values.get(f'p{p}', float('nan')):>10.1f}" for p in PERCENTILES))
+    for err in report["error_samples"]:
+        lines.append(f"Fehler: {err}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest mit gleichzeitigen Headless-Sessions.")
+    parser.add_argument("--sessions", type=int, default=50, help="Anzahl simulierter Sessions")
+    parser.add_argument("--concurrency", type=int, default=None, help="Gleichzeitig aktive Sessions (Standard: alle)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed für die Zufallsantworten")
+    parser.add_argument("--url", help="Bestehenden Server testen, z.B. http://localhost:8501 (keine Server-Metriken)")
+    parser.add_argument(
+        "--store-dir",
+        help="Kohortenspeicher des gestarteten Servers (Standard: temporäres Verzeichnis); "
+        "bei --input-mode both je Modus ein Unterverzeichnis",
+    )
+    parser.add_argument(
+        "--input-mode",
+        choices=[*INPUT_MODES, "both"],
+        default="slider",
+        help="Eingabemodus der Sessions; 'both' testet Slider und Kompakt-Tabelle nacheinander (je eigener Server)",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=2,
+        help="Sessions vor der Messung, deren Zahlen verworfen werden (0 = Kaltstart mitmessen)",
+    )
+    parser.add_argument("--json", action="store_true", help="Bericht als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    modes = list(INPUT_MODES) if args.input_mode == "both" else [args.input_mode]
+    reports = {}
+    for mode in modes:
+        proc, scratch = None, None
+        try:
+            if args.url:
+                ws_url = args.url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+            else:
+                # Jeder Modus startet auf eigenem Store, nicht auf dem vom vorigen Modus gefüllten
+                store_dir = Path(args.store_dir) / mode if args.store_dir and len(modes) > 1 else args.store_dir
+                scratch = Path(tempfile.mkdtemp(prefix="eam-loadtest-"))
+                port = _free_port()
+                proc = start_server(port, server_env(scratch, store_dir))
+                ws_url = f"ws://127.0.0.1:{port}/_stcore/stream"
+            if args.warmup:
+                asyncio.run(run_load_test(ws_url, args.warmup, args.warmup, args.seed + 1, query_string=INPUT_MODES[mode]))
+            reports[mode] = asyncio.run(
+                run_load_test(
+                    ws_url,
+                    args.sessions,
+                    args.concurrency or args.sessions,
+                    args.seed,
+                    server_pid=proc.pid if proc else None,
+                    query_string=INPUT_MODES[mode],
+                )
+            )
+        finally:
+            if proc:
+                proc.terminate()
+                proc.wait(timeout=10)
+            if scratch:
+                shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(reports if len(modes) > 1 else reports[modes[0]], indent=2))
+    else:
+        print("\n\n".join(
+            (f"== Eingabemodus: {mode} ==\n" if len(modes) > 1 else "") + format_report(report)
+            for mode, report in reports.items()
+        ))
+    return 0 if all(r["errors"] == 0 for r in reports.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,363 @@
+"""
+Betriebsmetriken im Prometheus-Textformat.
+
+Zähler und Histogramme leben prozessweit in `REGISTRY` und werden an den
+heißen Stellen der App fortgeschrieben (ein Lock, ein Dict-Zugriff, ein
+`bisect` – wenige Mikrosekunden, daher auch im Produktivbetrieb an).
+Ausgeliefert wird nur, wenn es konfiguriert ist:
+
+    EAM_METRICS_PORT=9464        HTTP-Endpunkt http://<addr>:9464/metrics
+    EAM_METRICS_ADDR=127.0.0.1   Bind-Adresse (Standard: nur lokal)
+    EAM_METRICS_FILE=/var/lib/node_exporter/eam.prom
+                                 Datei für den Textfile-Collector, alle
+                                 EAM_METRICS_INTERVAL Sekunden (Standard 15)
+                                 atomar neu geschrieben
+"""
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(float(4**k * 1024) for k in range(3, 14))  # 64 KiB … 64 GiB
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# -------------------------------------------------------------------
+# Metrik-Typen
+# -------------------------------------------------------------------
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name}: erwartet Labels {self.labels}, erhalten {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Momentwert; mit `function` wird er erst beim Abruf ermittelt (Zahl oder None = entfällt)."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labels=(), function=None):
+        super().__init__(name, documentation, labels)
+        self.function = function
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> list:
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception:  # Metriken dürfen den Abruf nie abbrechen
+                logger.exception("Gauge %s konnte nicht ermittelt werden", self.name)
+                value = None
+            with self._lock:
+                self._values = {} if value is None else {(): value}
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=TIME_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # Je Bucket die Anzahl (nicht kumuliert), dahinter +Inf, Summe
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        counts = self._values.get(self._key(labels))
+        return sum(counts[:-1]) if counts else 0
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(counts)) for key, counts in self._values.items())
+        for key, counts in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts[:-1]):
+                cumulative += n
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.t0, **self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, cls, name, *args, **kwargs):
+        # Idempotent: Seiten-Skripte laufen bei jedem Rerun erneut
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metrik {name} ist bereits als {metric.kind} registriert.")
+            return metric
+
+    def counter(self, name, documentation, labels=()) -> Counter:
+        return self._add(Counter, name, documentation, labels)
+
+    def gauge(self, name, documentation, labels=(), function=None) -> Gauge:
+        return self._add(Gauge, name, documentation, labels, function)
+
+    def histogram(self, name, documentation, labels=(), buckets=TIME_BUCKETS) -> Histogram:
+        return self._add(Histogram, name, documentation, labels, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# -------------------------------------------------------------------
+# Metriken der App
+# -------------------------------------------------------------------
+def _active_sessions():
+    """Verbundene Streamlit-Sessions dieses Prozesses (None außerhalb eines Servers)."""
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return None
+    # Der Session-Manager ist nicht öffentlich; fehlt er, entfällt die Metrik
+    manager = getattr(Runtime.instance(), "_session_mgr", None)
+    return manager.num_active_sessions() if manager is not None else None
+
+
+ACTIVE_SESSIONS = REGISTRY.gauge("eam_active_sessions", "Verbundene Browser-Sessions", function=_active_sessions)
+SUBMISSIONS = REGISTRY.counter(
+    "eam_submissions_total", "Formular-Absendungen (submit, edit, draft)", ("tenant", "kind")
+)
+RERUN_SECONDS = REGISTRY.histogram(
+    "eam_rerun_seconds", "Dauer der Script-Runs je Seite und Abschnitt", ("page", "section")
+)
+CACHE_LOOKUPS = REGISTRY.counter("eam_cache_lookups_total", "Cache-Zugriffe je Cache", ("cache", "result"))
+STORE_SECONDS = REGISTRY.histogram(
+    "eam_store_seconds", "Latenz von Abfragen und Schreibvorgängen auf dem Kohortenspeicher", ("operation",)
+)
+EXPORT_SECONDS = REGISTRY.histogram("eam_export_seconds", "Dauer der Kohorten-Exporte", ("format",))
+EXPORT_BYTES = REGISTRY.histogram(
+    "eam_export_bytes", "Größe der Kohorten-Exporte", ("format",), buckets=SIZE_BUCKETS
+)
+EXPORT_ROWS = REGISTRY.counter("eam_export_rows_total", "Exportierte Zeilen (Fragenebene)", ("format",))
+
+
+class SectionTimer:
+    """Misst einen Script-Run abschnittsweise: `lap()` schließt den laufenden Abschnitt ab."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.t0 = self.last = time.perf_counter()
+
+    def lap(self, section: str):
+        now = time.perf_counter()
+        RERUN_SECONDS.observe(now - self.last, page=self.page, section=section)
+        self.last = now
+
+    def done(self, section: str = None):
+        """Letzter Abschnitt (optional) und Gesamtdauer als Abschnitt `total`."""
+        if section:
+            self.lap(section)
+        RERUN_SECONDS.observe(time.perf_counter() - self.t0, page=self.page, section="total")
+
+
+_cache_state = threading.local()
+
+
+def count_cache(name: str, cache):
+    """Dekorator: zählt Treffer/Fehlschläge eines Streamlit-Caches, z.B.
+
+        @count_cache("compare_search", st.cache_data(max_entries=64))
+        def find(...): ...
+
+    Ein Fehlschlag ist ein Aufruf, bei dem die Funktion tatsächlich läuft.
+    """
+
+    def decorate(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _cache_state.stack[-1] = True
+            return func(*args, **kwargs)
+
+        cached = cache(compute)
+
+        @functools.wraps(func)
+        def lookup(*args, **kwargs):
+            # Stapel statt Flag: gecachte Funktionen rufen andere gecachte Funktionen auf
+            stack = _cache_state.__dict__.setdefault("stack", [])
+            stack.append(False)
+            try:
+                result = cached(*args, **kwargs)
+            finally:
+                miss = stack.pop()
+            CACHE_LOOKUPS.inc(cache=name, result="miss" if miss else "hit")
+            return result
+
+        lookup.clear = cached.clear
+        return lookup
+
+    return decorate
+
+
+# -------------------------------------------------------------------
+# Auslieferung: HTTP-Endpunkt oder Datei
+# -------------------------------------------------------------------
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # kein Zugriffslog je Scrape
+
+
+def start_http_server(port: int, addr: str = "127.0.0.1", registry=REGISTRY) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {"registry": registry})
+    server = ThreadingHTTPServer((addr, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_file(path, registry=REGISTRY):
+    """Schreibt alle Metriken atomar (Textfile-Collector liest nie eine halbe Datei)."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(registry.render(), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class FileExporter:
+    def __init__(self, path, interval: float = 15.0, registry=REGISTRY):
+        self.path = Path(path)
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                write_file(self.path, self.registry)
+            except OSError:
+                logger.exception("Metriken konnten nicht nach %s geschrieben werden", self.path)
+            if self._stop.wait(self.interval):
+                return
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        write_file(self.path, self.registry)
+
+
+def serve_from_env(environ=os.environ) -> dict:
+    """Startet die per `EAM_METRICS_*` konfigurierten Ziele; einmal je Prozess aufrufen."""
+    exporters = {}
+    port = environ.get("EAM_METRICS_PORT")
+    if port:
+        addr = environ.get("EAM_METRICS_ADDR", "127.0.0.1")
+        try:
+            exporters["http"] = start_http_server(int(port), addr)
+        except OSError:
+            # z.B. mehrere Worker auf einem Host: die App läuft ohne Endpunkt weiter
+            logger.exception("Metrik-Endpunkt %s:%s konnte nicht geöffnet werden", addr, port)
+    path = environ.get("EAM_METRICS_FILE")
+    if path:
+        exporters["file"] = FileExporter(path, float(environ.get("EAM_METRICS_INTERVAL", 15)))
+    return exporters
+
@@ -0,0 +1,109 @@
+import plotly.express as px
+import streamlit as st
+
+import metrics
+from app_resources import get_cube, get_segment_cube, segment_filter, setup_page
+from cohort_cube import ATTRIBUTES, STATISTICS
+
+# -------------------------------------------------------------------
+# Basic Page Config
+# -------------------------------------------------------------------
+tenant = setup_page("Portfolio-Heatmap")
+timer = metrics.SectionTimer("heatmap")
+
+st.title("📊 Portfolio-Heatmap")
+st.markdown(
+    """
+Antwortverteilungen aller gespeicherten Assessments – je **Segment** (Ziele, Pain Points,
+Zeithorizont, Bereich) und **Dimension**. Über den Drill-down gelangst du von der Dimension
+zu den einzelnen Fragen.
+"""
+)
+
+cube = get_cube()
+if cube.total() == 0:
+    st.info("Es sind noch keine Assessments gespeichert.")
+    st.stop()
+
+# -------------------------------------------------------------------
+# Steuerung
+# -------------------------------------------------------------------
+col_seg, col_drill, col_stat = st.columns(3)
+
+with col_seg:
+    attribute = st.radio(
+        "Segmentierung",
+        list(ATTRIBUTES),
+        format_func=ATTRIBUTES.get,
+        horizontal=True,
+    )
+
+with col_drill:
+    drill = st.selectbox(
+        "Drill-down",
+        ["Alle Dimensionen"] + list(cube.catalog.dim_names),
+    )
+    dimension = None if drill == "Alle Dimensionen" else drill
+
+with col_stat:
+    statistic = st.radio("Kennzahl", STATISTICS, horizontal=True)
+
+segment = segment_filter("heatmap")
+if segment:
+    cube = get_segment_cube(segment)
+    if cube.total() == 0:
+        st.info("Für diesen Segment-Filter liegen keine Assessments vor.")
+        st.stop()
+
+with metrics.STORE_SECONDS.time(operation="heatmap"):
+    heat_df, sizes = cube.heatmap(attribute, dimension, statistic)
+timer.lap("aggregate")
+if heat_df.empty:
+    st.info("Für diese Segmentierung liegen noch keine Daten vor.")
+    st.stop()
+
+# -------------------------------------------------------------------
+# Heatmap
+# -------------------------------------------------------------------
+if statistic == STATISTICS[0]:
+    color_range = dict(zmin=1, zmax=5, color_continuous_scale="RdYlGn")
+    text_format = ".2f"
+elif statistic == STATISTICS[1]:
+    color_range = dict(zmin=0, zmax=100, color_continuous_scale="RdYlGn")
+    text_format = ".0f"
+else:
+    color_range = dict(color_continuous_scale="Blues")
+    text_format = "d"
+
+fig = px.imshow(
+    heat_df,
+    text_auto=text_format,
+    aspect="auto",
+    labels=dict(x="", y=ATTRIBUTES[attribute], color=statistic),
+    **color_range,
+)
+fig.update_xaxes(
+    tickvals=list(heat_df.columns),
+    ticktext=[c if len(c) <= 45 else c[:42] + "…" for c in heat_df.columns],
+)
+fig.update_layout(height=max(320, 45 * len(heat_df) + 160))
+st.plotly_chart(fig, use_container_width=True)
+
+timer.lap("chart")
+
+st.caption(f"Basis: {cube.total()} Assessments. Ein Assessment kann mehreren Zielen / Pain Points angehören.")
+
+# -------------------------------------------------------------------
+# Fallzahlen & Verteilung
+# -------------------------------------------------------------------
+col_sizes, col_dist = st.columns([1, 2])
+
+with col_sizes:
+    st.markdown("**Assessments je Segment**")
+    st.dataframe(sizes, use_container_width=True)
+
+with col_dist:
+    label = st.selectbox("Antwortverteilung für Segment", list(sizes.index))
+    st.dataframe(cube.distribution(attribute, label, dimension), use_container_width=True)
+
+timer.done()
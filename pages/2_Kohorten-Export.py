@@ -0,0 +1,128 @@
+import json
+import shlex
+
+import numpy as np
+import streamlit as st
+
+import metrics
+from app_resources import get_index, get_store, segment_filter, setup_page
+from cohort_export import FORMATS, iter_export
+
+# Streamlit hält den Download vollständig als Bytes im Speicher des Servers –
+# größere Exporte laufen über die Kommandozeile (konstanter Speicherbedarf).
+MAX_DOWNLOAD_ROWS = 500_000
+
+# -------------------------------------------------------------------
+# Basic Page Config
+# -------------------------------------------------------------------
+setup_page("Kohorten-Export")
+timer = metrics.SectionTimer("export")
+
+st.title("📥 Kohorten-Export")
+max_rows_label = f"{MAX_DOWNLOAD_ROWS:,}".replace(",", ".")
+st.markdown(
+    f"""
+Exportiert alle gespeicherten Assessments (oder eine gefilterte Teilmenge) auf **Fragenebene** –
+eine Zeile je Assessment und Frage. Der Export wird blockweise erzeugt, erst beim Klick auf
+den Download-Button. Downloads im Browser sind auf {max_rows_label} Zeilen begrenzt,
+größere Exporte laufen über die Kommandozeile.
+"""
+)
+
+store = get_store()
+index = get_index()
+if index.count(None) == 0:
+    st.info("Es sind noch keine Assessments gespeichert.")
+    st.stop()
+
+# -------------------------------------------------------------------
+# Filter & Format
+# -------------------------------------------------------------------
+segment = segment_filter("export", expanded=True)
+
+fmt = st.radio(
+    "Format",
+    list(FORMATS),
+    format_func={"csv": "CSV", "jsonl": "JSON Lines", "parquet": "Parquet"}.get,
+    horizontal=True,
+)
+
+# Anzeige aus dem Bitmap-Index – ohne Scan über die Rohdaten
+n_assessments = index.count(segment)
+n_rows = n_assessments * store.catalog.n_questions
+too_large = n_rows > MAX_DOWNLOAD_ROWS
+timer.lap("filter")
+
+col_a, col_b = st.columns(2)
+col_a.metric("Assessments", f"{n_assessments:,}".replace(",", "."))
+col_b.metric("Zeilen (Fragenebene)", f"{n_rows:,}".replace(",", "."))
+
+
+def cli_command() -> str:
+    """Entsprechender Aufruf von `cohort_export.py` für Format und Segment-Filter dieser Seite."""
+    args = ["python", "cohort_export.py", "--store", str(store.path), "--format", fmt]
+    args += ["--out", f"kohorte{FORMATS[fmt][1]}"]
+    if segment is not None:
+        combine, groups = segment
+        selection = {}
+        for _, terms in groups:
+            for attribute, value in terms:
+                selection.setdefault(attribute, []).append(value)
+        selection["combine"] = combine
+        args += ["--segment", json.dumps(selection, ensure_ascii=False)]
+    return shlex.join(args)
+
+
+# -------------------------------------------------------------------
+# Download
+# -------------------------------------------------------------------
+last_export = st.session_state.setdefault("last_export", {})
+
+
+def build_export() -> bytes:
+    """Wird erst beim Klick ausgeführt, mit der Auswahl zum dann aktuellen Store-Stand.
+
+    Streamlit übernimmt das Ergebnis ohnehin vollständig als Bytes – deshalb
+    keine temporäre Datei, sondern die Zeilenobergrenze `MAX_DOWNLOAD_ROWS`.
+    """
+    # Auswahl und Generation gemeinsam festhalten: Einreichungen seit dem Rendern zählen mit
+    with store.writes_paused():
+        positions = np.flatnonzero(index.mask(segment, len(store)))
+        generation = store.generation
+    data = b"".join(iter_export(store, fmt, positions, last_export, generation=generation))
+    metrics.EXPORT_SECONDS.observe(last_export["seconds"], format=fmt)
+    metrics.EXPORT_BYTES.observe(last_export["bytes"], format=fmt)
+    metrics.EXPORT_ROWS.inc(last_export["rows"], format=fmt)
+    return data
+
+
+mime, extension = FORMATS[fmt]
+st.download_button(
+    label="📥 Export herunterladen",
+    data=build_export,
+    file_name=f"eam_kohorte{extension}",
+    mime=mime,
+    on_click="ignore",
+    disabled=n_assessments == 0 or too_large,
+)
+if too_large:
+    st.warning(
+        f"Der Export umfasst mehr als {max_rows_label} Zeilen und ist zu groß für den Download im "
+        "Browser. Schränke den Segment-Filter ein oder exportiere über die Kommandozeile:"
+    )
+    st.code(cli_command(), language="bash")
+
+if last_export.get("rows"):
+    st.caption(
+        f"Letzter Export: {last_export['rows']:,} Zeilen, {last_export['bytes'] / 1e6:,.1f} MB "
+        f"in {last_export['seconds']:.1f} s ({last_export['rows_per_second']:,.0f} Zeilen/s)"
+    )
+
+with st.expander("Sehr große Exporte (Kommandozeile)"):
+    st.markdown(
+        "Für Exporte mit Millionen Zeilen direkt auf dem Server – konstanter Speicherbedarf, "
+        "Ausgabe in Datei oder stdout:"
+    )
+    st.code(cli_command(), language="bash")
+
+timer.done()
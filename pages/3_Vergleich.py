@@ -0,0 +1,304 @@
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import metrics
+from app_resources import get_index, get_points, get_rules, get_store, get_workspace, segment_filter, setup_page
+from cohort_store import FLAG_DELETED, decode_row, dimension_scores, unit_codes
+
+MAX_SERIES = 6
+
+# -------------------------------------------------------------------
+# Basic Page Config
+# -------------------------------------------------------------------
+tenant = setup_page("Vergleich")
+timer = metrics.SectionTimer("compare")
+
+st.title("🔀 Assessments vergleichen")
+st.markdown(
+    """
+Vergleiche bis zu sechs gespeicherte Assessments – z.B. Bereiche untereinander oder denselben
+Bereich **vor und nach** einer Transformation. Alle Abweichungen beziehen sich auf die gewählte **Basis**.
+"""
+)
+
+store = get_store()
+if len(store) == 0:
+    st.info("Es sind noch keine Assessments gespeichert.")
+    st.stop()
+
+
+# -------------------------------------------------------------------
+# Laden (gecacht je Assessment)
+# -------------------------------------------------------------------
+@metrics.count_cache("compare_search", st.cache_data(max_entries=64, show_spinner="Suche Assessments …"))
+def find_assessments(tenant_id: str, query: str, n_rows: int, revision: str, limit: int = 200) -> dict:
+    """ID -> Label der neuesten `limit` Treffer (Name, Bereich oder ID-Präfix).
+
+    `revision` (`CohortStore.revision`) macht den Cache bei jeder Einreichung,
+    Änderung, Löschung und Umbenennung ungültig.
+    """
+    with metrics.STORE_SECONDS.time(operation="search"):
+        store = get_workspace(tenant_id).store
+        matrix = store.matrix()[:n_rows]
+        active = store.active_mask(matrix)
+        units = np.asarray(store.units, dtype=object)[unit_codes(matrix, store.layout)]
+        key = query.strip().casefold()
+        if not key:
+            latest = np.flatnonzero(active)[-limit:][::-1]
+            metas = [(store.meta(p), units[p]) for p in latest.tolist()]
+            return {meta["id"]: _label(meta["name"], unit, meta["created"]) for meta, unit in metas}
+        hits = deque(maxlen=limit)
+        for row, meta in enumerate(store.iter_meta()):
+            if row >= n_rows:
+                break
+            if active[row] and (
+                key in meta["name"].casefold()
+                or key in units[row].casefold()
+                or meta["id"].startswith(key)
+            ):
+                hits.append((meta, units[row]))
+        return {meta["id"]: _label(meta["name"], unit, meta["created"]) for meta, unit in reversed(hits)}
+
+
+@metrics.count_cache("compare_result", st.cache_data(max_entries=512, show_spinner=False))
+def assessment_result(tenant_id: str, row: bytes, name: str, participant: str, created: float, rules_version: str) -> dict:
+    """Abgeleitete Ergebnisse eines Assessments; Schlüssel sind die Rohdaten, Änderungen laden neu."""
+    workspace = get_workspace(tenant_id)
+    catalog, rules = workspace.tenant.catalog, workspace.rules
+    row = np.frombuffer(row, dtype=np.uint8)[None, :]
+    decoded = decode_row(row[0], catalog)
+    classified = rules.classify(row)
+    overall = float(classified["overall"][0])
+    return {
+        "label": _label(name, participant, created),
+        "series": f"{name or 'Assessment'} ({datetime.fromtimestamp(created):%d.%m.%y})",
+        "name": name,
+        "participant": participant,
+        "created": created,
+        "overall": overall,
+        "maturity": rules.label("maturity", overall),
+        "archetype": rules.archetype_names[int(classified["archetype"][0])],
+        "dims": dict(zip(catalog.dim_names, dimension_scores(row, catalog)[0].astype(float).tolist())),
+        "targets": {name: float(v) for name, v in decoded["target_scores"].items()},
+        "answers": row[0, : catalog.n_questions].astype(int).tolist(),
+    }
+
+
+def _label(name, participant, created) -> str:
+    return f"{name or '(ohne Namen)'} · {participant or '–'} · {datetime.fromtimestamp(created):%d.%m.%Y %H:%M}"
+
+
+def load(assessment_id: str):
+    """Liest Rohzeile und Metadaten (günstig) und holt die Auswertung aus dem Cache."""
+    with metrics.STORE_SECONDS.time(operation="lookup"):
+        try:
+            position = store.row_of(assessment_id)
+        except KeyError:
+            return None
+        row = np.array(store.matrix()[position])
+        if row[store.layout.flags] & FLAG_DELETED:
+            return None
+        meta = store.meta(position)
+    participant = store.units[int(unit_codes(row[None, :], store.layout)[0])]
+    return assessment_result(
+        tenant.id, row.tobytes(), meta["name"], participant, meta["created"], get_rules().version
+    )
+
+
+# -------------------------------------------------------------------
+# Auswahl
+# -------------------------------------------------------------------
+if "compare_ids" not in st.session_state:
+    requested = [i for i in st.query_params.get("compare", "").split(",") if i]
+    if not requested and st.session_state.get("assessment_id"):
+        requested = [st.session_state.assessment_id]
+    st.session_state.compare_ids = [i for i in requested if load(i) is not None][:MAX_SERIES]
+
+query = st.text_input("Suche (Name, Bereich oder ID)", placeholder="z.B. Finance oder Workshop")
+candidates = find_assessments(tenant.id, query, len(store), store.revision)
+selected_labels = {
+    i: result["label"]
+    for i, result in ((i, load(i)) for i in st.session_state.compare_ids)
+    if result is not None
+}
+options = list(selected_labels) + [i for i in candidates if i not in selected_labels]
+
+st.multiselect(
+    f"Assessments (max. {MAX_SERIES})",
+    options,
+    format_func=lambda i: selected_labels.get(i) or candidates.get(i, i),
+    key="compare_ids",
+    max_selections=MAX_SERIES,
+)
+st.query_params["compare"] = ",".join(st.session_state.compare_ids)
+
+results = [r for r in (load(i) for i in st.session_state.compare_ids) if r is not None]
+if len(results) < 2:
+    st.info("Bitte mindestens zwei Assessments auswählen.")
+    st.stop()
+
+# Eindeutige Serien-Namen für Legenden und Spalten
+series = []
+for result in results:
+    name = result["series"]
+    while name in series:
+        name += "'"
+    series.append(name)
+
+default_base = int(np.argmin([r["created"] for r in results]))
+base_index = st.selectbox(
+    "Basis (Vorher / Referenz)",
+    range(len(results)),
+    index=default_base,
+    format_func=lambda i: series[i],
+)
+base = results[base_index]
+timer.lap("selection")
+others = [i for i in range(len(results)) if i != base_index]
+
+# -------------------------------------------------------------------
+# Übersicht & Archetypen
+# -------------------------------------------------------------------
+st.markdown("### Übersicht")
+peer_group = segment_filter("compare", label="👥 Vergleichsgruppe für Perzentile")
+peer_mask = get_index().mask(peer_group) if peer_group else None
+points = get_points()
+overview = pd.DataFrame(
+    {
+        "Assessment": series,
+        "Bereich": [r["participant"] or "–" for r in results],
+        "Datum": [datetime.fromtimestamp(r["created"]).strftime("%d.%m.%Y") for r in results],
+        "Gesamt": [r["overall"] for r in results],
+        "Δ Gesamt": [r["overall"] - base["overall"] for r in results],
+        "Perzentil": [points.percentile_rank("overall", r["overall"], peer_mask) for r in results],
+        "EA-Level": [r["maturity"] for r in results],
+        "Archetyp": [r["archetype"] for r in results],
+        "Archetyp-Wechsel": [
+            "Basis" if i == base_index
+            else "unverändert" if r["archetype"] == base["archetype"]
+            else f"{base['archetype']} → {r['archetype']}"
+            for i, r in enumerate(results)
+        ],
+    }
+)
+st.dataframe(
+    overview,
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "Gesamt": st.column_config.NumberColumn(format="%.2f"),
+        "Δ Gesamt": st.column_config.NumberColumn(format="%+.2f"),
+        "Perzentil": st.column_config.NumberColumn(format="%.0f", help="Rang des Gesamt-Scores in der Vergleichsgruppe (0–100)"),
+    },
+)
+
+# -------------------------------------------------------------------
+# Radar (überlagert)
+# -------------------------------------------------------------------
+st.markdown("### EA-Profile im Vergleich")
+dim_names = list(tenant.catalog.dim_names)
+radar_df = pd.DataFrame(
+    [
+        {"Assessment": name, "Dimension": dim, "Score": result["dims"][dim]}
+        for name, result in zip(series, results)
+        for dim in dim_names
+    ]
+)
+fig = px.line_polar(
+    radar_df,
+    r="Score",
+    theta="Dimension",
+    color="Assessment",
+    line_close=True,
+    range_r=[0, 5],
+)
+fig.update_traces(fill="toself", opacity=0.55)
+st.plotly_chart(fig, use_container_width=True)
+
+# -------------------------------------------------------------------
+# Abweichungen je Dimension & Frage
+# -------------------------------------------------------------------
+delta_format = st.column_config.NumberColumn(format="%+.2f")
+
+timer.lap("profile")
+
+st.markdown("### Abweichungen je Dimension")
+dim_df = pd.DataFrame({name: [r["dims"][d] for d in dim_names] for name, r in zip(series, results)}, index=dim_names)
+for i in others:
+    dim_df[f"Δ {series[i]}"] = dim_df[series[i]] - dim_df[series[base_index]]
+st.dataframe(
+    dim_df,
+    use_container_width=True,
+    column_config={
+        **{name: st.column_config.NumberColumn(format="%.2f") for name in series},
+        **{f"Δ {series[i]}": delta_format for i in others},
+    },
+)
+
+st.markdown("### Abweichungen je Frage")
+questions = tenant.catalog.questions
+question_df = pd.DataFrame(
+    {
+        "Dimension": [q[1] for q in questions],
+        "Frage": [q[2] for q in questions],
+        **{name: r["answers"] for name, r in zip(series, results)},
+    }
+)
+for i in others:
+    question_df[f"Δ {series[i]}"] = question_df[series[i]] - question_df[series[base_index]]
+if st.toggle("Nur veränderte Fragen", value=True):
+    changed = np.zeros(len(question_df), dtype=bool)
+    for i in others:
+        changed |= question_df[f"Δ {series[i]}"].to_numpy() != 0
+    question_df = question_df[changed]
+st.dataframe(
+    question_df,
+    hide_index=True,
+    use_container_width=True,
+    column_config={f"Δ {series[i]}": st.column_config.NumberColumn(format="%+d") for i in others},
+)
+
+# -------------------------------------------------------------------
+# Gap-Schließung gegenüber der Basis
+# -------------------------------------------------------------------
+st.markdown("### Gap-Schließung")
+st.caption(
+    "Gap = Ziel der Basis − Ist der Basis. Geschlossen = Anteil des Basis-Gaps, den das jeweilige "
+    "Assessment aufgeholt hat (Werte über 100 % übertreffen das Ziel)."
+)
+gap_rows = []
+for i in others:
+    for dim in dim_names:
+        gap = base["targets"][dim] - base["dims"][dim]
+        current = results[i]["dims"][dim]
+        gap_rows.append(
+            {
+                "Assessment": series[i],
+                "Dimension": dim,
+                "Ist (Basis)": base["dims"][dim],
+                "Ziel (Basis)": base["targets"][dim],
+                "Ist": current,
+                "Gap (Basis)": gap,
+                "Restgap": base["targets"][dim] - current,
+                "Geschlossen (%)": 100.0 * (current - base["dims"][dim]) / gap if gap > 0 else None,
+            }
+        )
+st.dataframe(
+    pd.DataFrame(gap_rows),
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "Ist (Basis)": st.column_config.NumberColumn(format="%.2f"),
+        "Ist": st.column_config.NumberColumn(format="%.2f"),
+        "Gap (Basis)": delta_format,
+        "Restgap": delta_format,
+        "Geschlossen (%)": st.column_config.ProgressColumn(format="%.0f %%", min_value=0, max_value=100),
+    },
+)
+
+timer.done()
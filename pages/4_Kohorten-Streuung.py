@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+import metrics
+from app_resources import get_index, get_points, get_rules, get_workspace, segment_filter, setup_page
+from cohort_points import axes, axis_range
+
+# Bis hierhin gehen Rohpunkte (WebGL) an den Browser, darüber nur das Dichteraster
+WEBGL_LIMIT = 20_000
+RESOLUTIONS = (25, 50, 100, 200)
+PERCENTILES = (10, 25, 50, 75, 90)
+AUTO, DENSITY = "Automatisch", "Dichteraster"
+COLOR_ARCHETYPE, COLOR_DENSITY = "Archetyp", "Anzahl"
+
+# -------------------------------------------------------------------
+# Basic Page Config
+# -------------------------------------------------------------------
+tenant = setup_page("Kohorten-Streuung")
+timer = metrics.SectionTimer("scatter")
+
+st.title("🌌 Kohorten-Streuung")
+st.markdown(
+    """
+Alle gespeicherten Assessments in einem Diagramm – z.B. **Gesamt-Score gegen Gesamt-Gap** oder
+zwei Dimensionen gegeneinander, eingefärbt nach **Archetyp** und eingeschränkt über den Segment-Filter.
+Große Kohorten werden auf dem Server zu einem Dichteraster verdichtet; bis {limit} Assessments werden
+einzelne Punkte (WebGL) gezeigt.
+""".format(limit=f"{WEBGL_LIMIT:,}".replace(",", "."))
+)
+
+points = get_points()
+if points.total() == 0:
+    st.info("Es sind noch keine Assessments gespeichert.")
+    st.stop()
+
+index = get_index()
+rules = get_rules()
+axis_labels = axes(tenant.catalog)
+archetype_names = list(rules.archetype_names)
+
+
+# -------------------------------------------------------------------
+# Serverseitige Verdichtung (gecacht je Achsen, Auflösung & Filter)
+# -------------------------------------------------------------------
+@metrics.count_cache("scatter_density", st.cache_data(max_entries=128, show_spinner="Berechne Dichteraster …"))
+def density_grid(tenant_id: str, versions: tuple, x: str, y: str, bins: int, segment) -> np.ndarray:
+    """Anzahl je Archetyp und Zelle; `versions` (Punkte, Index) macht neue Einreichungen sichtbar."""
+    workspace = get_workspace(tenant_id)
+    with metrics.STORE_SECONDS.time(operation="density"):
+        mask = workspace.index.mask(segment) if segment else None
+        return workspace.points.density(x, y, bins, mask)
+
+
+@metrics.count_cache("scatter_points", st.cache_data(max_entries=32, show_spinner="Lade Punkte …"))
+def point_frame(tenant_id: str, versions: tuple, x: str, y: str, segment) -> pd.DataFrame:
+    workspace = get_workspace(tenant_id)
+    with metrics.STORE_SECONDS.time(operation="points"):
+        mask = workspace.index.mask(segment) if segment else None
+        xs, ys, codes, _ = workspace.points.points(x, y, mask)
+    return pd.DataFrame(
+        {
+            "x": xs,
+            "y": ys,
+            "Archetyp": np.asarray(workspace.rules.archetype_names, dtype=object)[codes],
+        }
+    )
+
+
+@metrics.count_cache("scatter_percentiles", st.cache_data(max_entries=128, show_spinner=False))
+def percentile_table(tenant_id: str, versions: tuple, axis_keys: tuple, segment) -> pd.DataFrame:
+    workspace = get_workspace(tenant_id)
+    mask = workspace.index.mask(segment) if segment else None
+    labels = axes(workspace.tenant.catalog)
+    return pd.DataFrame(
+        {f"P{q}": [workspace.points.percentile(axis, q, mask) for axis in axis_keys] for q in PERCENTILES},
+        index=[labels[axis] for axis in axis_keys],
+    )
+
+
+# -------------------------------------------------------------------
+# Steuerung
+# -------------------------------------------------------------------
+axis_keys = list(axis_labels)
+col_x, col_y, col_color = st.columns(3)
+with col_x:
+    x_axis = st.selectbox("X-Achse", axis_keys, index=axis_keys.index("overall"), format_func=axis_labels.get)
+with col_y:
+    y_axis = st.selectbox("Y-Achse", axis_keys, index=axis_keys.index("gap"), format_func=axis_labels.get)
+with col_color:
+    color_by = st.radio("Färbung", [COLOR_ARCHETYPE, COLOR_DENSITY], horizontal=True)
+
+segment = segment_filter("scatter")
+
+col_mode, col_bins = st.columns(2)
+with col_mode:
+    mode = st.radio("Darstellung", [AUTO, DENSITY], horizontal=True)
+with col_bins:
+    bins = st.select_slider("Auflösung (Zellen je Achse)", RESOLUTIONS, value=100)
+
+versions = (points.version, index.version)
+grid = density_grid(tenant.id, versions, x_axis, y_axis, bins, segment)
+per_archetype = grid.sum(axis=(1, 2))
+n_selected = int(per_archetype.sum())
+timer.lap("aggregate")
+
+if n_selected == 0:
+    st.info("Für diese Auswahl liegen keine Assessments vor.")
+    st.stop()
+
+# -------------------------------------------------------------------
+# Diagramm
+# -------------------------------------------------------------------
+x_range, y_range = axis_range(x_axis), axis_range(y_axis)
+colors = px.colors.qualitative.Plotly
+color_map = {name: colors[i % len(colors)] for i, name in enumerate(archetype_names)}
+use_points = mode == AUTO and n_selected <= WEBGL_LIMIT
+
+if use_points:
+    frame = point_frame(tenant.id, versions, x_axis, y_axis, segment)
+    fig = px.scatter(
+        frame,
+        x="x",
+        y="y",
+        color="Archetyp" if color_by == COLOR_ARCHETYPE else None,
+        category_orders={"Archetyp": archetype_names},
+        color_discrete_map=color_map,
+        opacity=0.5,
+        render_mode="webgl",
+        labels={"x": axis_labels[x_axis], "y": axis_labels[y_axis]},
+    )
+    rendering = f"{n_selected:,} Punkte (WebGL)"
+else:
+    x_centers = x_range[0] + (np.arange(bins) + 0.5) * (x_range[1] - x_range[0]) / bins
+    y_centers = y_range[0] + (np.arange(bins) + 0.5) * (y_range[1] - y_range[0]) / bins
+    total = grid.sum(axis=0).T  # Heatmap erwartet (y, x)
+    empty = total == 0
+    if color_by == COLOR_ARCHETYPE:
+        # Je Zelle der häufigste Archetyp; Anzahl im Tooltip
+        dominant = grid.argmax(axis=0).T.astype(float)
+        dominant[empty] = np.nan
+        n = len(archetype_names)
+        scale = [
+            [bound, colors[i % len(colors)]]
+            for i in range(n)
+            for bound in (i / n, (i + 1) / n)
+        ]
+        heatmap = go.Heatmap(
+            z=dominant,
+            zmin=-0.5,
+            zmax=n - 0.5,
+            colorscale=scale,
+            colorbar=dict(title="Archetyp", tickvals=list(range(n)), ticktext=archetype_names),
+            customdata=np.dstack([total, np.asarray(archetype_names, dtype=object)[np.nan_to_num(dominant).astype(int)]]),
+            hovertemplate="%{x:.2f} / %{y:.2f}<br>%{customdata[0]} Assessments<br>überwiegend %{customdata[1]}<extra></extra>",
+        )
+    else:
+        # Logarithmische Farbskala: dünne Ränder bleiben neben dichten Zentren sichtbar
+        log_total = np.where(empty, np.nan, np.log10(np.maximum(total, 1)))
+        ticks = list(range(int(np.nanmax(log_total)) + 1))
+        heatmap = go.Heatmap(
+            z=log_total,
+            colorscale="Viridis",
+            colorbar=dict(title="Anzahl", tickvals=ticks, ticktext=[f"{10**t:,}".replace(",", ".") for t in ticks]),
+            customdata=total,
+            hovertemplate="%{x:.2f} / %{y:.2f}<br>%{customdata} Assessments<extra></extra>",
+        )
+    fig = go.Figure(heatmap.update(x=x_centers, y=y_centers))
+    fig.update_layout(xaxis_title=axis_labels[x_axis], yaxis_title=axis_labels[y_axis])
+    rendering = f"Dichteraster {bins} × {bins}"
+
+fig.update_xaxes(range=list(x_range))
+fig.update_yaxes(range=list(y_range))
+fig.update_layout(height=600)
+st.plotly_chart(fig, use_container_width=True)
+st.caption(f"Basis: {n_selected:,} Assessments · Darstellung: {rendering}".replace(",", "."))
+timer.lap("chart")
+
+# -------------------------------------------------------------------
+# Verteilung der Archetypen in der Auswahl
+# -------------------------------------------------------------------
+st.markdown("**Archetypen in der Auswahl**")
+shares = pd.DataFrame(
+    {
+        "Archetyp": archetype_names,
+        "Assessments": per_archetype.astype(int),
+        "Anteil (%)": 100.0 * per_archetype / n_selected,
+    }
+)
+st.dataframe(
+    shares[shares["Assessments"] > 0],
+    hide_index=True,
+    use_container_width=True,
+    column_config={"Anteil (%)": st.column_config.ProgressColumn(format="%.1f %%", min_value=0, max_value=100)},
+)
+
+st.markdown("**Perzentile der Auswahl**")
+st.dataframe(
+    percentile_table(tenant.id, versions, tuple(dict.fromkeys((x_axis, y_axis))), segment),
+    use_container_width=True,
+    column_config={f"P{q}": st.column_config.NumberColumn(format="%.2f") for q in PERCENTILES},
+)
+
+timer.done()
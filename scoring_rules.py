@@ -0,0 +1,312 @@
+"""
+Deklarative Bewertungsregeln: Reifegrad-Bänder und Archetypen.
+
+Alle Schwellen und Heuristiken der Auswertung stehen als Daten in einer
+Regeltabelle (`DEFAULT_RULES`, alternativ als JSON-Datei):
+
+    bands       Bänder als aufsteigende Breakpoints plus ein Label je Band
+                (ein Score < erster Breakpoint liegt in Band 1).
+    archetypes  geordnete Liste; der erste Archetyp, dessen Bedingungen
+                zutreffen, gewinnt. Bedingungen verknüpfen Scores
+                (`overall` oder Dimension-ID), Ziele und Pain Points über
+                `all` (UND) bzw. `any` (ODER).
+
+`compile_rules` übersetzt die Tabelle einmal in vektorisierte Auswerter
+(`np.digitize` für Bänder, Bool-Masken für Archetypen). Einzelne Assessments
+und ganze Kohorten laufen über denselben Pfad.
+
+Beispiel:
+    python scoring_rules.py --store data/cohort [--rules eigene_regeln.json]
+"""
+import argparse
+import hashlib
+import json
+import operator
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cohort_store import CHUNK_ROWS, CohortStore, dimension_scores, layout_for
+from eam_catalog import BUSINESS_GOALS, DEFAULT_CATALOG, PAIN_POINTS
+
+OVERALL = "overall"
+LEVEL_BREAKPOINTS = [1.5, 2.5, 3.5, 4.5]
+
+DEFAULT_RULES = {
+    "bands": {
+        "maturity": {
+            "breakpoints": LEVEL_BREAKPOINTS,
+            "labels": [
+                "EA Level 1 – Ad-hoc / Chaotisch",
+                "EA Level 2 – Wiederholbar (Basic Setup)",
+                "EA Level 3 – Definiert (Strukturiert etabliert)",
+                "EA Level 4 – Gesteuert & Gemessen",
+                "EA Level 5 – Optimiert & Wertgetrieben",
+            ],
+        },
+        "cmmi": {
+            "breakpoints": LEVEL_BREAKPOINTS,
+            "labels": [
+                "CMMI Level 1 – Initial (unstrukturiert, stark personenabhängig)",
+                "CMMI Level 2 – Managed (grundlegende Planung und Wiederholbarkeit)",
+                "CMMI Level 3 – Defined (standardisierte und dokumentierte Prozesse)",
+                "CMMI Level 4 – Quantitatively Managed (kennzahlenbasiert gesteuert)",
+                "CMMI Level 5 – Optimizing (kontinuierliche Verbesserung, Innovation)",
+            ],
+        },
+        "traffic_light": {
+            "breakpoints": [2.5, 3.5],
+            "labels": ["🔴", "🟡", "🟢"],
+        },
+    },
+    "archetypes": [
+        {
+            "name": "Architecture Firefighters",
+            "description": (
+                "Euer EAM agiert aktuell stark reaktiv: Es müssen laufend Brände gelöscht werden "
+                "(Störungen, ungeplante Projekte, fragile ERP-Landschaft). Fokus: Transparenz schaffen, "
+                "kritische Systeme absichern und ein minimales Governance-Framework etablieren."
+            ),
+            "any": [
+                {"score": OVERALL, "op": "<", "value": 2.3},
+                {"pain": "Komplexe & fragile ERP-Landschaft"},
+            ],
+        },
+        {
+            "name": "Methoden-stark, aber nicht gelebt",
+            "description": (
+                "Auf der methodischen Ebene seid ihr bereits gut aufgestellt (Modelle, Referenzarchitekturen, "
+                "Vorgehen). Die Schwäche liegt in der Umsetzung: In Projekten und im Alltag werden diese "
+                "Standards noch nicht konsequent genutzt. Fokus: Projektintegration, Kommunikation, Nutzenstory."
+            ),
+            "all": [
+                {"score": "method", "op": ">=", "value": 3.2},
+                {"score": "projects", "op": "<", "value": 3},
+            ],
+        },
+        {
+            "name": "Data-rich, low mandate",
+            "description": (
+                "Ihr verfügt bereits über gute Daten, Tools und teilweise auch Dashboards. "
+                "Was fehlt, ist ein starkes Mandat und strategische Verankerung, damit diese Informationen "
+                "auch wirksam in Entscheidungen einfließen."
+            ),
+            "all": [
+                {"score": "tooling", "op": ">=", "value": 3.2},
+                {"score": "strategy", "op": "<", "value": 3},
+            ],
+        },
+        {
+            "name": "Value-driven Transformer",
+            "description": (
+                "Euer EAM ist stark auf Business Value ausgerichtet und gut an Transformationsthemen angebunden. "
+                "Der Fokus liegt jetzt auf Skalierung – insbesondere über daten- und AI-getriebene Steuerung "
+                "und stärkere Einbindung der Fachbereiche."
+            ),
+            "all": [
+                {"score": "value", "op": ">=", "value": 3.5},
+                {"goal": "Time-to-Market / Veränderungsgeschwindigkeit"},
+            ],
+        },
+        {
+            "name": "Data & AI Ready, aber unterspannt",
+            "description": (
+                "Ihr habt bereits eine gute Datenbasis und erste Erfahrungen im Bereich Analytics/AI. "
+                "Der nächste Schritt ist, diese Fähigkeiten stärker mit strategischer Steuerung und Governance "
+                "zu verknüpfen, um Entscheidungen systematisch zu verbessern."
+            ),
+            "all": [
+                {"score": "data_ai", "minus": OVERALL, "op": ">=", "value": 0.5},
+            ],
+        },
+    ],
+    "default_archetype": {
+        "name": "Emerging EA Engine",
+        "description": (
+            "Ihr EAM befindet sich in einem wachstumsfähigen Zustand mit soliden Grundlagen. "
+            "Die nächsten Schritte liegen in Standardisierung, besserer Projektintegration und klarer "
+            "Wertkommunikation."
+        ),
+    },
+}
+
+_OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+class RuleSet:
+    """Kompilierte Regeltabelle; Auswertung immer über Arrays (n Assessments)."""
+
+    def __init__(self, rules: dict, catalog=DEFAULT_CATALOG):
+        self.rules = rules
+        self.catalog = catalog
+        self.layout = layout_for(catalog)
+        self.version = hashlib.sha1(
+            json.dumps(rules, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:12]
+        self._columns = {OVERALL: 0, **{d: i + 1 for i, d in enumerate(catalog.dim_ids)}}
+
+        self.bands = {}
+        for name, band in rules["bands"].items():
+            breakpoints = np.asarray(band["breakpoints"], dtype=np.float64)
+            if (np.diff(breakpoints) <= 0).any():
+                raise ValueError(f"Breakpoints von Band '{name}' müssen aufsteigend sein.")
+            if len(band["labels"]) != len(breakpoints) + 1:
+                raise ValueError(f"Band '{name}' braucht {len(breakpoints) + 1} Labels.")
+            self.bands[name] = (breakpoints, np.asarray(band["labels"], dtype=object))
+
+        archetypes = list(rules["archetypes"]) + [rules["default_archetype"]]
+        self.archetype_names = [a["name"] for a in archetypes]
+        self.archetype_descriptions = [a["description"] for a in archetypes]
+        self._predicates = [self._compile_archetype(a) for a in rules["archetypes"]]
+
+    # --- Bänder ----------------------------------------------------
+    def band(self, name: str, scores) -> np.ndarray:
+        """Band-Index (0-basiert) je Score."""
+        breakpoints, _ = self.bands[name]
+        return np.digitize(np.asarray(scores, dtype=np.float64), breakpoints)
+
+    def labels(self, name: str, scores) -> np.ndarray:
+        return self.bands[name][1][self.band(name, scores)]
+
+    def label(self, name: str, score: float) -> str:
+        return self.labels(name, [score])[0]
+
+    def level(self, name: str, score: float) -> int:
+        """Band als Stufe 1..n (z.B. CMMI-Level)."""
+        return int(self.band(name, [score])[0]) + 1
+
+    # --- Archetypen ------------------------------------------------
+    def archetype_indices(self, scores, goals, pains) -> np.ndarray:
+        """Index des ersten zutreffenden Archetyps.
+
+        `scores`: (n, 1 + Dimensionen) mit Gesamtscore in Spalte 0,
+        `goals`/`pains`: Bitmasken wie im Kohortenspeicher.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        goals, pains = np.asarray(goals, dtype=np.uint8), np.asarray(pains, dtype=np.uint8)
+        hits = np.ones((len(scores), len(self.archetype_names)), dtype=bool)
+        for i, predicate in enumerate(self._predicates):
+            hits[:, i] = predicate(scores, goals, pains)
+        return hits.argmax(axis=1)
+
+    def archetype(self, overall_score, dim_results, goals=(), pains=()):
+        """(Name, Beschreibung) für ein einzelnes Assessment; `dim_results` nach Dimension-Name."""
+        scores = [[overall_score] + [dim_results[name] for name in self.catalog.dim_names]]
+        goal_mask = sum(1 << BUSINESS_GOALS.index(g) for g in goals)
+        pain_mask = sum(1 << PAIN_POINTS.index(p) for p in pains)
+        index = int(self.archetype_indices(scores, [goal_mask], [pain_mask])[0])
+        return self.archetype_names[index], self.archetype_descriptions[index]
+
+    # --- Kohorten --------------------------------------------------
+    def classify(self, rows) -> dict:
+        """Gesamtscore, Band-Indizes und Archetyp-Index für Zeilen im Store-Format."""
+        rows = np.asarray(rows)
+        dims = dimension_scores(rows, self.catalog).astype(np.float64)
+        overall = dims.mean(axis=1) if len(rows) else np.zeros(0)
+        result = {OVERALL: overall}
+        for name in self.bands:
+            result[name] = self.band(name, overall)
+        result["archetype"] = self.archetype_indices(
+            np.column_stack([overall, dims]), rows[:, self.layout.goals], rows[:, self.layout.pains]
+        )
+        return result
+
+    def classify_store(self, store) -> dict:
+        """Klassifiziert alle aktiven Assessments eines Stores (blockweise über die Memory-Map)."""
+        parts = []
+        matrix = store.matrix()
+        for begin in range(0, len(matrix), CHUNK_ROWS):
+            chunk = matrix[begin:begin + CHUNK_ROWS]
+            parts.append(self.classify(chunk[store.active_mask(chunk)]))
+        if not parts:
+            return self.classify(np.zeros((0, self.layout.width), dtype=np.uint8))
+        return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+    # --- Intern ----------------------------------------------------
+    def _compile_archetype(self, archetype):
+        conditions = [self._compile_condition(c) for c in archetype.get("all", [])]
+        alternatives = [self._compile_condition(c) for c in archetype.get("any", [])]
+        if not conditions and not alternatives:
+            raise ValueError(f"Archetyp '{archetype['name']}' hat keine Bedingungen.")
+
+        def predicate(scores, goals, pains):
+            mask = np.ones(len(scores), dtype=bool)
+            for condition in conditions:
+                mask &= condition(scores, goals, pains)
+            if alternatives:
+                any_mask = np.zeros(len(scores), dtype=bool)
+                for condition in alternatives:
+                    any_mask |= condition(scores, goals, pains)
+                mask &= any_mask
+            return mask
+
+        return predicate
+
+    def _compile_condition(self, condition):
+        if "goal" in condition:
+            bit = np.uint8(1 << _index(BUSINESS_GOALS, condition["goal"], "Ziel"))
+            return lambda scores, goals, pains: (goals & bit) != 0
+        if "pain" in condition:
+            bit = np.uint8(1 << _index(PAIN_POINTS, condition["pain"], "Pain Point"))
+            return lambda scores, goals, pains: (pains & bit) != 0
+
+        column = self._column(condition["score"])
+        minus = self._column(condition["minus"]) if "minus" in condition else None
+        compare = _OPERATORS.get(condition.get("op"))
+        if compare is None:
+            raise ValueError(f"Unbekannter Operator: {condition.get('op')!r}")
+        value = float(condition["value"])
+
+        def evaluate(scores, goals, pains):
+            left = scores[:, column] if minus is None else scores[:, column] - scores[:, minus]
+            return compare(left, value)
+
+        return evaluate
+
+    def _column(self, key) -> int:
+        if key not in self._columns:
+            raise ValueError(f"Unbekannter Score: {key!r} (erlaubt: {', '.join(self._columns)})")
+        return self._columns[key]
+
+
+def _index(vocabulary, value, kind) -> int:
+    if value not in vocabulary:
+        raise ValueError(f"Unbekannter {kind}: {value!r}")
+    return vocabulary.index(value)
+
+
+def load_rules(path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compile_rules(rules=None, catalog=DEFAULT_CATALOG) -> RuleSet:
+    return RuleSet(DEFAULT_RULES if rules is None else rules, catalog)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klassifiziert alle Assessments eines Stores neu.")
+    parser.add_argument("--store", type=Path, required=True, help="Verzeichnis des Kohortenspeichers")
+    parser.add_argument("--rules", type=Path, help="Regeltabelle als JSON (Standard: eingebaute Regeln)")
+    parser.add_argument("--dump", action="store_true", help="Eingebaute Regeltabelle als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        print(json.dumps(DEFAULT_RULES, indent=2, ensure_ascii=False))
+        return 0
+    rules = compile_rules(load_rules(args.rules) if args.rules else None)
+    store = CohortStore(args.store)
+    t0 = time.perf_counter()
+    result = rules.classify_store(store)
+    seconds = time.perf_counter() - t0
+    n = len(result[OVERALL])
+    print(f"{n:,} Assessments in {seconds:.2f} s klassifiziert (Regeln {rules.version})\n")
+    for key, names in (("archetype", rules.archetype_names), ("maturity", rules.bands["maturity"][1])):
+        counts = pd.Series(np.bincount(result[key], minlength=len(names)), index=list(names))
+        print((counts / max(n, 1) * 100).round(1).to_string(), end="\n\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
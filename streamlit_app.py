@@ -1,192 +1,42 @@
+import uuid
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 
-# -------------------------------------------------------------------
-# Basic Page Config
-# -------------------------------------------------------------------
-st.set_page_config(
-    page_title="EAM Maturity Assessment",
-    page_icon="🧱",
-    layout="wide"
+import metrics
+
+from app_resources import (
+    get_benchmarks,
+    get_cube,
+    get_drafts,
+    get_events,
+    get_index,
+    get_points,
+    get_rules,
+    get_store,
+    segment_filter,
+    setup_page,
 )
+from cohort_store import target_level
+from eam_catalog import BUSINESS_GOALS, LABELS, PAIN_POINTS, TIME_HORIZONS
+from event_log import EDIT, SUBMIT
 
 # -------------------------------------------------------------------
-# Labels & Config
+# Basic Page Config & Mandant
 # -------------------------------------------------------------------
-LABELS = {
-    1: "1 – Ad-hoc / Chaotisch",
-    2: "2 – Basic / Wiederholbar",
-    3: "3 – Definiert",
-    4: "4 – Gesteuert / Gemessen",
-    5: "5 – Optimiert / Wertgetrieben",
-}
+tenant = setup_page()
+timer = metrics.SectionTimer("assessment")
 
-BUSINESS_GOALS = [
-    "Kostenreduktion / Effizienz",
-    "Resilienz & Betriebssicherheit",
-    "Time-to-Market / Veränderungsgeschwindigkeit",
-    "Regulatorik & Compliance",
-    "Data & AI Enablement",
-    "Standardisierung & Komplexitätsreduktion",
-]
-
-PAIN_POINTS = [
-    "Keine Transparenz über Applikationslandschaft",
-    "Schatten-IT & ungeplante Lösungen",
-    "Komplexe & fragile ERP-Landschaft",
-    "Fehlende Steuerbarkeit von Transformationen",
-    "Zu viele Technologien / Varianten",
-    "EAM wird als Bremse wahrgenommen",
-]
-
-TIME_HORIZONS = [
-    "0–6 Monate",
-    "6–12 Monate",
-    "12–24 Monate",
-]
-
-# -------------------------------------------------------------------
-# Dimensionen inkl. Fragen
-# -------------------------------------------------------------------
-DIMENSIONS = [
-    {
-        "id": "strategy",
-        "name": "Strategische Verankerung & Governance",
-        "description": "Wie stark ist EAM in Strategie, Entscheidungsprozessen und Governance verankert?",
-        "questions": [
-            "Es gibt ein klares, schriftlich fixiertes Mandat für EAM (z.B. vom CIO/Board).",
-            "EAM-Ziele sind explizit mit der Unternehmensstrategie verknüpft.",
-            "Architekturentscheidungen werden in festen Gremien getroffen (Architecture Board, Governance-Runden).",
-            "EAM-Prinzipien (z.B. Cloud first, Clean Core, Standardisierung) sind definiert und werden angewendet.",
-        ],
-    },
-    {
-        "id": "method",
-        "name": "Methoden, Modelle & Referenzarchitekturen",
-        "description": "Reifegrad von Vorgehensmodell, Artefakten und Standards.",
-        "questions": [
-            "Es existiert ein dokumentiertes EAM-Vorgehensmodell (z.B. Phasen, Deliverables, Rollen).",
-            "Es gibt belastbare Referenzarchitekturen (z.B. ERP Cloud RefArch, Integrationsarchitektur).",
-            "Business Capabilities, Domänenmodelle und Zielbilder werden aktiv genutzt.",
-            "EAM-Vorgaben sind in Projektstandards (Templates, Checklisten, Qualitätsschranken) verankert.",
-        ],
-    },
-    {
-        "id": "tooling",
-        "name": "Tooling & Architektur-Repository",
-        "description": "Wie gut sind Daten, Werkzeuge und Integrationen rund um EAM aufgestellt?",
-        "questions": [
-            "Es existiert ein zentrales Architektur-Repository / EA-Tool.",
-            "Architekturobjekte (Anwendungen, Schnittstellen, Capabilities, Technologien) sind weitgehend vollständig gepflegt.",
-            "Es gibt Schnittstellen zu anderen Systemen (CMDB, Projektportfolio, CI/CD, ITSM).",
-            "Architekturdaten werden regelmäßig aktualisiert (definierte Owner & Prozesse).",
-        ],
-    },
-    {
-        "id": "projects",
-        "name": "EAM in Projekten & Lösungsarchitektur",
-        "description": "Wie stark ist EAM im Projektalltag verankert?",
-        "questions": [
-            "Für Projekte gibt es verpflichtende Architektur-Checkpoints (z.B. Solution Design Review).",
-            "Solution-Architekten nutzen aktiv EAM-Artefakte (z.B. Capability Maps, Referenzarchitekturen).",
-            "Architekturvorgaben fließen in Ausschreibungen, Provider-Briefings und technische Designs ein.",
-            "Es gibt klare Kriterien, wann Projekte EAM involvieren müssen (z.B. Budget, Kritikalität, Domäne).",
-        ],
-    },
-    {
-        "id": "data_ai",
-        "name": "Datenbasis & AI-Unterstützung im EAM",
-        "description": "Wie daten- und AI-getrieben arbeitet das EAM?",
-        "questions": [
-            "Es existieren Standard-Reports/Dashboards auf Basis von Architekturdaten (Landscape, Risiken, Redundanzen).",
-            "Architekturdaten werden für Entscheidungen genutzt (z.B. für Roadmaps, Decommissioning, Cloud-Migration).",
-            "AI wird bereits getestet oder eingesetzt (z.B. automatisierte Analysen, Clustering, Impact-Analysen).",
-            "Die Datenqualität im EA-Repository ist ausreichend, um sinnvolle AI-Use-Cases zu ermöglichen.",
-        ],
-    },
-    {
-        "id": "org_skills",
-        "name": "Organisation, Rollen & Skills",
-        "description": "Struktur, Kapazität und Kompetenzen des EAM.",
-        "questions": [
-            "Rollen für EAM (Enterprise-, Domain-, Solution-Architekten) sind definiert und beschrieben.",
-            "Es existiert ein dediziertes EAM-Team mit klarer Verantwortlichkeit.",
-            "Stakeholder kennen Nutzen und Arbeitsweise des EAM (Kommunikation, Schulungen).",
-            "Es existiert ein Skill- und Entwicklungsplan für Architekt:innen (Methodik, Cloud, Security, Data, AI).",
-        ],
-    },
-    {
-        "id": "value",
-        "name": "Business Value & Steuerung",
-        "description": "Wie messbar trägt EAM zum Geschäftserfolg bei?",
-        "questions": [
-            "Es gibt Kennzahlen/OKRs für EAM (z.B. Technologiestandardisierung, Reduktion Redundanzen).",
-            "EAM wird aktiv genutzt, um Investitionen zu priorisieren (z.B. Roadmaps, Portfolioentscheidungen).",
-            "Erfolge von EAM werden sichtbar gemacht (z.B. Case Studies, Management-Reports).",
-            "Business-Vertreter sehen EAM überwiegend als Enabler, nicht als Bremse.",
-        ],
-    },
-    {
-        "id": "erp_core",
-        "name": "ERP & Core Plattformen / Resilienz",
-        "description": "Wie robust, zukunftssicher und steuerbar sind ERP- und Core-Plattform-Architekturen?",
-        "questions": [
-            "Es existiert ein klares Zielbild für ERP / Core Plattformen (z.B. ERP 2.0, Cloud-MFRD, Clean Core).",
-            "Resilienzanforderungen (z.B. Multi-Region, Failover, Kriegsfall-Tauglichkeit) sind in der Architektur umgesetzt.",
-            "Schnittstellen- und Integrationsarchitekturen (API, Event-Driven Architecture) sind definiert und dokumentiert.",
-            "Master Data Management und Datenhoheit (Data Supremacy) sind über ERP- und Kernsysteme hinweg geregelt.",
-        ],
-    },
-]
-
-CORE_DIM_IDS = ["strategy", "method", "tooling", "projects", "org_skills", "value"]
-DATA_ERP_DIM_IDS = ["data_ai", "erp_core"]
+# Fragenkatalog des Mandanten
+DIMENSIONS = list(tenant.catalog.dimensions)
+CORE_DIM_IDS = list(tenant.catalog.core_dim_ids)
+DATA_ERP_DIM_IDS = list(tenant.catalog.data_erp_dim_ids)
+DIM_IDS = {d["name"]: d["id"] for d in DIMENSIONS}
 
 # -------------------------------------------------------------------
 # Helper Functions
 # -------------------------------------------------------------------
-def maturity_label(score: float) -> str:
-    if score < 1.5:
-        return "EA Level 1 – Ad-hoc / Chaotisch"
-    elif score < 2.5:
-        return "EA Level 2 – Wiederholbar (Basic Setup)"
-    elif score < 3.5:
-        return "EA Level 3 – Definiert (Strukturiert etabliert)"
-    elif score < 4.5:
-        return "EA Level 4 – Gesteuert & Gemessen"
-    else:
-        return "EA Level 5 – Optimiert & Wertgetrieben"
-
-
-def cmmi_level(score: float):
-    if score < 1.5:
-        lvl = 1
-        desc = "CMMI Level 1 – Initial (unstrukturiert, stark personenabhängig)"
-    elif score < 2.5:
-        lvl = 2
-        desc = "CMMI Level 2 – Managed (grundlegende Planung und Wiederholbarkeit)"
-    elif score < 3.5:
-        lvl = 3
-        desc = "CMMI Level 3 – Defined (standardisierte und dokumentierte Prozesse)"
-    elif score < 4.5:
-        lvl = 4
-        desc = "CMMI Level 4 – Quantitatively Managed (kennzahlenbasiert gesteuert)"
-    else:
-        lvl = 5
-        desc = "CMMI Level 5 – Optimizing (kontinuierliche Verbesserung, Innovation)"
-    return lvl, desc
-
-
-def traffic_light(score: float) -> str:
-    if score < 2.5:
-        return "🔴"
-    elif score < 3.5:
-        return "🟡"
-    else:
-        return "🟢"
-
-
 def recommendations_for_dimension(dim_name: str, score: float):
     recs = []
 
@@ -353,71 +203,6 @@ def recommendations_for_dimension(dim_name: str, score: float):
     return recs
 
 
-def determine_archetype(overall_score, dim_results, pains, goals):
-    """Einfaches Heuristik-Modell für Archetypen."""
-    d = dim_results
-    name = "Emerging EA Engine"
-    desc = (
-        "Ihr EAM befindet sich in einem wachstumsfähigen Zustand mit soliden Grundlagen. "
-        "Die nächsten Schritte liegen in Standardisierung, besserer Projektintegration und klarer Wertkommunikation."
-    )
-
-    def s(dim_name, default=0):
-        return d.get(dim_name, default)
-
-    # Architecture Firefighters
-    if overall_score < 2.3 or "Komplexe & fragile ERP-Landschaft" in pains:
-        name = "Architecture Firefighters"
-        desc = (
-            "Euer EAM agiert aktuell stark reaktiv: Es müssen laufend Brände gelöscht werden "
-            "(Störungen, ungeplante Projekte, fragile ERP-Landschaft). Fokus: Transparenz schaffen, "
-            "kritische Systeme absichern und ein minimales Governance-Framework etablieren."
-        )
-        return name, desc
-
-    # Methoden-stark, aber nicht gelebt
-    if s("Methoden, Modelle & Referenzarchitekturen") >= 3.2 and s("EAM in Projekten & Lösungsarchitektur") < 3:
-        name = "Methoden-stark, aber nicht gelebt"
-        desc = (
-            "Auf der methodischen Ebene seid ihr bereits gut aufgestellt (Modelle, Referenzarchitekturen, Vorgehen). "
-            "Die Schwäche liegt in der Umsetzung: In Projekten und im Alltag werden diese Standards noch nicht "
-            "konsequent genutzt. Fokus: Projektintegration, Kommunikation, Nutzenstory."
-        )
-        return name, desc
-
-    # Data-rich, low mandate
-    if s("Tooling & Architektur-Repository") >= 3.2 and s("Strategische Verankerung & Governance") < 3:
-        name = "Data-rich, low mandate"
-        desc = (
-            "Ihr verfügt bereits über gute Daten, Tools und teilweise auch Dashboards. "
-            "Was fehlt, ist ein starkes Mandat und strategische Verankerung, damit diese Informationen "
-            "auch wirksam in Entscheidungen einfließen."
-        )
-        return name, desc
-
-    # Value-driven Transformer
-    if s("Business Value & Steuerung") >= 3.5 and "Time-to-Market / Veränderungsgeschwindigkeit" in goals:
-        name = "Value-driven Transformer"
-        desc = (
-            "Euer EAM ist stark auf Business Value ausgerichtet und gut an Transformationsthemen angebunden. "
-            "Der Fokus liegt jetzt auf Skalierung – insbesondere über daten- und AI-getriebene Steuerung "
-            "und stärkere Einbindung der Fachbereiche."
-        )
-        return name, desc
-
-    # Data & AI Ready
-    if s("Datenbasis & AI-Unterstützung im EAM") - overall_score >= 0.5:
-        name = "Data & AI Ready, aber unterspannt"
-        desc = (
-            "Ihr habt bereits eine gute Datenbasis und erste Erfahrungen im Bereich Analytics/AI. "
-            "Der nächste Schritt ist, diese Fähigkeiten stärker mit strategischer Steuerung und Governance "
-            "zu verknüpfen, um Entscheidungen systematisch zu verbessern."
-        )
-        return name, desc
-
-    return name, desc
-
-
 def build_executive_summary(
     overall_score,
     overall_label,
@@ -479,10 +264,258 @@ Die detaillierten Handlungsempfehlungen je Dimension finden Sie in den nachfolge
     return summary
 
 
+# -------------------------------------------------------------------
+# Eingabe-Modi
+# -------------------------------------------------------------------
+SLIDER_MODE = "Slider"
+GRID_MODE = "Kompakt (Tabelle)"
+
+
+def render_dimension_sliders(dim_ids, scores, target_scores, detail_scores):
+    """Standardmodus: ein Slider je Frage plus Ziel-Slider je Dimension."""
+    for dim in [d for d in DIMENSIONS if d["id"] in dim_ids]:
+        st.markdown(f"#### {dim['name']}")
+        st.caption(dim["description"])
+
+        cols = st.columns(2)
+        dim_values = []
+
+        for i, question in enumerate(dim["questions"]):
+            col = cols[i % 2]
+            with col:
+                value = st.slider(
+                    question,
+                    min_value=1,
+                    max_value=5,
+                    step=1,
+                    format="%d",
+                    key=f"{dim['id']}_{i}",
+                    help="1 = ad-hoc, 3 = teilweise etabliert, 5 = gelebter Standard",
+                    on_change=mark_draft_changed,
+                )
+                st.caption(f"Aktuelle Auswahl: **{LABELS[value]}**")
+            dim_values.append(value)
+            detail_scores.append(
+                {
+                    "Dimension": dim["name"],
+                    "Frage": question,
+                    "Bewertung": value,
+                }
+            )
+
+        scores[dim["name"]] = dim_values
+
+        target = st.slider(
+            "Ziel-Reifegrad in 12–18 Monaten (EA-Sicht)",
+            min_value=1,
+            max_value=5,
+            step=1,
+            key=f"{dim['id']}_target",
+            on_change=mark_draft_changed,
+        )
+        st.caption(f"Ziel: **{LABELS[target]}**")
+        target_scores[dim["name"]] = target
+
+        st.markdown("")
+
+
+def render_dimension_grid(dim_ids, key, scores, target_scores, detail_scores):
+    """Kompaktmodus: eine Tabelle je Tab – Fragen als Zeilen, Ist/Ziel als Spalten (1–5).
+
+    Der Ziel-Reifegrad einer Dimension ist der gerundete Durchschnitt der Ziel-Werte
+    ihrer Fragen (`target_level`).
+    Die Werte werden in dieselben Session-State-Keys wie die Slider zurückgeschrieben,
+    damit Entwürfe und ein Wechsel des Eingabemodus nichts verlieren.
+    """
+    dims = [d for d in DIMENSIONS if d["id"] in dim_ids]
+    grid_df = pd.DataFrame(
+        [
+            {
+                "Dimension": dim["name"],
+                "Frage": question,
+                "Ist": st.session_state[f"{dim['id']}_{i}"],
+                "Ziel": st.session_state[f"{dim['id']}_target"],
+            }
+            for dim in dims
+            for i, question in enumerate(dim["questions"])
+        ]
+    )
+    level_help = "1 = ad-hoc, 3 = teilweise etabliert, 5 = gelebter Standard"
+    edited = st.data_editor(
+        grid_df,
+        key=key,
+        hide_index=True,
+        use_container_width=True,
+        disabled=["Dimension", "Frage"],
+        on_change=mark_draft_changed,
+        column_config={
+            "Ist": st.column_config.NumberColumn(
+                "Ist", min_value=1, max_value=5, step=1, required=True, help=level_help
+            ),
+            "Ziel": st.column_config.NumberColumn(
+                "Ziel (12–18 Monate)", min_value=1, max_value=5, step=1, required=True, help=level_help
+            ),
+        },
+    )
+
+    row = 0
+    for dim in dims:
+        block = edited.iloc[row:row + len(dim["questions"])]
+        row += len(dim["questions"])
+
+        dim_values = [int(min(max(v, 1), 5)) for v in block["Ist"]]
+        for i, (question, value) in enumerate(zip(dim["questions"], dim_values)):
+            st.session_state[f"{dim['id']}_{i}"] = value
+            detail_scores.append(
+                {
+                    "Dimension": dim["name"],
+                    "Frage": question,
+                    "Bewertung": value,
+                }
+            )
+        scores[dim["name"]] = dim_values
+
+        # Gespeichert wird nur die ganze Stufe – Auswertung und Slider zeigen dieselbe
+        target = target_level(block["Ziel"].mean())
+        target_scores[dim["name"]] = target
+        st.session_state[f"{dim['id']}_target"] = target
+
+
+# -------------------------------------------------------------------
+# Session-State & Entwürfe
+# -------------------------------------------------------------------
+WIDGET_DEFAULTS = {
+    "assessment_name": "Pilot EAM Assessment",
+    "participant": "",
+    "goals": [],
+    "pains": [],
+    "time_horizon": TIME_HORIZONS[1],
+}
+for dim in DIMENSIONS:
+    for i in range(len(dim["questions"])):
+        WIDGET_DEFAULTS[f"{dim['id']}_{i}"] = 3
+    WIDGET_DEFAULTS[f"{dim['id']}_target"] = 4
+
+
+def restore_draft(draft):
+    """Übernimmt gültige Werte eines Entwurfs in den Session-State der Widgets.
+
+    Die Verknüpfung zum gespeicherten Assessment (`assessment_id`) wird nur
+    übernommen, wenn diese Session den Entwurf selbst angelegt hat. Fremde
+    Entwürfe (z.B. ein weitergegebener Link) dienen nur als Vorlage: Speichern
+    legt einen neuen Entwurf an, Absenden ein neues Assessment.
+    """
+    values = draft.get("values", {})
+    for key, default in WIDGET_DEFAULTS.items():
+        value = values.get(key, default)
+        if key == "goals":
+            value = [g for g in value if g in BUSINESS_GOALS]
+        elif key == "pains":
+            value = [p for p in value if p in PAIN_POINTS]
+        elif key == "time_horizon" and value not in TIME_HORIZONS:
+            value = default
+        elif isinstance(default, int) and not (isinstance(value, int) and 1 <= value <= 5):
+            value = default
+        st.session_state[key] = value
+    # Offene Tabellen-Edits würden die wiederhergestellten Werte sonst überschreiben
+    for key in ("grid_core", "grid_data_erp"):
+        st.session_state.pop(key, None)
+    if draft["id"] in st.session_state.own_drafts:
+        st.session_state.draft_id = draft["id"]
+        st.session_state.assessment_id = draft.get("assessment_id")
+    else:
+        st.session_state.draft_id = None
+        st.session_state.assessment_id = None
+
+
+def mark_draft_changed():
+    """`on_change` der Eingabe-Widgets: der Entwurf wird nach dem Rendern der Eingaben gespeichert.
+
+    Erst dann stehen auch die Werte aus den Tabellen (Kompaktmodus) in den
+    Slider-Keys.
+    """
+    st.session_state.draft_changed = True
+
+
+def save_draft(name):
+    """Stellt den aktuellen Stand der Eingaben in die Write-Behind-Queue (legt beim ersten Mal den Entwurf an)."""
+    if not st.session_state.draft_id:
+        st.session_state.draft_id = uuid.uuid4().hex
+        st.session_state.own_drafts.add(st.session_state.draft_id)
+    st.query_params["draft"] = st.session_state.draft_id
+    get_drafts().save(
+        st.session_state.draft_id,
+        {key: st.session_state[key] for key in WIDGET_DEFAULTS},
+        name=name,
+        assessment_id=st.session_state.assessment_id,
+    )
+
+
+def load_draft_by_id():
+    draft_id = st.session_state.draft_lookup.strip().removeprefix("?draft=")
+    draft = get_drafts().load(draft_id)
+    if draft is None:
+        st.session_state.draft_message = "Kein Entwurf mit dieser ID gefunden."
+        return
+    restore_draft(draft)
+
+
+if "draft_id" not in st.session_state:
+    st.session_state.draft_id = None
+    st.session_state.assessment_id = None
+    st.session_state.own_drafts = set()
+    draft = get_drafts().load(st.query_params.get("draft", ""))
+    if draft is not None:
+        restore_draft(draft)
+
+
+def record_submission(scores, target_scores, goals, pains, time_horizon, name, participant):
+    """Speichert das Assessment in der Kohorte und protokolliert die Einreichung.
+
+    Wurde aus diesem Entwurf bereits ein Assessment gespeichert, wird es
+    überschrieben (Ereignis `EDIT`) statt ein weiteres anzulegen.
+    """
+    get_benchmarks()  # Benchmarks & Portfolio-Aggregate vor dem Speichern anhängen
+    get_cube()
+    store = get_store()
+    fields = dict(
+        scores=scores,
+        target_scores=target_scores,
+        goals=goals,
+        pains=pains,
+        time_horizon=time_horizon,
+        participant=participant,
+    )
+    assessment_id, kind = st.session_state.assessment_id, SUBMIT
+    if assessment_id:
+        try:
+            with metrics.STORE_SECONDS.time(operation="update"):
+                store.update(assessment_id, name=name, **fields)
+            kind = EDIT
+        except KeyError:
+            pass  # inzwischen gelöscht oder aus einem anderen Store: neu anlegen
+    if kind == SUBMIT:
+        with metrics.STORE_SECONDS.time(operation="append"):
+            assessment_id = store.append(name=name, **fields)
+    get_events().record(kind, assessment_id, name=name, **fields)
+    st.session_state.assessment_id = assessment_id
+    metrics.SUBMISSIONS.inc(tenant=tenant.id, kind="edit" if kind == EDIT else "submit")
+    return assessment_id, kind
+
+
+# Werte bleiben erhalten, auch wenn ihr Widget in einem Run nicht gerendert wird
+# (z.B. Slider im Kompaktmodus)
+for key, default in WIDGET_DEFAULTS.items():
+    st.session_state[key] = st.session_state.get(key, default)
+
+st.session_state.setdefault(
+    "input_mode", GRID_MODE if st.query_params.get("mode") == "grid" else SLIDER_MODE
+)
+
 # -------------------------------------------------------------------
 # Sidebar
 # -------------------------------------------------------------------
-st.sidebar.title("EAM Maturity Assessment 🧱")
+st.sidebar.title(f"{tenant.title} {tenant.page_icon}")
 st.sidebar.markdown(
     """
 Bewerte jede Aussage auf einer Skala von **1 bis 5**:
@@ -504,10 +537,25 @@ with st.sidebar.expander("Maturity-Skala (EA-spezifisch)"):
 """
     )
 
+st.sidebar.radio(
+    "Eingabemodus",
+    [SLIDER_MODE, GRID_MODE],
+    key="input_mode",
+    help="Kompakt: eine Tabelle je Tab statt einzelner Slider. Beide Modi speichern dieselben Werte.",
+)
+
+with st.sidebar.expander("💾 Entwurf fortsetzen"):
+    st.text_input("Entwurfs-ID", key="draft_lookup", help="Die ID aus dem Entwurfslink `?draft=…`.")
+    st.button("Entwurf laden", on_click=load_draft_by_id)
+    if st.session_state.get("draft_message"):
+        st.warning(st.session_state.pop("draft_message"))
+    if st.session_state.draft_id:
+        st.caption(f"Aktueller Entwurf: `?draft={st.session_state.draft_id}`")
+
 # -------------------------------------------------------------------
 # Header
 # -------------------------------------------------------------------
-st.title("🧱 EAM Maturity Assessment – Prototyp")
+st.title(tenant.heading)
 st.markdown(
     """
 Dieses Tool hilft dir, den **Reifegrad deines Enterprise Architecture Managements** 
@@ -518,165 +566,94 @@ strukturiert zu bewerten – inkl. **EA-Maturity-Level**, **CMMI-Vergleich**,
 
 st.markdown("---")
 
+timer.lap("sidebar")
+
 # -------------------------------------------------------------------
-# Form: Multi-Tab-Formular
+# Eingaben: Multi-Tab-Formular
 # -------------------------------------------------------------------
+# Bewusst ohne `st.form`: nur so erreicht jede Änderung den Server und landet
+# (über die Write-Behind-Queue gebündelt) im Entwurf – ein Reload oder
+# Session-Timeout verliert dann keine Antworten.
 scores = {}
 detail_scores = []
 target_scores = {}
 
-with st.form("eam_assessment_form"):
-    tab1, tab2, tab3, tab4 = st.tabs(
-        [
-            "1️⃣ Kontext & Ziele",
-            "2️⃣ EAM-Kerndimensionen",
-            "3️⃣ Data, AI & ERP",
-            "4️⃣ Review & Submit",
-        ]
-    )
+tab1, tab2, tab3, tab4 = st.tabs(
+    [
+        "1️⃣ Kontext & Ziele",
+        "2️⃣ EAM-Kerndimensionen",
+        "3️⃣ Data, AI & ERP",
+        "4️⃣ Review & Submit",
+    ]
+)
 
-    # TAB 1: Kontext & Ziele
-    with tab1:
-        st.subheader("Kontext & Ziele")
-        st.markdown(
-            """
+# TAB 1: Kontext & Ziele
+with tab1:
+    st.subheader("Kontext & Ziele")
+    st.markdown(
+        """
 Gib bitte ein paar Rahmendaten an – das hilft bei der Interpretation und der Ableitung
 von Maßnahmen.
 """
-        )
-
-        assessment_name = st.text_input("Name des Assessments", "Pilot EAM Assessment")
-        participant = st.text_input("Teilnehmer / Bereich", "")
-
-        goals = st.multiselect(
-            "Welche Ziele verfolgt ihr primär mit EAM?",
-            BUSINESS_GOALS,
-        )
-
-        pains = st.multiselect(
-            "Wo tut es heute am meisten weh?",
-            PAIN_POINTS,
-        )
-
-        time_horizon = st.selectbox(
-            "Zeithorizont für das gewünschte Zielbild",
-            TIME_HORIZONS,
-            index=1,
-        )
-
-        st.info(
-            "Hinweis: Die Ziele und Pain Points werden später in der Executive Summary und den Handlungsempfehlungen genutzt."
-        )
-
-    # TAB 2: Kern-Dimensionen
-    with tab2:
-        st.subheader("EAM-Kerndimensionen")
-        st.markdown(
-            "Bewerte die folgenden Dimensionen. Nach den Fragen kannst du einen **Ziel-Reifegrad** für die nächsten 12–18 Monate angeben."
-        )
+    )
 
-        for dim in [d for d in DIMENSIONS if d["id"] in CORE_DIM_IDS]:
-            st.markdown(f"#### {dim['name']}")
-            st.caption(dim["description"])
-
-            cols = st.columns(2)
-            dim_values = []
-
-            for i, question in enumerate(dim["questions"]):
-                col = cols[i % 2]
-                with col:
-                    value = st.slider(
-                        question,
-                        min_value=1,
-                        max_value=5,
-                        value=3,
-                        step=1,
-                        format="%d",
-                        key=f"{dim['id']}_{i}",
-                        help="1 = ad-hoc, 3 = teilweise etabliert, 5 = gelebter Standard",
-                    )
-                    st.caption(f"Aktuelle Auswahl: **{LABELS[value]}**")
-                dim_values.append(value)
-                detail_scores.append(
-                    {
-                        "Dimension": dim["name"],
-                        "Frage": question,
-                        "Bewertung": value,
-                    }
-                )
+    assessment_name = st.text_input("Name des Assessments", key="assessment_name", on_change=mark_draft_changed)
+    participant = st.text_input("Teilnehmer / Bereich", key="participant", on_change=mark_draft_changed)
 
-            scores[dim["name"]] = dim_values
+    goals = st.multiselect(
+        "Welche Ziele verfolgt ihr primär mit EAM?",
+        BUSINESS_GOALS,
+        key="goals",
+        on_change=mark_draft_changed,
+    )
 
-            target = st.slider(
-                "Ziel-Reifegrad in 12–18 Monaten (EA-Sicht)",
-                min_value=1,
-                max_value=5,
-                value=4,
-                step=1,
-                key=f"{dim['id']}_target",
-            )
-            st.caption(f"Ziel: **{LABELS[target]}**")
-            target_scores[dim["name"]] = target
+    pains = st.multiselect(
+        "Wo tut es heute am meisten weh?",
+        PAIN_POINTS,
+        key="pains",
+        on_change=mark_draft_changed,
+    )
 
-            st.markdown("")
+    time_horizon = st.selectbox(
+        "Zeithorizont für das gewünschte Zielbild",
+        TIME_HORIZONS,
+        key="time_horizon",
+        on_change=mark_draft_changed,
+    )
 
-    # TAB 3: Data, AI & ERP
-    with tab3:
-        st.subheader("Daten, AI & ERP / Core Plattformen")
-        st.markdown(
-            "Hier betrachten wir den datengetriebenen Teil des EAM sowie ERP & Core Plattformen mit Fokus auf Resilienz."
-        )
+    st.info(
+        "Hinweis: Die Ziele und Pain Points werden später in der Executive Summary und den Handlungsempfehlungen genutzt."
+    )
 
-        for dim in [d for d in DIMENSIONS if d["id"] in DATA_ERP_DIM_IDS]:
-            st.markdown(f"#### {dim['name']}")
-            st.caption(dim["description"])
-
-            cols = st.columns(2)
-            dim_values = []
-
-            for i, question in enumerate(dim["questions"]):
-                col = cols[i % 2]
-                with col:
-                    value = st.slider(
-                        question,
-                        min_value=1,
-                        max_value=5,
-                        value=3,
-                        step=1,
-                        format="%d",
-                        key=f"{dim['id']}_{i}",
-                        help="1 = ad-hoc, 3 = teilweise etabliert, 5 = gelebter Standard",
-                    )
-                    st.caption(f"Aktuelle Auswahl: **{LABELS[value]}**")
-                dim_values.append(value)
-                detail_scores.append(
-                    {
-                        "Dimension": dim["name"],
-                        "Frage": question,
-                        "Bewertung": value,
-                    }
-                )
+# TAB 2: Kern-Dimensionen
+with tab2:
+    st.subheader("EAM-Kerndimensionen")
+    st.markdown(
+        "Bewerte die folgenden Dimensionen. Nach den Fragen kannst du einen **Ziel-Reifegrad** für die nächsten 12–18 Monate angeben."
+    )
 
-            scores[dim["name"]] = dim_values
+    if st.session_state.input_mode == GRID_MODE:
+        render_dimension_grid(CORE_DIM_IDS, "grid_core", scores, target_scores, detail_scores)
+    else:
+        render_dimension_sliders(CORE_DIM_IDS, scores, target_scores, detail_scores)
 
-            target = st.slider(
-                "Ziel-Reifegrad in 12–18 Monaten (EA-Sicht)",
-                min_value=1,
-                max_value=5,
-                value=4,
-                step=1,
-                key=f"{dim['id']}_target",
-            )
-            st.caption(f"Ziel: **{LABELS[target]}**")
-            target_scores[dim["name"]] = target
+# TAB 3: Data, AI & ERP
+with tab3:
+    st.subheader("Daten, AI & ERP / Core Plattformen")
+    st.markdown(
+        "Hier betrachten wir den datengetriebenen Teil des EAM sowie ERP & Core Plattformen mit Fokus auf Resilienz."
+    )
 
-            st.markdown("")
+    if st.session_state.input_mode == GRID_MODE:
+        render_dimension_grid(DATA_ERP_DIM_IDS, "grid_data_erp", scores, target_scores, detail_scores)
+    else:
+        render_dimension_sliders(DATA_ERP_DIM_IDS, scores, target_scores, detail_scores)
 
-    # TAB 4: Review & Submit
-    with tab4:
-        st.subheader("Review & Submit")
-        st.markdown(
-            """
+# TAB 4: Review & Submit
+with tab4:
+    st.subheader("Review & Submit")
+    st.markdown(
+        """
 Wenn du alle Fragen beantwortet hast, klicke auf **„🚀 Auswertung anzeigen“**.
 Anschließend erhältst du:
 
@@ -688,9 +665,34 @@ Anschließend erhältst du:
 - Roadmap (0–90 Tage, 6–12 Monate) – **inkl. visueller Timeline**  
 - Workshop-Vorschlag
 """
+    )
+    # Optional: Perzentile nur innerhalb einer Vergleichsgruppe statt über die ganze Kohorte
+    peer_segment = segment_filter("peers", label="👥 Vergleichsgruppe für Perzentile (optional)")
+
+col_submit, col_draft = st.columns([1, 3])
+with col_submit:
+    submitted = st.button("🚀 Auswertung anzeigen")
+with col_draft:
+    draft_saved = st.button("💾 Entwurf speichern")
+    st.caption("Änderungen werden automatisch als Entwurf gespeichert; der Link steht in der Adresszeile.")
+
+timer.lap("form")
+
+# Entwurf nach jeder Änderung (gebündelt im Hintergrund geschrieben) sowie beim Absenden
+if submitted:
+    assessment_id, submission_kind = record_submission(
+        scores, target_scores, goals, pains, time_horizon, assessment_name, participant
+    )
+if st.session_state.pop("draft_changed", False) or submitted or draft_saved:
+    save_draft(assessment_name)
+    if draft_saved:
+        metrics.SUBMISSIONS.inc(tenant=tenant.id, kind="draft")
+        st.success(
+            "Entwurf gespeichert. Du kannst ihn über diesen Link fortsetzen: "
+            f"`?draft={st.session_state.draft_id}`"
         )
 
-    submitted = st.form_submit_button("🚀 Auswertung anzeigen")
+    timer.lap("save")
 
 # -------------------------------------------------------------------
 # Auswertung
@@ -705,8 +707,25 @@ else:
     }
 
     overall_score = sum(dim_results.values()) / len(dim_results)
-    overall_label = maturity_label(overall_score)
-    cmmi_lvl, cmmi_desc = cmmi_level(overall_score)
+    rules = get_rules()
+    overall_label = rules.label("maturity", overall_score)
+    cmmi_lvl, cmmi_desc = rules.level("cmmi", overall_score), rules.label("cmmi", overall_score)
+
+    if peer_segment is None:
+        # Ganze Kohorte: mergeable Histogramme, unabhängig von der Kohortengröße
+        benchmarks = get_benchmarks()
+        peer_count = benchmarks.count()
+        overall_pct = benchmarks.percentile_rank(overall_score)
+        dim_pcts = [benchmarks.percentile_rank(score, DIM_IDS[name]) for name, score in dim_results.items()]
+    else:
+        # Vergleichsgruppe: Auswahl aus dem Bitmap-Index, Werte aus der Punktwolke
+        index, points = get_index(), get_points()
+        peers = index.mask(peer_segment)
+        peer_count = index.count(peer_segment)
+        overall_pct = points.percentile_rank("overall", overall_score, peers)
+        dim_pcts = [
+            points.percentile_rank(f"dim:{DIM_IDS[name]}", score, peers) for name, score in dim_results.items()
+        ]
 
     # Gap-Analyse: Ziel - Ist
     dim_gaps = {
@@ -727,6 +746,12 @@ else:
             value=f"{overall_score:.2f}",
         )
 
+        if overall_pct is not None:
+            st.caption(
+                f"Perzentil {'in der Vergleichsgruppe' if peer_segment else 'im Benchmark'}: "
+                f"**{overall_pct:.0f}.** (Basis: {peer_count} Assessments)"
+            )
+
         st.markdown(f"**EA-Maturity-Level:** {overall_label}")
         st.progress(min(max(overall_score / 5, 0.0), 1.0))
 
@@ -740,9 +765,21 @@ else:
             st.markdown(f"**Teilnehmer / Bereich:** {participant}")
         st.markdown(f"**Anzahl Dimensionen:** {len(dim_results)}")
         st.markdown(f"**Zeithorizont Zielbild:** {time_horizon}")
+        st.caption(
+            f"{'Aktualisiert' if submission_kind == EDIT else 'Gespeichert'} "
+            f"als Assessment `{assessment_id}`"
+        )
+        st.page_link(
+            "pages/3_Vergleich.py",
+            label="Mit anderen Assessments vergleichen",
+            icon="🔀",
+            query_params={"compare": assessment_id},
+        )
 
     st.markdown("")
 
+    timer.lap("overview")
+
     # Profil & Radar
     st.markdown("### 3. Profil & Gap-Analyse je Dimension")
 
@@ -754,7 +791,8 @@ else:
         }
     )
     dim_df["Gap (Ziel - Ist)"] = dim_df["Ziel"] - dim_df["Ist"]
-    dim_df["Ampel"] = dim_df["Ist"].apply(traffic_light)
+    dim_df["Ampel"] = rules.labels("traffic_light", dim_df["Ist"])
+    dim_df["Perzentil"] = dim_pcts
 
     col_chart1, col_chart2 = st.columns(2)
 
@@ -793,16 +831,14 @@ else:
     with col_strengths:
         st.markdown("**Top 3 Stärken:**")
         for name, score in top3:
-            st.markdown(f"- {traffic_light(score)} {name}: **{score:.2f}**")
+            st.markdown(f"- {rules.label('traffic_light', score)} {name}: **{score:.2f}**")
 
     with col_weaknesses:
         st.markdown("**Top 3 Schwächen / Entwicklungsfelder:**")
         for name, score in bottom3:
-            st.markdown(f"- {traffic_light(score)} {name}: **{score:.2f}**")
+            st.markdown(f"- {rules.label('traffic_light', score)} {name}: **{score:.2f}**")
 
-    archetype_name, archetype_desc = determine_archetype(
-        overall_score, dim_results, pains, goals
-    )
+    archetype_name, archetype_desc = rules.archetype(overall_score, dim_results, goals, pains)
 
     st.markdown("**EAM-Archetyp (Heuristik):**")
     st.markdown(f"- **{archetype_name}**")
@@ -822,6 +858,8 @@ else:
         mime="text/csv",
     )
 
+    timer.lap("profile")
+
     # Executive Summary
     st.markdown("### 6. Executive Summary (auto-generiert)")
 
@@ -853,12 +891,12 @@ else:
         score = dim_results[dim_name]
         recs = recommendations_for_dimension(dim_name, score)
 
-        with st.expander(f"{dim_name} – Score: {score:.2f} {traffic_light(score)}"):
+        with st.expander(f"{dim_name} – Score: {score:.2f} {rules.label('traffic_light', score)}"):
             st.markdown(f"**Aktueller Reifegrad (EA-Sicht):** {score:.2f}")
-            lvl_txt = maturity_label(score)
+            lvl_txt = rules.label("maturity", score)
             st.markdown(f"**Interpretation:** {lvl_txt}")
 
-            cmmi_dim_lvl, cmmi_dim_desc = cmmi_level(score)
+            cmmi_dim_desc = rules.label("cmmi", score)
             st.markdown(f"**CMMI-Näherung:** {cmmi_dim_desc}")
 
             if recs:
@@ -971,6 +1009,8 @@ else:
 
     st.plotly_chart(fig_rm, use_container_width=True)
 
+    timer.lap("summary")
+
     # Workshop-Vorschlag
     st.markdown("### 9. Empfohlenes Workshop-Format")
 
@@ -999,3 +1039,5 @@ else:
    - Verantwortlichkeiten und nächste Schritte klären  
 """
     )
+
+timer.done()
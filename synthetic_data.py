@@ -0,0 +1,346 @@
+"""
+Synthetische Assessments für Skalierungs- und Benchmark-Tests.
+
+Die Antworten folgen einem einfachen Latent-Modell auf Basis des Katalogs:
+
+    Organisation   g   ~ N(Archetyp-Niveau, 0.45)
+    Dimension      d_k = g + Archetyp-Offset_k + N(0, 0.35)
+    Frage          x_q = round(d_k + Schwierigkeit_q + N(0, 0.55)), begrenzt auf 1–5
+
+Fragen einer Dimension korrelieren über d_k, Dimensionen untereinander über
+g. Ziele, Pain Points und Zeithorizonte werden je Archetyp mit eigenen
+Wahrscheinlichkeiten gezogen.
+
+Das Profil ist nur der Vorschlag: welcher Archetyp ein Assessment ist,
+entscheiden allein die Bewertungsregeln der App (`scoring_rules`). Jeder
+Kandidat wird deshalb mit `RuleSet.classify` eingeordnet und nur übernommen,
+solange sein Archetyp im Chunk noch Plätze frei hat (Rejection Sampling) –
+die Anteile aus `archetype_mix` gelten so auch für die Auswertung der App.
+
+Alles wird chunkweise vektorisiert erzeugt und
+direkt gestreamt (CSV, Parquet oder Kohortenspeicher) – der Speicherbedarf
+hängt nur von der Chunk-Größe ab. Gleicher Seed + gleiche Chunk-Größe ergibt
+identische Daten.
+
+Beispiel:
+    python synthetic_data.py --rows 1000000 --store data/cohort --seed 42
+"""
+import argparse
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cohort_store import CohortStore, layout_for
+from eam_catalog import BUSINESS_GOALS, DEFAULT_CATALOG, PAIN_POINTS, TIME_HORIZONS
+from scoring_rules import compile_rules, load_rules
+
+# Archetyp -> Niveau, Offsets je Dimension-ID und bevorzugte Ziele / Pain Points
+ARCHETYPE_PROFILES = {
+    "Architecture Firefighters": {
+        "level": 1.9,
+        "offsets": {"erp_core": -0.4, "strategy": -0.2},
+        "goals": {"Resilienz & Betriebssicherheit": 0.6, "Kostenreduktion / Effizienz": 0.5},
+        "pains": {"Komplexe & fragile ERP-Landschaft": 0.7, "Keine Transparenz über Applikationslandschaft": 0.6},
+    },
+    "Methoden-stark, aber nicht gelebt": {
+        "level": 2.9,
+        "offsets": {"method": 0.8, "projects": -0.6},
+        "goals": {"Standardisierung & Komplexitätsreduktion": 0.5},
+        "pains": {"EAM wird als Bremse wahrgenommen": 0.6},
+    },
+    "Data-rich, low mandate": {
+        "level": 2.9,
+        "offsets": {"tooling": 0.8, "strategy": -0.6},
+        "goals": {"Data & AI Enablement": 0.4},
+        "pains": {"Fehlende Steuerbarkeit von Transformationen": 0.5},
+    },
+    "Value-driven Transformer": {
+        "level": 3.6,
+        "offsets": {"value": 0.5},
+        "goals": {"Time-to-Market / Veränderungsgeschwindigkeit": 0.85},
+        "pains": {},
+    },
+    "Data & AI Ready, aber unterspannt": {
+        "level": 3.0,
+        "offsets": {"data_ai": 0.9, "strategy": -0.2},
+        "goals": {"Data & AI Enablement": 0.75},
+        "pains": {"Zu viele Technologien / Varianten": 0.4},
+    },
+    "Emerging EA Engine": {
+        "level": 3.1,
+        "offsets": {},
+        "goals": {},
+        "pains": {},
+    },
+}
+
+DEFAULT_MIX = {
+    "Architecture Firefighters": 0.2,
+    "Methoden-stark, aber nicht gelebt": 0.15,
+    "Data-rich, low mandate": 0.15,
+    "Value-driven Transformer": 0.1,
+    "Data & AI Ready, aber unterspannt": 0.1,
+    "Emerging EA Engine": 0.3,
+}
+DEFAULT_HORIZON_MIX = (0.25, 0.5, 0.25)
+BASE_CHOICE_PROBABILITY = 0.2
+# Vorschlagsprofil für Archetypen eigener Regeltabellen ohne Eintrag oben
+NEUTRAL_PROFILE = {"level": 3.0, "offsets": {}, "goals": {}, "pains": {}}
+# Abbruch, wenn ein Archetyp mit den Regeln praktisch nicht erreichbar ist
+MAX_ROUNDS = 50
+
+
+@dataclass
+class SyntheticChunk:
+    """Ein Block synthetischer Assessments im Zeilenformat des Kohortenspeichers."""
+
+    rows: np.ndarray        # (n, layout.width) uint8, Bereich-Spalten noch leer
+    archetypes: np.ndarray  # Index in `archetype_names` (so klassifiziert von den Regeln)
+    units: np.ndarray       # Index in `unit_names`
+    archetype_names: list
+    unit_names: list
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class SyntheticAssessmentGenerator:
+    def __init__(
+        self,
+        seed=None,
+        catalog=DEFAULT_CATALOG,
+        archetype_mix=None,
+        horizon_mix=DEFAULT_HORIZON_MIX,
+        n_units=25,
+        rules=None,
+    ):
+        self.rules = rules or compile_rules(catalog=catalog)
+        mix = dict(archetype_mix or DEFAULT_MIX)
+        unknown = set(mix) - set(self.rules.archetype_names)
+        if unknown:
+            raise ValueError(f"Unbekannte Archetypen: {', '.join(sorted(unknown))}")
+        weights = np.array(list(mix.values()), dtype=float)
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("Archetyp-Anteile müssen nicht-negativ sein und dürfen nicht alle 0 sein.")
+
+        self.catalog = catalog
+        self.layout = layout_for(catalog)
+        self.rng = np.random.default_rng(seed)
+        self.archetype_names = list(mix)
+        self.archetype_p = weights / weights.sum()
+        self.horizon_p = np.asarray(horizon_mix, dtype=float) / np.sum(horizon_mix)
+        self.unit_names = [f"Business Unit {i + 1:02d}" for i in range(n_units)]
+        # Regel-Index -> Index im Mix (-1: Archetyp ist nicht gefragt)
+        self._from_rules = np.array(
+            [self.archetype_names.index(a) if a in mix else -1 for a in self.rules.archetype_names]
+        )
+        # Geschätzte Trefferquote je Vorschlagsprofil; steuert, wie viele Kandidaten gezogen werden
+        self._acceptance = np.full(len(mix), 0.5)
+
+        # Parametertabellen je Archetyp, damit pro Chunk nur noch indiziert wird
+        dim_ids = catalog.dim_ids
+        profiles = [ARCHETYPE_PROFILES.get(a, NEUTRAL_PROFILE) for a in self.archetype_names]
+        self._levels = np.array([p["level"] for p in profiles])
+        self._offsets = np.array(
+            [[p["offsets"].get(d, 0.0) for d in dim_ids] for p in profiles]
+        )
+        self._goal_p = np.array(
+            [[p["goals"].get(g, BASE_CHOICE_PROBABILITY) for g in BUSINESS_GOALS] for p in profiles]
+        )
+        self._pain_p = np.array(
+            [[p["pains"].get(x, BASE_CHOICE_PROBABILITY) for x in PAIN_POINTS] for p in profiles]
+        )
+        # Feste "Schwierigkeit" je Frage: manche Aussagen werden systematisch strenger bewertet
+        self._difficulty = self.rng.normal(0.0, 0.25, catalog.n_questions)
+        # Business Units sind unterschiedlich groß (Zipf-artig)
+        unit_w = 1.0 / np.arange(1, n_units + 1)
+        self._unit_p = unit_w / unit_w.sum()
+
+    def generate(self, n: int) -> SyntheticChunk:
+        """`n` Assessments, deren Archetypen (laut Regeln) genau den gezogenen Anteilen entsprechen."""
+        rng = self.rng
+        quota = rng.multinomial(n, self.archetype_p)
+        accepted, labels = [], []
+        for attempt in range(MAX_ROUNDS + 1):
+            missing = quota - np.bincount(np.concatenate(labels or [[]]).astype(np.int64), minlength=len(quota))
+            if not missing.any():
+                break
+            if attempt == MAX_ROUNDS:
+                k = int(np.argmax(missing))
+                raise ValueError(
+                    f"Archetyp '{self.archetype_names[k]}' ist mit den Bewertungsregeln kaum erreichbar "
+                    f"(Trefferquote {self._acceptance[k]:.1%}); Profil oder Anteile anpassen."
+                )
+            proposals = np.where(missing > 0, np.ceil(missing / self._acceptance * 1.2).astype(np.int64) + 16, 0)
+            profile = np.repeat(np.arange(len(quota)), proposals)
+            rows = self._propose(profile)
+            classified = self._from_rules[self.rules.classify(rows)["archetype"]]
+            hits = np.bincount(profile[classified == profile], minlength=len(quota))
+            tried = proposals > 0
+            self._acceptance[tried] = np.maximum(hits[tried] / proposals[tried], 0.01)
+            # Jeder Kandidat zählt für den Archetyp, als den ihn die Regeln einordnen – egal aus welchem Profil
+            for k in np.flatnonzero(missing > 0):
+                take = np.flatnonzero(classified == k)[: missing[k]]
+                accepted.append(rows[take])
+                labels.append(np.full(len(take), k))
+
+        order = rng.permutation(n)
+        rows = np.concatenate(accepted)[order]
+        archetypes = np.concatenate(labels)[order]
+        units = rng.choice(len(self.unit_names), size=n, p=self._unit_p)
+        return SyntheticChunk(rows, archetypes, units, self.archetype_names, self.unit_names)
+
+    def _propose(self, profile: np.ndarray) -> np.ndarray:
+        """Kandidaten aus dem Latent-Modell des jeweiligen Archetyp-Profils."""
+        rng, cat, layout = self.rng, self.catalog, self.layout
+        n = len(profile)
+        org = rng.normal(self._levels[profile], 0.45)
+        dims = org[:, None] + self._offsets[profile] + rng.normal(0.0, 0.35, (n, cat.n_dimensions))
+        questions = dims[:, cat.question_dim] + self._difficulty + rng.normal(0.0, 0.55, (n, cat.n_questions))
+
+        horizons = rng.choice(len(TIME_HORIZONS), size=n, p=self.horizon_p)
+        # Längerer Zeithorizont -> ambitioniertere Ziele
+        gaps = 0.5 + 0.35 * horizons[:, None] + np.abs(rng.normal(0.4, 0.5, (n, cat.n_dimensions)))
+
+        rows = np.zeros((n, layout.width), dtype=np.uint8)
+        rows[:, layout.answers] = np.clip(np.rint(questions), 1, 5)
+        rows[:, layout.targets] = np.clip(np.rint(dims + gaps), 1, 5)
+        rows[:, layout.goals] = _bitmask(rng.random((n, len(BUSINESS_GOALS))) < self._goal_p[profile])
+        rows[:, layout.pains] = _bitmask(rng.random((n, len(PAIN_POINTS))) < self._pain_p[profile])
+        rows[:, layout.horizon] = horizons
+        return rows
+
+    def iter_chunks(self, total: int, chunk_size: int = 100_000):
+        remaining = total
+        while remaining > 0:
+            n = min(chunk_size, remaining)
+            yield self.generate(n)
+            remaining -= n
+
+
+def _bitmask(flags: np.ndarray) -> np.ndarray:
+    weights = 1 << np.arange(flags.shape[1], dtype=np.uint8)
+    return (flags.astype(np.uint8) * weights).sum(axis=1).astype(np.uint8)
+
+
+# -------------------------------------------------------------------
+# Senken
+# -------------------------------------------------------------------
+def chunk_to_frame(chunk: SyntheticChunk, catalog=DEFAULT_CATALOG, offset: int = 0) -> pd.DataFrame:
+    """Breites Tabellenformat; Spalten wie die Widget-Keys der App (`{dim_id}_{i}`, `{dim_id}_target`)."""
+    layout = layout_for(catalog)
+    columns = {}
+    counters = {}
+    for col, (dim_id, _, _) in enumerate(catalog.questions):
+        i = counters.get(dim_id, 0)
+        counters[dim_id] = i + 1
+        columns[f"{dim_id}_{i}"] = chunk.rows[:, col]
+    for j, dim_id in enumerate(catalog.dim_ids):
+        columns[f"{dim_id}_target"] = chunk.rows[:, layout.targets.start + j]
+
+    frame = pd.DataFrame(
+        {
+            "assessment": np.char.add("Synthetic ", np.arange(offset, offset + len(chunk)).astype(str)),
+            "participant": np.asarray(chunk.unit_names, dtype=object)[chunk.units],
+            "archetype_hint": np.asarray(chunk.archetype_names, dtype=object)[chunk.archetypes],
+            "goals_mask": chunk.rows[:, layout.goals],
+            "pains_mask": chunk.rows[:, layout.pains],
+            "time_horizon": np.asarray(TIME_HORIZONS, dtype=object)[chunk.rows[:, layout.horizon]],
+        }
+    )
+    return pd.concat([frame, pd.DataFrame(columns)], axis=1)
+
+
+def write_csv(path, chunks, catalog=DEFAULT_CATALOG) -> int:
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for chunk in chunks:
+            chunk_to_frame(chunk, catalog, written).to_csv(f, index=False, header=written == 0)
+            written += len(chunk)
+    return written
+
+
+def write_parquet(path, chunks, catalog=DEFAULT_CATALOG) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Für Parquet-Export wird 'pyarrow' benötigt.") from exc
+
+    written, writer = 0, None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk_to_frame(chunk, catalog, written), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def write_store(store: CohortStore, chunks) -> int:
+    written = 0
+    codes = None
+    for chunk in chunks:
+        if codes is None:
+            codes = np.array([store.unit_code(u) for u in chunk.unit_names], dtype=np.uint16)
+        unit = codes[chunk.units]
+        chunk.rows[:, store.layout.unit] = unit & 0xFF
+        chunk.rows[:, store.layout.unit + 1] = unit >> 8
+        created = time.time()
+        metas = [
+            {"id": uuid.uuid4().hex, "name": f"Synthetic {written + i}", "created": created}
+            for i in range(len(chunk))
+        ]
+        store.append_rows(chunk.rows, metas)
+        written += len(chunk)
+    return written
+
+
+def parse_mix(text: str) -> dict:
+    """'Architecture Firefighters=0.3,Emerging EA Engine=0.7' -> dict."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.rpartition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Erzeugt synthetische EAM-Assessments.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Anzahl Assessments")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Assessments je Chunk")
+    parser.add_argument("--seed", type=int, default=None, help="Seed für reproduzierbare Daten")
+    parser.add_argument("--mix", type=parse_mix, help="Archetyp-Anteile, z.B. 'Emerging EA Engine=0.5,...'")
+    parser.add_argument("--units", type=int, default=25, help="Anzahl Business Units")
+    parser.add_argument("--rules", type=Path, help="Regeltabelle als JSON, nach der die Archetypen gelten")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", type=Path, help="Zieldatei (.csv oder .parquet)")
+    target.add_argument("--store", type=Path, help="Verzeichnis eines Kohortenspeichers")
+    args = parser.parse_args(argv)
+
+    rules = compile_rules(load_rules(args.rules)) if args.rules else None
+    generator = SyntheticAssessmentGenerator(args.seed, archetype_mix=args.mix, n_units=args.units, rules=rules)
+    chunks = generator.iter_chunks(args.rows, args.chunk_size)
+
+    t0 = time.perf_counter()
+    if args.store:
+        written = write_store(CohortStore(args.store), chunks)
+    elif args.out.suffix == ".parquet":
+        written = write_parquet(args.out, chunks)
+    else:
+        written = write_csv(args.out, chunks)
+    elapsed = time.perf_counter() - t0
+    print(f"{written:,} Assessments in {elapsed:.1f} s ({written / max(elapsed, 1e-9):,.0f} Zeilen/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
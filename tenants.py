@@ -0,0 +1,298 @@
+"""
+Mandanten: mehrere Organisationen auf einem Deployment.
+
+Jeder Mandant hat ein eigenes Verzeichnis unter `EAM_TENANTS_DIR`
+(Standard: `tenants/`):
+
+    tenants/<id>/tenant.json     Name, Branding, Zugang (siehe unten)
+    tenants/<id>/catalog.json    optional: eigener Fragenkatalog
+    tenants/<id>/rules.json      eigene Bewertungsregeln (Pflicht, wenn die
+                                 Standardregeln den Katalog nicht abdecken)
+    tenants/<id>/data/           Kohortenspeicher, Entwürfe, Ereignisprotokoll
+
+Beispiel `tenant.json`:
+
+    {
+      "name": "Beispiel AG",
+      "title": "EAM Assessment – Beispiel AG",
+      "page_icon": "🏭",
+      "logo": "logo.png",
+      "theme": {"primaryColor": "#E30613", "backgroundColor": "#FFFFFF",
+                "secondaryBackgroundColor": "#F3F4F6", "textColor": "#111827"},
+      "access": {"email_domains": ["beispiel.de"], "code_sha256": "<sha256 des Zugangscodes>"}
+    }
+
+`theme` verwendet die Schlüssel aus `[theme]` in `config.toml`; fehlende
+Werte erben vom globalen Theme. `catalog.json` enthält
+`{"dimensions": [...], "core_dim_ids": [...], "data_erp_dim_ids": [...]}` im
+Aufbau von `eam_catalog.DIMENSIONS`. Ohne Verzeichnis `tenants/default`
+verhält sich der Standard-Mandant wie bisher (Katalog und Datenpfade aus
+`eam_catalog` bzw. den `EAM_*_DIR`-Variablen).
+"""
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from benchmarks import BenchmarkSketches
+from cohort_cube import CohortCube
+from cohort_index import CohortIndex
+from cohort_points import CohortPoints
+from cohort_store import CohortStore
+from drafts import DraftStore
+from eam_catalog import DEFAULT_CATALOG, compile_catalog
+from event_log import EventLog
+from scoring_rules import compile_rules, load_rules
+
+APP_DIR = Path(__file__).parent
+TENANTS_DIR = Path(os.environ.get("EAM_TENANTS_DIR", APP_DIR / "tenants"))
+DEFAULT_TENANT = os.environ.get("EAM_DEFAULT_TENANT", "default")
+
+_TENANT_ID = re.compile(r"[a-z0-9][a-z0-9_-]{0,62}")
+
+
+@dataclass(frozen=True)
+class Tenant:
+    id: str
+    catalog: object = DEFAULT_CATALOG
+    name: str = ""
+    title: str = "EAM Maturity Assessment"
+    page_icon: str = "🧱"
+    heading: str = "🧱 EAM Maturity Assessment – Prototyp"
+    logo: Path = None
+    theme: dict = field(default_factory=dict)
+    rules: dict = None
+    email_domains: tuple = ()
+    access_code_sha256: str = None
+    store_dir: Path = None
+    drafts_dir: Path = None
+    events_dir: Path = None
+
+    @property
+    def requires_access(self) -> bool:
+        return bool(self.email_domains or self.access_code_sha256)
+
+    def check_code(self, code: str) -> bool:
+        if not self.access_code_sha256:
+            return False
+        digest = hashlib.sha256((code or "").encode("utf-8")).hexdigest()
+        return hmac.compare_digest(digest, self.access_code_sha256.lower())
+
+    def matches_email(self, email: str) -> bool:
+        domain = (email or "").rpartition("@")[2].casefold()
+        return bool(domain) and domain in self.email_domains
+
+
+def is_valid_id(tenant_id) -> bool:
+    return isinstance(tenant_id, str) and _TENANT_ID.fullmatch(tenant_id) is not None
+
+
+def tenant_ids(root=TENANTS_DIR) -> list:
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if is_valid_id(p.name) and (p / "tenant.json").exists())
+
+
+def default_tenant() -> Tenant:
+    """Eingebauter Standard-Mandant (Einzelbetrieb, Pfade wie vor der Mandantenfähigkeit)."""
+    data = APP_DIR / "data"
+    rules_file = os.environ.get("EAM_RULES_FILE")  # Aufbau wie scoring_rules.DEFAULT_RULES
+    return Tenant(
+        id=DEFAULT_TENANT,
+        rules=load_rules(rules_file) if rules_file else None,
+        store_dir=Path(os.environ.get("EAM_STORE_DIR", data / "cohort")),
+        drafts_dir=Path(os.environ.get("EAM_DRAFTS_DIR", data / "drafts")),
+        events_dir=Path(os.environ.get("EAM_EVENTS_DIR", data / "events")),
+    )
+
+
+def load_tenant(tenant_id: str, root=TENANTS_DIR) -> Tenant:
+    """Liest die Konfiguration eines Mandanten und kompiliert seinen Katalog.
+
+    Wirft `KeyError` für unbekannte Mandanten und `ValueError` bei ungültiger
+    Konfiguration (z.B. Regeln, die Dimensionen des Katalogs nicht kennen).
+    """
+    if not is_valid_id(tenant_id):
+        raise KeyError(tenant_id)
+    path = Path(root) / tenant_id
+    if not (path / "tenant.json").exists():
+        if tenant_id == DEFAULT_TENANT:
+            return default_tenant()
+        raise KeyError(tenant_id)
+
+    config = json.loads((path / "tenant.json").read_text(encoding="utf-8"))
+    catalog = DEFAULT_CATALOG
+    if (path / "catalog.json").exists():
+        spec = json.loads((path / "catalog.json").read_text(encoding="utf-8"))
+        catalog = compile_catalog(spec["dimensions"], spec.get("core_dim_ids"), spec.get("data_erp_dim_ids"))
+    rules = None
+    if (path / "rules.json").exists():
+        rules = load_rules(path / "rules.json")
+    try:
+        compile_rules(rules, catalog)  # früh scheitern, nicht erst bei der ersten Auswertung
+    except ValueError as exc:
+        hint = (
+            " Die Standardregeln beziehen sich auf die Dimensionen des Standardkatalogs – "
+            "zu einer eigenen catalog.json gehört eine passende rules.json."
+            if rules is None else ""
+        )
+        raise ValueError(f"Regeln von Mandant '{tenant_id}' passen nicht zum Katalog: {exc}.{hint}") from exc
+
+    data = Path(config.get("data_dir") or path / "data")
+    access = config.get("access", {})
+    title = config.get("title", Tenant.title)
+    page_icon = config.get("page_icon", Tenant.page_icon)
+    return Tenant(
+        id=tenant_id,
+        catalog=catalog,
+        name=config.get("name", tenant_id),
+        title=title,
+        page_icon=page_icon,
+        heading=config.get("heading", f"{page_icon} {title}"),
+        logo=path / config["logo"] if config.get("logo") else None,
+        theme=dict(config.get("theme", {})),
+        rules=rules,
+        email_domains=tuple(d.casefold() for d in access.get("email_domains", [])),
+        access_code_sha256=access.get("code_sha256"),
+        store_dir=data / "cohort",
+        drafts_dir=data / "drafts",
+        events_dir=data / "events",
+    )
+
+
+def email_domains(root=TENANTS_DIR) -> dict:
+    """E-Mail-Domain -> Mandant über alle konfigurierten Mandanten."""
+    domains = {}
+    for tenant_id in tenant_ids(root):
+        config = json.loads((Path(root) / tenant_id / "tenant.json").read_text(encoding="utf-8"))
+        for domain in config.get("access", {}).get("email_domains", []):
+            domains.setdefault(domain.casefold(), tenant_id)
+    return domains
+
+
+class TenantWorkspace:
+    """Alle Ressourcen eines Mandanten; geöffnet erst beim ersten Zugriff.
+
+    Je Mandant gibt es höchstens einen offenen Arbeitsbereich im Prozess
+    (`acquire`), sonst schrieben zwei `CohortStore`-Instanzen in dieselben
+    Dateien. Jeder Halter (Cache-Eintrag, Session) zählt als Referenz;
+    geschlossen wird erst mit der letzten `release`.
+    """
+
+    SEGMENT_CUBES = 16
+    _open = {}
+    _open_lock = threading.Lock()
+
+    def __init__(self, tenant: Tenant):
+        self.tenant = tenant
+        self._lock = threading.RLock()
+        self._resources = {}
+        self._segment_cubes = OrderedDict()
+        self._refs = 0
+
+    @classmethod
+    def acquire(cls, tenant: Tenant) -> "TenantWorkspace":
+        """Offener Arbeitsbereich des Mandanten (neu oder bestehend) mit einer weiteren Referenz."""
+        with cls._open_lock:
+            workspace = cls._open.get(tenant.id)
+            if workspace is None:
+                workspace = cls._open[tenant.id] = cls(tenant)
+            workspace._refs += 1
+            return workspace
+
+    def retain(self) -> bool:
+        """Weitere Referenz auf einen offenen Arbeitsbereich; `False`, wenn er bereits geschlossen ist."""
+        with self._open_lock:
+            if self._open.get(self.tenant.id) is not self:
+                return False
+            self._refs += 1
+            return True
+
+    def release(self):
+        """Gibt eine Referenz zurück; die letzte schließt den Arbeitsbereich."""
+        with self._open_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            if self._open.get(self.tenant.id) is self:
+                del self._open[self.tenant.id]
+        self.close()
+
+    def _get(self, name, factory):
+        with self._lock:
+            if name not in self._resources:
+                self._resources[name] = factory()
+            return self._resources[name]
+
+    @property
+    def store(self) -> CohortStore:
+        return self._get("store", lambda: CohortStore(self.tenant.store_dir, self.tenant.catalog))
+
+    @property
+    def benchmarks(self) -> BenchmarkSketches:
+        return self._get("benchmarks", lambda: BenchmarkSketches.attach(self.store))
+
+    @property
+    def cube(self) -> CohortCube:
+        return self._get("cube", lambda: CohortCube.attach(self.store))
+
+    @property
+    def index(self) -> CohortIndex:
+        return self._get("index", lambda: CohortIndex.attach(self.store, self.rules))
+
+    @property
+    def points(self) -> CohortPoints:
+        return self._get("points", lambda: CohortPoints.attach(self.store, self.rules))
+
+    @property
+    def drafts(self) -> DraftStore:
+        return self._get("drafts", lambda: DraftStore(self.tenant.drafts_dir))
+
+    @property
+    def events(self) -> EventLog:
+        return self._get("events", lambda: EventLog(self.tenant.events_dir, self.tenant.catalog))
+
+    @property
+    def rules(self):
+        return self._get("rules", lambda: compile_rules(self.tenant.rules, self.tenant.catalog))
+
+    def segment_cube(self, segment) -> CohortCube:
+        """Portfolio-Würfel eines Segment-Filters; die letzten `SEGMENT_CUBES` Filter bleiben angehängt (LRU)."""
+        with self._lock:
+            cube = self._segment_cubes.get(segment)
+            if cube is not None:
+                self._segment_cubes.move_to_end(segment)
+                return cube
+        # Aufbau außerhalb der Sperre: liest die Zeilen des Segments einmal
+        built = CohortCube.attach_segment(self.store, self.index, segment)
+        with self._lock:
+            cube = self._segment_cubes.setdefault(segment, built)
+            evicted = []
+            while len(self._segment_cubes) > self.SEGMENT_CUBES:
+                evicted.append(self._segment_cubes.popitem(last=False)[1])
+        if cube is not built:
+            evicted.append(built)
+        for stale in evicted:
+            stale.close()
+        return cube
+
+    def close(self):
+        """Schreibt ausstehende Entwürfe, Ereignisse und Aggregate und gibt die Ressourcen frei."""
+        with self._lock:
+            resources, self._resources = self._resources, {}
+            segment_cubes, self._segment_cubes = list(self._segment_cubes.values()), OrderedDict()
+        for cube in segment_cubes:
+            cube.close()
+        for name in ("drafts", "events", "benchmarks", "cube"):
+            if name in resources:
+                resources[name].close()
+        store = resources.get("store")
+        for name in ("index", "points"):
+            if store is not None and name in resources:
+                store.unsubscribe(resources[name]._on_store_change)
@@ -0,0 +1,60 @@
+"""Gemeinsame Helfer der Tests; die Module der App liegen flach im Repository-Wurzelverzeichnis."""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from eam_catalog import DEFAULT_CATALOG, TIME_HORIZONS  # noqa: E402
+
+
+def assessment(level: int = 3, target: int = 4, participant: str = "Finance", catalog=DEFAULT_CATALOG) -> dict:
+    """Formularfelder eines Assessments mit einheitlicher Bewertung (Keyword-Argumente für `append`/`record`)."""
+    return dict(
+        scores={d["name"]: [level] * len(d["questions"]) for d in catalog.dimensions},
+        target_scores={name: target for name in catalog.dim_names},
+        goals=(),
+        pains=(),
+        time_horizon=TIME_HORIZONS[1],
+        participant=participant,
+    )
+
+
+@pytest.fixture
+def make_assessment():
+    return assessment
+
+
+@pytest.fixture
+def append_during(monkeypatch):
+    """Lässt direkt nach dem ersten Aufruf von `owner.name(...)` einen zweiten Thread ein Assessment anhängen.
+
+    Prüft, dass Aufbau und `subscribe` eines Aggregats keine Einreichung
+    dazwischen verlieren. Gibt eine Funktion zurück, die auf den Thread wartet.
+    """
+    def patch(owner, name, store):
+        original = getattr(owner, name)
+        threads = []
+
+        def racing(*args, **kwargs):
+            result = original(*args, **kwargs)
+            if threads:
+                return result
+            thread = threading.Thread(target=store.append, kwargs={"name": "parallel", **assessment(level=5)})
+            thread.start()
+            thread.join(0.2)  # ohne Store-Sperre ist der Thread hier längst fertig
+            threads.append(thread)
+            return result
+
+        monkeypatch.setattr(owner, name, staticmethod(racing))
+
+        def join():
+            for thread in threads:
+                thread.join()
+            return len(threads)
+
+        return join
+
+    return patch
@@ -0,0 +1,63 @@
+"""Perzentil-Benchmarks: exakte Ränge, Merge, inkrementell am Store."""
+import numpy as np
+import pytest
+
+from benchmarks import OVERALL, BenchmarkSketches
+from cohort_store import CohortStore, overall_scores
+from synthetic_data import SyntheticAssessmentGenerator
+
+
+@pytest.fixture
+def rows():
+    return SyntheticAssessmentGenerator(seed=5).generate(3000).rows
+
+
+def test_percentile_rank_matches_raw_scores(rows):
+    sketches = BenchmarkSketches()
+    sketches.update(rows)
+    assert sketches.exact
+    scores = np.sort(overall_scores(rows, sketches.catalog))
+    for score in np.unique(scores)[::7].tolist() + [0.5, 5.5]:
+        below = np.searchsorted(scores, score, side="left")
+        equal = np.searchsorted(scores, score, side="right") - below
+        expected = 100.0 * (below + 0.5 * equal) / len(scores)
+        assert sketches.percentile_rank(score) == pytest.approx(expected)
+
+
+def test_merge_equals_single_pass(rows):
+    whole, first, second = BenchmarkSketches(), BenchmarkSketches(), BenchmarkSketches()
+    whole.update(rows)
+    first.update(rows[:1000])
+    second.update(rows[1000:])
+    merged = first.merge(second)
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    assert merged.percentile_rank(3.0, "strategy") == whole.percentile_rank(3.0, "strategy")
+
+
+def test_attached_sketches_follow_edits_and_deletes(tmp_path, make_assessment):
+    store = CohortStore(tmp_path / "store")
+    ids = [store.append(name=f"A{i}", **make_assessment(level=1 + i % 5)) for i in range(20)]
+    sketches = BenchmarkSketches.attach(store)
+    assert sketches.percentile_rank(3.0) is not None
+
+    store.delete(ids[0])
+    store.update(ids[1], **make_assessment(level=5))
+    assert sketches.count() == 19
+    np.testing.assert_array_equal(sketches.counts, BenchmarkSketches.from_store(store).counts)
+    sketches.close()
+
+    reopened = BenchmarkSketches.attach(store)
+    assert reopened.fingerprint == store.fingerprint
+    np.testing.assert_array_equal(reopened.counts, sketches.counts)
+    reopened.close()
+
+
+def test_attach_misses_no_concurrent_submission(tmp_path, make_assessment, append_during):
+    store = CohortStore(tmp_path / "store")
+    for i in range(10):
+        store.append(name=f"A{i}", **make_assessment())
+    join = append_during(BenchmarkSketches, "from_store", store)
+    sketches = BenchmarkSketches.attach(store)
+    assert join() == 1
+    assert sketches.count(OVERALL) == len(store) == 11
+    sketches.close()
@@ -0,0 +1,69 @@
+"""Portfolio-Würfel eines Segment-Filters: inkrementell gleich Neuaufbau aus dem Segment."""
+import numpy as np
+
+from cohort_cube import CohortCube
+from cohort_index import CohortIndex, facets
+from cohort_store import CohortStore
+from eam_catalog import BUSINESS_GOALS, TIME_HORIZONS
+from scoring_rules import compile_rules
+
+
+def test_segment_cube_follows_submissions_edits_and_deletes(tmp_path, make_assessment):
+    store = CohortStore(tmp_path / "store")
+    index = CohortIndex.attach(store, compile_rules(catalog=store.catalog))
+
+    def submit(i):
+        fields = make_assessment(level=1 + i % 5, participant=f"Bereich {i % 3}")
+        fields.update(goals=BUSINESS_GOALS[: 1 + i % 2], time_horizon=TIME_HORIZONS[i % 2])
+        return store.append(name=f"A{i}", **fields)
+
+    ids = [submit(i) for i in range(30)]
+    segment = facets({"goal": [BUSINESS_GOALS[1]], "unit": ["Bereich 1", "Bereich 2"]})
+    cube = CohortCube.attach_segment(store, index, segment)
+
+    ids += [submit(i) for i in range(30, 60)]
+    for assessment_id in ids[::4]:
+        store.update(assessment_id, name="geändert", **make_assessment(level=5, participant="Bereich 2"))
+    for assessment_id in ids[1::7]:
+        store.delete(assessment_id)
+
+    fresh = CohortCube.from_store(store, index.positions(segment))
+    assert cube.total() == fresh.total() == index.count(segment) > 0
+    np.testing.assert_array_equal(cube.counts, fresh.counts)
+    np.testing.assert_array_equal(cube.unit_counts[: len(fresh.unit_counts)], fresh.unit_counts)
+
+    cube.close()
+    submit(60)
+    assert cube.total() == fresh.total()
+
+
+def test_attach_misses_no_concurrent_submission(tmp_path, make_assessment, append_during):
+    store = CohortStore(tmp_path / "store")
+    ids = [store.append(name=f"A{i}", **make_assessment()) for i in range(10)]
+    CohortCube.attach(store).close()
+    store.update(ids[0], **make_assessment(level=2))  # gespeicherter Würfel ist veraltet
+
+    join = append_during(CohortCube, "from_store", store)
+    cube = CohortCube.attach(store)
+    assert join() == 1
+    assert cube.total() == len(store) == 11
+    cube.close()
+
+    reopened = CohortCube.attach(store)
+    np.testing.assert_array_equal(reopened.counts, CohortCube.from_store(store).counts)
+    reopened.close()
+
+
+def test_attach_segment_misses_no_concurrent_submission(tmp_path, make_assessment, append_during):
+    store = CohortStore(tmp_path / "store")
+    for i in range(10):
+        store.append(name=f"A{i}", **make_assessment(participant=("Finance", "IT")[i % 2]))
+    index = CohortIndex.attach(store, compile_rules(catalog=store.catalog))
+    segment = facets({"unit": ["Finance"]})
+
+    join = append_during(CohortCube, "from_store", store)  # hängt ein Finance-Assessment an
+    cube = CohortCube.attach_segment(store, index, segment)
+    assert join() == 1
+    assert cube.total() == index.count(segment) == 6
+    np.testing.assert_array_equal(cube.counts, CohortCube.from_store(store, index.positions(segment)).counts)
+    cube.close()
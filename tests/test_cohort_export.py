@@ -0,0 +1,93 @@
+"""Kohorten-Export: Formate, Filter, gelöschte Assessments und veraltete Auswahl."""
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cohort_export import FORMATS, iter_export, select_rows
+from cohort_index import CohortIndex, facets
+from cohort_store import CohortStore
+from scoring_rules import compile_rules
+
+
+@pytest.fixture
+def store(tmp_path, make_assessment):
+    store = CohortStore(tmp_path / "store")
+    for i in range(9):
+        store.append(name=f"A{i}", **make_assessment(level=1 + i % 5, participant=f"Bereich {i % 3}"))
+    return store
+
+
+def ids(store, positions) -> list:
+    metas = list(store.iter_meta())
+    return [metas[p]["id"] for p in positions]
+
+
+def read(data: bytes, fmt: str) -> pd.DataFrame:
+    if fmt == "csv":
+        return pd.read_csv(io.BytesIO(data))
+    if fmt == "jsonl":
+        return pd.DataFrame([json.loads(line) for line in data.decode("utf-8").splitlines()])
+    return pd.read_parquet(io.BytesIO(data))
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_formats_round_trip_without_deleted(store, fmt):
+    deleted = ids(store, [0, 4])
+    for assessment_id in deleted:
+        store.delete(assessment_id)
+    stats = {}
+    data = b"".join(iter_export(store, fmt, stats=stats, chunk_assessments=2))
+    frame = read(data, fmt)
+
+    nq = store.catalog.n_questions
+    assert len(frame) == stats["rows"] == 7 * nq
+    assert stats["bytes"] == len(data)
+    assert set(frame["assessment_id"]) == set(ids(store, np.flatnonzero(store.active_mask())))
+    assert not set(frame["assessment_id"]) & set(deleted)
+    first = frame[frame["assessment_id"] == ids(store, [1])[0]]
+    assert first["Bewertung"].tolist() == [2] * nq
+    assert first["Teilnehmer / Bereich"].iloc[0] == "Bereich 1"
+
+
+def test_empty_csv_export_has_header(tmp_path):
+    data = b"".join(iter_export(CohortStore(tmp_path / "leer"), "csv"))
+    assert data.decode("utf-8").strip().split(",")[0] == "assessment_id"
+
+
+def test_filter_from_index(store):
+    index = CohortIndex.from_store(store, compile_rules(catalog=store.catalog))
+    store.delete(ids(store, [2])[0])
+    mask = index.mask(facets({"unit": ["Bereich 2"]}), len(store))
+    frame = read(b"".join(iter_export(store, "csv", mask)), "csv")
+    assert sorted(set(frame["assessment_id"])) == sorted(ids(store, [5, 8]))
+
+
+def test_select_rows(store):
+    store.delete(ids(store, [3])[0])
+    np.testing.assert_array_equal(select_rows(store), [0, 1, 2, 4, 5, 6, 7, 8])
+    np.testing.assert_array_equal(select_rows(store, np.array([1, 3, 5])), [1, 5])
+    mask = np.zeros(len(store), dtype=bool)
+    mask[[3, 4]] = True
+    np.testing.assert_array_equal(select_rows(store, mask), [4])
+
+
+def test_stale_mask_is_rejected(store, make_assessment):
+    stale = np.ones(1, dtype=bool)
+    with pytest.raises(ValueError, match="Maske"):
+        select_rows(store, stale)
+    mask = np.ones(len(store), dtype=bool)
+    store.append(name="neu", **make_assessment())
+    with pytest.raises(ValueError, match="Maske"):
+        b"".join(iter_export(store, "csv", mask))
+
+
+def test_compaction_during_export_aborts(store):
+    store.delete(ids(store, [8])[0])
+    chunks = iter_export(store, "csv", chunk_assessments=2, generation=store.generation)
+    next(chunks)
+    store.compact()
+    with pytest.raises(RuntimeError, match="kompaktiert"):
+        list(chunks)
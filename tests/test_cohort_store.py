@@ -0,0 +1,162 @@
+"""Kohortenspeicher: Manifest als Commit-Punkt, Prüfsumme, Offset-Index und Kompaktierung."""
+import json
+
+import numpy as np
+import pytest
+
+from cohort_store import CohortStore
+
+
+@pytest.fixture
+def store(tmp_path, make_assessment):
+    store = CohortStore(tmp_path / "store")
+    for i in range(12):
+        store.append(name=f"A{i}", **make_assessment(level=1 + i % 5, participant=f"Bereich {i % 4}"))
+    return store
+
+
+def snapshot(store) -> dict:
+    """Assessment-ID -> (Zeile, Metadaten) aller aktiven Assessments."""
+    active = store.active_mask()
+    return {
+        meta["id"]: (bytes(np.asarray(store.matrix()[row])), meta)
+        for row, meta in enumerate(store.iter_meta())
+        if active[row]
+    }
+
+
+def test_reopen_round_trip(store, tmp_path):
+    before = snapshot(store)
+    reopened = CohortStore(tmp_path / "store")
+    assert snapshot(reopened) == before
+    assert reopened.fingerprint == store.fingerprint
+    assert reopened.verify() == []
+    for assessment_id, (_, meta) in before.items():
+        assert reopened.meta(reopened.row_of(assessment_id)) == meta
+
+
+def test_verify_detects_corrupted_data(store, tmp_path):
+    path = store._file("data")
+    data = bytearray(path.read_bytes())
+    data[5] = 4 if data[5] != 4 else 2  # gültiger Wert, aber falsche Prüfsumme
+    path.write_bytes(bytes(data))
+    problems = CohortStore(tmp_path / "store").verify()
+    assert any("CRC32" in p for p in problems)
+
+
+def test_uncommitted_append_is_truncated(store, tmp_path, make_assessment):
+    """Absturz nach dem Schreiben der Dateien, aber vor dem Manifest: der Stand davor gilt."""
+    before = snapshot(store)
+    manifest = (tmp_path / "store" / CohortStore.MANIFEST).read_bytes()
+    store.append(name="nicht committet", **make_assessment())
+    (tmp_path / "store" / CohortStore.MANIFEST).write_bytes(manifest)
+
+    reopened = CohortStore(tmp_path / "store")
+    assert snapshot(reopened) == before
+    assert reopened.verify() == []
+
+
+def test_rename_keeps_position(store, make_assessment):
+    assessment_id = next(iter(snapshot(store)))
+    row = store.row_of(assessment_id)
+    store.update(assessment_id, name="umbenannt", **make_assessment(level=5))
+    assert store.row_of(assessment_id) == row
+    assert store.get(assessment_id)["name"] == "umbenannt"
+    assert [m["name"] for m in store.iter_meta()][row] == "umbenannt"
+    assert store.verify() == []
+
+
+def test_compact_preserves_id_to_row(store, tmp_path, make_assessment):
+    ids = list(snapshot(store))
+    store.update(ids[2], name="umbenannt", **make_assessment(level=2))
+    for assessment_id in ids[::3]:
+        store.delete(assessment_id)
+    before = snapshot(store)
+
+    assert store.compact() == len(ids[::3])
+    assert store.generation == 1
+    assert len(store) == len(before)
+    assert snapshot(store) == before
+    for assessment_id, (row_bytes, meta) in before.items():
+        row = store.row_of(assessment_id)
+        assert bytes(np.asarray(store.matrix()[row])) == row_bytes
+        assert store.meta(row) == meta
+    for assessment_id in ids[::3]:
+        with pytest.raises(KeyError):
+            store.row_of(assessment_id)
+    assert store.verify() == []
+
+    reopened = CohortStore(tmp_path / "store")
+    assert snapshot(reopened) == before
+    assert sorted(p.name for p in (tmp_path / "store").iterdir() if p.name.startswith("responses")) == [
+        "responses-1.bin"
+    ]
+
+
+def test_crash_during_compact_keeps_old_generation(store, tmp_path):
+    """Neue Generation geschrieben, Manifest aber noch nicht umgeschaltet."""
+    ids = list(snapshot(store))
+    store.delete(ids[0])
+    before = snapshot(store)
+    path = tmp_path / "store"
+    manifest = json.loads((path / CohortStore.MANIFEST).read_text(encoding="utf-8"))
+    old_files = {name: (path / name).read_bytes() for name in manifest["files"].values()}
+
+    store.compact()
+    # Zustand vor dem Umschalten wiederherstellen: alte Dateien + altes Manifest, neue liegen daneben
+    for name, data in old_files.items():
+        (path / name).write_bytes(data)
+    (path / CohortStore.MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+
+    reopened = CohortStore(path)
+    assert reopened.generation == 0
+    assert snapshot(reopened) == before
+    assert reopened.verify() == []
+    assert not list(path.glob("*-1.*"))
+
+
+def test_revision_changes_on_rename_and_edit(store, make_assessment):
+    assessment_id = next(iter(snapshot(store)))
+    fields = store.get(assessment_id)
+    unchanged = make_assessment(level=fields["scores"][store.catalog.dim_names[0]][0], participant=fields["participant"])
+    store.update(assessment_id, name=fields["name"], **unchanged)
+    revision, fingerprint = store.revision, store.fingerprint
+
+    store.update(assessment_id, name="umbenannt", **unchanged)
+    assert store.fingerprint == fingerprint  # Zeilen unverändert: Aggregate bleiben gültig
+    assert store.revision != revision
+
+    revision = store.revision
+    store.update(assessment_id, name="umbenannt", **make_assessment(level=5))
+    assert store.revision != revision
+
+
+def test_crash_before_in_place_edit_is_redone_on_open(store, tmp_path, make_assessment, monkeypatch):
+    """Manifest mit `pending` geschrieben, Zeile und Offset aber noch nicht überschrieben."""
+    ids = list(snapshot(store))
+    monkeypatch.setattr(store, "_apply_pending", lambda: None)
+    store.update(ids[1], name="umbenannt", **make_assessment(level=4))
+
+    reopened = CohortStore(tmp_path / "store")
+    assert reopened.verify() == []
+    assert reopened.get(ids[1])["name"] == "umbenannt"
+    assert reopened.get(ids[1])["target_scores"] == make_assessment(level=4)["target_scores"]
+
+    monkeypatch.setattr(reopened, "_apply_pending", lambda: None)
+    reopened.delete(ids[2])
+    reopened = CohortStore(tmp_path / "store")
+    assert reopened.verify() == []
+    assert not reopened.active_mask()[reopened.row_of(ids[2])]
+
+
+def test_edits_keep_block_checksums(tmp_path, make_assessment, monkeypatch):
+    """Änderungen rechnen nur ihren Block neu, die Gegenprobe über die ganze Datei bleibt gleich."""
+    monkeypatch.setattr("cohort_store.CRC_ROWS", 4)
+    store = CohortStore(tmp_path / "store")
+    ids = [store.append(name=f"A{i}", **make_assessment(level=1 + i % 5)) for i in range(11)]
+    store._block_crcs = lambda: pytest.fail("Edit liest die ganze Datei")
+    store.update(ids[5], name="umbenannt", **make_assessment(level=5))
+    store.delete(ids[9])
+    del store._block_crcs
+    assert len(store._manifest["crc32"]) == 3
+    assert store.verify() == []
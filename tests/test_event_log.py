@@ -0,0 +1,135 @@
+"""Ereignisprotokoll: Frames, Wiederherstellung nach Abbruch und Replay."""
+import uuid
+
+import numpy as np
+import pytest
+
+from cohort_store import CohortStore, encode_assessment
+from eam_catalog import DEFAULT_CATALOG
+from event_log import DELETE, EDIT, SUBMIT, EventLog, _HEADER
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    return tmp_path / "events"
+
+
+def open_log(path):
+    # Lange Verzögerung: geschrieben wird nur über flush/close, jeder flush = ein Frame
+    return EventLog(path, delay=60, max_delay=60)
+
+
+def segment(path):
+    (only,) = sorted(path.glob("events-*.log"))
+    return only
+
+
+def test_round_trip(log_dir, make_assessment):
+    ids = [uuid.uuid4().hex for _ in range(3)]
+    log = open_log(log_dir)
+    for i, assessment_id in enumerate(ids):
+        log.record(SUBMIT, assessment_id, name=f"A{i}", **make_assessment(level=i + 1))
+    log.record(EDIT, ids[0], name="A0 neu", **make_assessment(level=5))
+    log.record(DELETE, ids[1])
+    log.close()
+
+    reopened = open_log(log_dir)
+    state = reopened.replay()
+    reopened.close()
+
+    assert state.seq == 5
+    assert state.hex_ids() == [ids[0], ids[2]]
+    assert state.names == ["A0 neu", "A2"]
+    assert state.units == ["", "Finance"]
+    for row, level in zip(state.rows, (5, 3)):
+        fields = make_assessment(level=level)
+        del fields["participant"]
+        np.testing.assert_array_equal(row, encode_assessment(DEFAULT_CATALOG, **fields, unit_code=1))
+
+
+def test_truncated_last_frame_is_dropped(log_dir, make_assessment):
+    log = open_log(log_dir)
+    first = uuid.uuid4().hex
+    log.record(SUBMIT, first, name="vollständig", **make_assessment())
+    log.flush()
+    complete = segment(log_dir).stat().st_size
+    log.record(SUBMIT, uuid.uuid4().hex, name="abgebrochen", **make_assessment())
+    log.close()
+
+    # Absturz mitten im Schreiben des zweiten Frames
+    path = segment(log_dir)
+    with open(path, "r+b") as f:
+        f.truncate(complete + _HEADER.size + 10)
+
+    reopened = open_log(log_dir)
+    assert path.stat().st_size == complete
+    assert reopened.replay().hex_ids() == [first]
+    # Die Sequenz setzt hinter dem letzten gültigen Frame fort
+    assert reopened.record(SUBMIT, uuid.uuid4().hex, **make_assessment()) == 2
+    reopened.close()
+    assert len(open_log(log_dir).replay()) == 2
+
+
+def test_corrupted_crc_drops_frame(log_dir, make_assessment):
+    log = open_log(log_dir)
+    first = uuid.uuid4().hex
+    log.record(SUBMIT, first, name="gut", **make_assessment())
+    log.flush()
+    complete = segment(log_dir).stat().st_size
+    log.record(SUBMIT, uuid.uuid4().hex, name="kaputt", **make_assessment())
+    log.close()
+
+    path = segment(log_dir)
+    data = bytearray(path.read_bytes())
+    data[complete + _HEADER.size + 20] ^= 0xFF  # ein Byte im Rumpf des zweiten Frames
+    path.write_bytes(bytes(data))
+
+    reopened = open_log(log_dir)
+    assert reopened.replay().hex_ids() == [first]
+    assert path.stat().st_size == complete
+    reopened.close()
+
+
+def test_replay_equals_store_state(tmp_path, log_dir, make_assessment):
+    """Dieselben Einreichungen in Store und Protokoll – Replay liefert den Stand des Stores."""
+    store = CohortStore(tmp_path / "store")
+    log = open_log(log_dir)
+    ids = []
+    for i in range(20):
+        fields = make_assessment(level=1 + i % 5, participant=f"Bereich {i % 3}")
+        assessment_id = store.append(name=f"A{i}", **fields)
+        log.record(SUBMIT, assessment_id, name=f"A{i}", **fields)
+        ids.append(assessment_id)
+    for assessment_id in ids[::4]:
+        fields = make_assessment(level=5, target=5, participant="Bereich 9")
+        store.update(assessment_id, name="geändert", **fields)
+        log.record(EDIT, assessment_id, name="geändert", **fields)
+    for assessment_id in ids[1::5]:
+        store.delete(assessment_id)
+        log.record(DELETE, assessment_id)
+
+    state = log.replay()
+    replayed = state.to_store(tmp_path / "replayed")
+    log.close()
+
+    store.compact()
+    np.testing.assert_array_equal(np.asarray(replayed.matrix()), np.asarray(store.matrix()))
+    assert [m["id"] for m in replayed.iter_meta()] == [m["id"] for m in store.iter_meta()]
+    assert [m["name"] for m in replayed.iter_meta()] == [m["name"] for m in store.iter_meta()]
+    assert replayed.units == store.units
+
+
+def test_snapshot_replay_matches_full_replay(log_dir, make_assessment):
+    log = open_log(log_dir)
+    ids = [uuid.uuid4().hex for _ in range(10)]
+    for assessment_id in ids:
+        log.record(SUBMIT, assessment_id, **make_assessment())
+    log.compact()
+    log.record(EDIT, ids[3], name="nach Snapshot", **make_assessment(level=2))
+    log.record(DELETE, ids[7])
+
+    from_snapshot, full = log.replay(), log.replay(use_snapshot=False)
+    log.close()
+    assert from_snapshot.hex_ids() == full.hex_ids()
+    np.testing.assert_array_equal(from_snapshot.rows, full.rows)
+    assert from_snapshot.names == full.names
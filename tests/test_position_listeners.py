@@ -0,0 +1,80 @@
+"""Bitmap-Index und Punktwolke: inkrementeller Stand gleich Neuaufbau, auch nach Kompaktierung."""
+import numpy as np
+import pytest
+
+from cohort_index import CohortIndex
+from cohort_points import CohortPoints
+from cohort_store import CohortStore, encode_assessment
+from scoring_rules import compile_rules
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CohortStore(tmp_path / "store")
+
+
+def fill(store, make_assessment, n, batch=1000):
+    ids = []
+    for begin in range(0, n, batch):
+        rows = []
+        for i in range(begin, min(begin + batch, n)):
+            fields = make_assessment(level=1 + i % 5)
+            unit = store.unit_code(f"Bereich {i % 7}")
+            del fields["participant"]
+            rows.append(encode_assessment(store.catalog, **fields, unit_code=unit))
+        ids += store.append_rows(np.array(rows))
+    return ids
+
+
+def assert_same_index(index, fresh):
+    assert index.n_rows == fresh.n_rows
+    assert index.counts("unit") == fresh.counts("unit")
+    for attribute in ("archetype", "level", "horizon"):
+        assert index.counts(attribute) == fresh.counts(attribute)
+    np.testing.assert_array_equal(index.mask(None), fresh.mask(None))
+
+
+def assert_same_points(points, fresh):
+    positions = fresh.select()
+    np.testing.assert_array_equal(points.select(), positions)
+    np.testing.assert_array_equal(points.values("overall", positions), fresh.values("overall", positions))
+    np.testing.assert_array_equal(points.archetype[positions], fresh.archetype[positions])
+
+
+def test_incremental_matches_rebuild_across_growth_and_compaction(store, make_assessment):
+    rules = compile_rules(catalog=store.catalog)
+    index, points = CohortIndex.attach(store, rules), CohortPoints.attach(store, rules)
+    ids = fill(store, make_assessment, 5000)  # mehrfaches Wachsen über die Startkapazität
+    for assessment_id in ids[::3]:
+        store.delete(assessment_id)
+    assert_same_index(index, CohortIndex.from_store(store, rules))
+    assert_same_points(points, CohortPoints.from_store(store, rules))
+
+    versions = index.version, points.version
+    store.compact()
+    assert index.version > versions[0] and points.version > versions[1]
+    assert index.count(None) == points.total() == len(store)
+    assert_same_index(index, CohortIndex.from_store(store, rules))
+    assert_same_points(points, CohortPoints.from_store(store, rules))
+
+
+
+@pytest.mark.parametrize(
+    "listener, assert_same", [(CohortIndex, assert_same_index), (CohortPoints, assert_same_points)]
+)
+def test_attach_and_rebuild_miss_no_concurrent_submission(store, make_assessment, append_during, listener, assert_same):
+    rules = compile_rules(catalog=store.catalog)
+    ids = fill(store, make_assessment, 50)
+    join = append_during(listener, "from_store", store)
+    attached = listener.attach(store, rules)
+    assert join() == 1 and len(store) == 51
+    assert_same(attached, listener.from_store(store, rules))
+
+    # Neuaufbau nach einer Kompaktierung: währenddessen kommt wieder eine Einreichung an
+    store.delete(ids[0])
+    version = attached.version
+    store.compact()
+    join = append_during(listener, "from_store", store)
+    assert attached.version > version
+    assert join() == 1 and len(store) == 51
+    assert_same(attached, listener.from_store(store, rules))
@@ -0,0 +1,91 @@
+"""Regeltabelle: Reifegrad-Bänder und Archetypen genau an ihren Schwellen."""
+import numpy as np
+import pytest
+
+from cohort_store import encode_assessment
+from eam_catalog import DEFAULT_CATALOG
+from scoring_rules import OVERALL, compile_rules
+
+RULES = compile_rules()
+ERP = "Komplexe & fragile ERP-Landschaft"
+TTM = "Time-to-Market / Veränderungsgeschwindigkeit"
+
+
+def row(base: float = 3.0, goals=(), pains=(), **dims) -> np.ndarray:
+    """Speicherzeile mit Dimensionsscores `base` bzw. `dims` (Dimension-ID -> Score in Viertelschritten).
+
+    Je Dimension gibt es vier Fragen: Dimensionsscores sind Vielfache von 0,25,
+    der Gesamtscore Vielfache von 1/32 – beides exakt darstellbar.
+    """
+    scores = {}
+    for dim_id, name, size in zip(DEFAULT_CATALOG.dim_ids, DEFAULT_CATALOG.dim_names, DEFAULT_CATALOG.dim_sizes):
+        total = round(dims.get(dim_id, base) * size)
+        scores[name] = [total // size + (i < total % size) for i in range(size)]
+    targets = {name: 4 for name in DEFAULT_CATALOG.dim_names}
+    return encode_assessment(DEFAULT_CATALOG, scores, targets, goals, pains)
+
+
+def classify(*rows) -> dict:
+    return RULES.classify(np.stack(rows))
+
+
+@pytest.mark.parametrize(
+    "fields, overall, level, light",
+    [
+        ({"base": 1.5, "strategy": 1.25}, 1.46875, 1, "🔴"),
+        ({"base": 1.5}, 1.5, 2, "🔴"),
+        ({"base": 2.5, "strategy": 2.25}, 2.46875, 2, "🔴"),
+        ({"base": 2.5}, 2.5, 3, "🟡"),
+        ({"base": 3.5, "strategy": 3.25}, 3.46875, 3, "🟡"),
+        ({"base": 3.5}, 3.5, 4, "🟢"),
+        ({"base": 4.5, "strategy": 4.25}, 4.46875, 4, "🟢"),
+        ({"base": 4.5}, 4.5, 5, "🟢"),
+    ],
+)
+def test_band_edges(fields, overall, level, light):
+    result = classify(row(**fields))
+    assert result[OVERALL][0] == overall
+    assert result["maturity"][0] + 1 == result["cmmi"][0] + 1 == level
+    assert RULES.level("maturity", overall) == level
+    assert RULES.label("maturity", overall).startswith(f"EA Level {level} ")
+    assert RULES.label("traffic_light", overall) == light
+
+
+@pytest.mark.parametrize(
+    "fields, archetype",
+    [
+        # Gesamtscore < 2,3 oder ERP-Pain-Point
+        ({"base": 2.25, "strategy": 2.5}, "Architecture Firefighters"),
+        ({"base": 2.25, "strategy": 2.5, "method": 2.5}, "Emerging EA Engine"),
+        ({"pains": [ERP]}, "Architecture Firefighters"),
+        # Methoden >= 3,2 und Projekte < 3
+        ({"method": 3.25, "projects": 2.75}, "Methoden-stark, aber nicht gelebt"),
+        ({"method": 3.0, "projects": 2.75}, "Emerging EA Engine"),
+        ({"method": 3.25, "projects": 3.0}, "Emerging EA Engine"),
+        # Tooling >= 3,2 und Strategie < 3
+        ({"tooling": 3.25, "strategy": 2.75}, "Data-rich, low mandate"),
+        ({"tooling": 3.0, "strategy": 2.75}, "Emerging EA Engine"),
+        ({"tooling": 3.25, "strategy": 3.0}, "Emerging EA Engine"),
+        # Business Value >= 3,5 und Ziel Time-to-Market
+        ({"value": 3.5, "goals": [TTM]}, "Value-driven Transformer"),
+        ({"value": 3.25, "goals": [TTM]}, "Emerging EA Engine"),
+        ({"value": 3.5}, "Emerging EA Engine"),
+        # Daten & AI mindestens 0,5 über dem Gesamtscore
+        ({"base": 2.5, "strategy": 2.25, "method": 2.25, "data_ai": 3.0}, "Data & AI Ready, aber unterspannt"),
+        ({"base": 2.5, "strategy": 2.25, "data_ai": 3.0}, "Emerging EA Engine"),
+        # Reihenfolge: der erste zutreffende Archetyp gewinnt
+        ({"method": 3.25, "projects": 2.75, "tooling": 3.25, "strategy": 2.75}, "Methoden-stark, aber nicht gelebt"),
+        ({"pains": [ERP], "value": 3.5, "goals": [TTM]}, "Architecture Firefighters"),
+    ],
+)
+def test_archetype_thresholds(fields, archetype):
+    result = classify(row(**fields))
+    assert RULES.archetype_names[result["archetype"][0]] == archetype
+
+
+def test_cohort_matches_single_assessments():
+    rows = [row(base=b, **{d: b + 0.25}) for b in (1.5, 2.25, 3.0, 4.0) for d in ("method", "data_ai", "value")]
+    result = classify(*rows)
+    for i, r in enumerate(rows):
+        single = classify(r)
+        assert {key: values[0] for key, values in single.items()} == {key: values[i] for key, values in result.items()}
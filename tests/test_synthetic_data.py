@@ -0,0 +1,40 @@
+"""Synthetische Daten: reproduzierbar per Seed, Archetyp-Mix laut Bewertungsregeln."""
+import numpy as np
+import pytest
+
+import synthetic_data
+from scoring_rules import compile_rules
+from synthetic_data import DEFAULT_MIX, SyntheticAssessmentGenerator
+
+
+def test_same_seed_same_data():
+    first = SyntheticAssessmentGenerator(seed=7).generate(500)
+    second = SyntheticAssessmentGenerator(seed=7).generate(500)
+    np.testing.assert_array_equal(first.rows, second.rows)
+    np.testing.assert_array_equal(first.archetypes, second.archetypes)
+    np.testing.assert_array_equal(first.units, second.units)
+    assert not np.array_equal(first.rows, SyntheticAssessmentGenerator(seed=8).generate(500).rows)
+
+
+def test_archetypes_follow_rules_and_mix():
+    generator = SyntheticAssessmentGenerator(seed=1)
+    chunk = generator.generate(4000)
+    rules = compile_rules(catalog=generator.catalog)
+
+    classified = np.asarray(rules.archetype_names)[rules.classify(chunk.rows)["archetype"]]
+    np.testing.assert_array_equal(classified, np.asarray(chunk.archetype_names)[chunk.archetypes])
+
+    shares = np.bincount(chunk.archetypes, minlength=len(DEFAULT_MIX)) / len(chunk)
+    np.testing.assert_allclose(shares, list(DEFAULT_MIX.values()), atol=0.03)
+
+
+def test_quota_filled_in_last_round_is_no_error(monkeypatch):
+    monkeypatch.setattr(synthetic_data, "MAX_ROUNDS", 1)
+    chunk = SyntheticAssessmentGenerator(seed=3, archetype_mix={"Emerging EA Engine": 1}).generate(100)
+    assert len(chunk) == 100 and (chunk.archetypes == 0).all()
+
+
+def test_unreachable_mix_raises(monkeypatch):
+    monkeypatch.setattr(synthetic_data, "MAX_ROUNDS", 0)
+    with pytest.raises(ValueError, match="kaum erreichbar"):
+        SyntheticAssessmentGenerator(seed=3).generate(10)
@@ -0,0 +1,53 @@
+"""Mandanten: Konfigurationsprüfung und ein Arbeitsbereich je Mandant mit Referenzzählung."""
+import json
+
+import pytest
+
+from eam_catalog import DIMENSIONS
+from tenants import Tenant, TenantWorkspace, load_tenant
+
+
+def write_tenant(root, tenant_id, catalog=None):
+    path = root / tenant_id
+    path.mkdir(parents=True)
+    (path / "tenant.json").write_text(json.dumps({"name": tenant_id}), encoding="utf-8")
+    if catalog is not None:
+        (path / "catalog.json").write_text(json.dumps(catalog), encoding="utf-8")
+    return path
+
+
+def test_custom_catalog_without_rules_is_rejected_at_load(tmp_path):
+    dims = [{**d, "id": f"x_{d['id']}"} for d in DIMENSIONS]
+    write_tenant(tmp_path, "kunde", {"dimensions": dims})
+    with pytest.raises(ValueError, match="rules.json"):
+        load_tenant("kunde", tmp_path)
+
+
+def test_unknown_tenant_raises_key_error(tmp_path):
+    with pytest.raises(KeyError):
+        load_tenant("fehlt", tmp_path)
+    with pytest.raises(KeyError):
+        load_tenant("../etc", tmp_path)
+
+
+def test_workspace_stays_open_until_last_release(tmp_path, make_assessment):
+    tenant = Tenant(
+        id="ws-test",
+        store_dir=tmp_path / "cohort",
+        drafts_dir=tmp_path / "drafts",
+        events_dir=tmp_path / "events",
+    )
+    cached = TenantWorkspace.acquire(tenant)
+    assert cached.retain()  # Session
+
+    cached.release()  # aus dem Cache verdrängt, Session hält ihn noch
+    reopened = TenantWorkspace.acquire(tenant)
+    assert reopened is cached  # kein zweiter Writer auf denselben Dateien
+    reopened.store.append(name="A", **make_assessment())
+
+    reopened.release()
+    cached.release()  # letzte Referenz: geschlossen
+    assert not cached.retain()
+    fresh = TenantWorkspace.acquire(tenant)
+    assert fresh is not cached and len(fresh.store) == 1
+    fresh.release()
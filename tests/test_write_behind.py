@@ -0,0 +1,147 @@
+"""Write-Behind-Queue und Entwürfe: Zusammenfassen, Flush, Schließen, Read-your-writes."""
+import atexit
+import threading
+import time
+import uuid
+
+import pytest
+
+from drafts import DraftStore
+from write_behind import DeferredSave, WriteBehindQueue
+
+
+class Recorder:
+    def __init__(self):
+        self.batches = []
+        self.written = threading.Event()
+
+    def __call__(self, batch):
+        self.batches.append(dict(batch))
+        self.written.set()
+
+
+def test_puts_are_coalesced_per_key():
+    recorder = Recorder()
+    queue = WriteBehindQueue(recorder, delay=60, max_delay=60)
+    for i in range(100):
+        queue.put("a", i)
+        queue.put("b", -i)
+    assert queue.get("a") == 99
+    queue.flush()
+    assert recorder.batches == [{"a": 99, "b": -99}]
+    assert queue.pending() == {}
+    queue.close()
+    assert queue.stats["puts"] == 200 and queue.stats["writes"] == 2
+
+
+def test_background_write_after_delay():
+    recorder = Recorder()
+    queue = WriteBehindQueue(recorder, delay=0.05, max_delay=1.0)
+    queue.put("a", 1)
+    assert recorder.written.wait(2)
+    assert recorder.batches == [{"a": 1}]
+    queue.close()
+
+
+def test_max_delay_bounds_continuous_puts():
+    recorder = Recorder()
+    queue = WriteBehindQueue(recorder, delay=0.2, max_delay=0.3)
+    deadline = time.monotonic() + 2
+    while not recorder.written.is_set() and time.monotonic() < deadline:
+        queue.put("a", time.monotonic())  # nie 0,2 s Ruhe
+        time.sleep(0.02)
+    assert recorder.written.is_set()
+    queue.close()
+
+
+def test_close_flushes_and_rejects_further_puts():
+    recorder = Recorder()
+    queue = WriteBehindQueue(recorder, delay=60, max_delay=60)
+    queue.put("a", 1)
+    queue.close()
+    assert recorder.batches == [{"a": 1}]
+    with pytest.raises(RuntimeError):
+        queue.put("a", 2)
+    queue.close()  # idempotent
+
+
+def test_failed_batch_keeps_writer_alive():
+    calls = []
+
+    def write(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise OSError("Platte voll")
+
+    queue = WriteBehindQueue(write, delay=60, max_delay=60)
+    queue.put("a", 1)
+    queue.flush()
+    queue.put("a", 2)
+    queue.close()
+    assert calls == [{"a": 1}, {"a": 2}]
+    assert queue.stats["errors"] == 1
+
+
+def test_failed_batch_is_retried_unless_superseded():
+    calls = []
+
+    def write(batch):
+        calls.append(dict(batch))
+        if len(calls) == 1:
+            raise OSError("Platte voll")
+
+    queue = WriteBehindQueue(write, delay=60, max_delay=60)
+    queue.put("a", 1)
+    queue.put("b", 1)
+    queue.flush()
+    assert queue.pending() == {"a": 1, "b": 1}
+    queue.put("b", 2)  # neuerer Wert ersetzt den fehlgeschlagenen
+    queue.flush()
+    assert calls == [{"a": 1, "b": 1}, {"a": 1, "b": 2}]
+    assert queue.pending() == {}
+    queue.close()
+
+
+def test_close_releases_atexit_hook(monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    monkeypatch.setattr(atexit, "unregister", registered.remove)
+    queue = WriteBehindQueue(Recorder(), delay=60, max_delay=60)
+    assert registered == [queue.close]
+    queue.close()
+    assert registered == []
+
+
+def test_deferred_save_runs_once_per_burst():
+    saves = []
+    saver = DeferredSave(lambda: saves.append(1), delay=60, max_delay=60)
+    for _ in range(50):
+        saver.request()
+    saver.flush()
+    assert saves == [1]
+    saver.close()
+    assert saves == [1]
+
+
+def test_drafts_read_your_writes_and_persist(tmp_path):
+    draft_id = uuid.uuid4().hex
+    drafts = DraftStore(tmp_path, delay=60, max_delay=60)
+    drafts.save(draft_id, {"strategy_0": 2}, name="Pilot")
+    drafts.save(draft_id, {"strategy_0": 4}, name="Pilot", assessment_id="a" * 32)
+    assert drafts.load(draft_id)["values"] == {"strategy_0": 4}
+    assert not (tmp_path / f"{draft_id}.json").exists()
+    drafts.close()
+
+    reopened = DraftStore(tmp_path)
+    draft = reopened.load(draft_id)
+    assert draft["values"] == {"strategy_0": 4} and draft["assessment_id"] == "a" * 32
+    reopened.close()
+
+
+def test_drafts_reject_non_opaque_ids(tmp_path):
+    drafts = DraftStore(tmp_path)
+    with pytest.raises(ValueError):
+        drafts.save("../manifest", {})
+    assert drafts.load("Pilot EAM Assessment") is None
+    assert drafts.load("../" + uuid.uuid4().hex) is None
+    drafts.close()
@@ -0,0 +1,146 @@
+"""
+Debounced Write-Behind-Queue.
+
+Schreibwünsche werden je Schlüssel zusammengefasst (nur der letzte Wert
+zählt) und von einem Hintergrund-Thread geschrieben, sobald für einen
+Schlüssel `delay` Sekunden Ruhe herrscht – spätestens aber nach `max_delay`.
+Hunderte Sessions, die gleichzeitig speichern, erzeugen so wenige, gebündelte
+Schreibvorgänge statt synchroner Disk-I/O im Script-Run. Schlägt ein Batch
+fehl, kommen seine Schlüssel zurück in die Queue (sofern inzwischen kein
+neuerer Wert vorliegt) und werden nach `delay` erneut geschrieben.
+"""
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    def __init__(self, write, delay: float = 1.0, max_delay: float = 5.0, name: str = "write-behind"):
+        """`write(batch)` erhält ein Dict Schlüssel -> letzter Wert und läuft im Hintergrund-Thread."""
+        self._write = write
+        self.delay = delay
+        self.max_delay = max_delay
+        self._pending = {}
+        self._first_put = {}
+        self._last_put = {}
+        self._cond = threading.Condition()
+        # Serialisiert Entnahme + Schreiben, damit ein älterer Wert nie einen neueren überholt
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self.stats = {"puts": 0, "writes": 0, "batches": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, key, value):
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-Behind-Queue ist bereits geschlossen.")
+            self._pending[key] = value
+            self._last_put[key] = now
+            self._first_put.setdefault(key, now)
+            self.stats["puts"] += 1
+            self._cond.notify()
+
+    def get(self, key, default=None):
+        """Noch nicht geschriebener Wert eines Schlüssels (Read-your-writes)."""
+        with self._cond:
+            return self._pending.get(key, default)
+
+    def pending(self) -> dict:
+        with self._cond:
+            return dict(self._pending)
+
+    def flush(self):
+        """Schreibt alle ausstehenden Werte sofort (synchron)."""
+        with self._write_lock:
+            with self._cond:
+                batch = self._take(list(self._pending))
+            self._write_batch(batch)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        atexit.unregister(self.close)
+        self._thread.join(timeout=max(self.max_delay, 1.0) + 5)
+        self.flush()
+
+    # --- Intern ----------------------------------------------------
+    def _deadline(self, key) -> float:
+        return min(self._last_put[key] + self.delay, self._first_put[key] + self.max_delay)
+
+    def _take(self, keys) -> dict:
+        batch = {}
+        for key in keys:
+            batch[key] = self._pending.pop(key)
+            del self._first_put[key], self._last_put[key]
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._pending:
+                        wait = min(self._deadline(k) for k in self._pending) - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+            with self._write_lock:
+                with self._cond:
+                    now = time.monotonic()
+                    batch = self._take([k for k in self._pending if self._deadline(k) <= now])
+                self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+        try:
+            self._write(batch)
+            self.stats["writes"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception:  # noqa: BLE001 – ein Fehler darf den Writer-Thread nicht beenden
+            self.stats["errors"] += 1
+            logger.exception("Write-Behind-Batch mit %d Einträgen fehlgeschlagen", len(batch))
+            self._requeue(batch)
+
+    def _requeue(self, batch):
+        """Fehlgeschlagene Werte erneut einplanen; neuere Werte desselben Schlüssels haben Vorrang."""
+        now = time.monotonic()
+        with self._cond:
+            for key, value in batch.items():
+                if key not in self._pending:
+                    self._pending[key] = value
+                    self._first_put[key] = self._last_put[key] = now
+            self._cond.notify()
+
+
+class DeferredSave:
+    """Bündelt Speicherwünsche eines Objekts: `request()` ist billig, `save()` läuft im
+    Hintergrund nach `delay` Sekunden Ruhe, spätestens nach `max_delay` – und beim Beenden."""
+
+    def __init__(self, save, delay: float = 2.0, max_delay: float = 10.0, name: str = "deferred-save"):
+        self._queue = WriteBehindQueue(lambda batch: save(), delay, max_delay, name=name)
+
+    def request(self):
+        self._queue.put("save", True)
+
+    @property
+    def stats(self) -> dict:
+        return dict(self._queue.stats)
+
+    def flush(self):
+        self._queue.flush()
+
+    def close(self):
+        self._queue.close()